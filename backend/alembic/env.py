@@ -23,6 +23,7 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 
 from app.core.database import Base
+import app.model  # noqa: F401  注册模型到 Base.metadata
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,38 @@
+"""add member filter indexes
+
+Revision ID: 7c41d2e9a0b5
+Revises: f2964ebb8ec3
+Create Date: 2026-10-18 11:20:43.915027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41d2e9a0b5'
+down_revision: Union[str, Sequence[str], None] = 'f2964ebb8ec3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_college_enum_id', 'users', ['college_enum', 'id'], unique=False)
+    op.create_index('ix_users_level_id', 'users', ['level', 'id'], unique=False)
+    op.create_index('ix_users_create_at', 'users', ['create_at'], unique=False)
+    op.create_index(
+        'ix_user_department_association_department_id',
+        'user_department_association',
+        ['department_id', 'user_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_department_association_department_id', table_name='user_department_association')
+    op.drop_index('ix_users_create_at', table_name='users')
+    op.drop_index('ix_users_level_id', table_name='users')
+    op.drop_index('ix_users_college_enum_id', table_name='users')
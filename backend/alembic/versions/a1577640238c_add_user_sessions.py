@@ -0,0 +1,47 @@
+"""add user sessions
+
+Revision ID: a1577640238c
+Revises: 7c41d2e9a0b5
+Create Date: 2026-10-18 12:35:08.214630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1577640238c'
+down_revision: Union[str, Sequence[str], None] = '7c41d2e9a0b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_sessions',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('token_hash', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_user_sessions_user_id', 'user_sessions', ['user_id'], unique=False)
+
+    # 不再保存明文 token, 已登录的用户需要重新登录.
+    # SQLite 3.35+ 可直接删除未被索引与触发器引用的列, 不重建表, 保留成员搜索索引的触发器
+    op.drop_index('ix_users_token', table_name='users')
+    op.drop_column('users', 'token')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('users', sa.Column('token', sa.String(length=255), nullable=True))
+    op.create_index('ix_users_token', 'users', ['token'], unique=True)
+    op.drop_index('ix_user_sessions_user_id', table_name='user_sessions')
+    op.drop_table('user_sessions')
@@ -0,0 +1,99 @@
+"""add member search index
+
+Revision ID: f2964ebb8ec3
+Revises: 1a9da5d83261
+Create Date: 2026-10-18 11:05:12.381204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2964ebb8ec3'
+down_revision: Union[str, Sequence[str], None] = '1a9da5d83261'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PUBLIC_COLUMNS = ["qq_id", "nickname", "mc_name"]
+SENSITIVE_COLUMNS = ["real_name", "student_id", "college_name", "major"]
+
+# PostgreSQL: 索引名 -> 索引表达式, 须与 app.search.backend 中的查询表达式一致
+TRGM_INDEXES = {
+    "ix_users_qq_id_trgm": "lower(CAST(qq_id AS VARCHAR))",
+    "ix_users_nickname_trgm": "nickname",
+    "ix_users_mc_name_trgm": "mc_name",
+    "ix_users_real_name_trgm": "real_name",
+    "ix_users_student_id_trgm": "student_id",
+    "ix_users_college_name_trgm": "college_name",
+    "ix_users_major_trgm": "major",
+}
+
+
+def _create_fts_table(name: str, columns: list[str]) -> None:
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+
+    op.execute(
+        f"CREATE VIRTUAL TABLE {name} USING fts5("
+        f"{column_list}, content='users', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+
+    # 同步触发器, 只在相关列变化时更新索引
+    op.execute(
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON users BEGIN "
+        f"INSERT INTO {name}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+        f"END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON users BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {name}_au AFTER UPDATE OF {column_list} ON users BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {name}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+        f"END"
+    )
+
+
+def _drop_fts_table(name: str) -> None:
+    for suffix in ("ai", "ad", "au"):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}_{suffix}")
+    op.execute(f"DROP TABLE IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        _create_fts_table("users_fts_public", PUBLIC_COLUMNS)
+        _create_fts_table("users_fts_sensitive", SENSITIVE_COLUMNS)
+    elif dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for index_name, expression in TRGM_INDEXES.items():
+            op.create_index(
+                index_name,
+                "users",
+                [sa.text(f"({expression}) gin_trgm_ops")],
+                postgresql_using="gin",
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        _drop_fts_table("users_fts_sensitive")
+        _drop_fts_table("users_fts_public")
+    elif dialect == "postgresql":
+        for index_name in TRGM_INDEXES:
+            op.drop_index(index_name, table_name="users")
@@ -1,19 +1,27 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 import app.handler.auth as auth
 import app.handler.signup as signup
 import app.handler.profile as profile
 import app.handler.member as member
+import app.handler.member_transfer as member_transfer
+import app.handler.department as department
+from app.schema.department import DepartmentMembersResponse
+from app.schema.member import MemberImportResponse, MemberListResponse, SearchInfoResponse
+from app.schema.signup import CollegeListResponse
+from app.utils.rate_limit import CHECK_QQ_LIMITER, LOGIN_IP_LIMITER
 
 router = APIRouter(prefix="/api")
 
 # auth
-router.post("/login", name="login")(auth.login_handler)
+router.post("/login", name="login", dependencies=[Depends(LOGIN_IP_LIMITER)])(auth.login_handler)
 router.get("/logout", name="logout")(auth.logout_handler)
 
 # signup
-router.get("/signup/info", name="signup_info")(signup.get_info_handler)
-router.get("/signup/check_qq", name="signup_check_qq")(signup.check_qq_handler)
+router.get("/signup/info", name="signup_info", response_model=CollegeListResponse)(signup.get_info_handler)
+router.get(
+    "/signup/check_qq", name="signup_check_qq", dependencies=[Depends(CHECK_QQ_LIMITER)],
+)(signup.check_qq_handler)
 router.post("/signup", name="signup")(signup.signup_handler)
 
 # profile
@@ -22,5 +30,15 @@ router.put("/profile/update", name="profile_update")(profile.update_profile_hand
 router.put("/profile/change_password", name="change_password")(profile.change_password_handler)
 
 # member
-router.get("/member/info", name="search_info")(member.get_search_info_handler)
-router.post("/member/search", name="member_search")(member.search_handler)
+router.get("/member/info", name="search_info", response_model=SearchInfoResponse)(member.get_search_info_handler)
+router.post("/member/search", name="member_search", response_model=MemberListResponse)(member.search_handler)
+router.post("/member/export", name="member_export")(member_transfer.export_handler)
+router.post("/member/import", name="member_import", response_model=MemberImportResponse)(member_transfer.import_handler)
+
+# department
+router.post(
+    "/department/{code}/members", name="department_add_members", response_model=DepartmentMembersResponse,
+)(department.add_members_handler)
+router.delete(
+    "/department/{code}/members", name="department_remove_members", response_model=DepartmentMembersResponse,
+)(department.remove_members_handler)
@@ -7,22 +7,104 @@ class AppConfig(BaseSettings):
     """应用配置
 
     Attributes:
+        HOST (str): 服务器监听地址
         PORT (int): 服务器端口
+        WORKERS (int): 工作进程数
+        REUSE_PORT (bool): 多进程时各进程以 SO_REUSEPORT 绑定端口，否则共享主进程绑定的套接字
+        GRACEFUL_SHUTDOWN_TIMEOUT (int): 关闭时等待处理中请求完成的最长时间，单位秒
         DATABASE_URL (str): 数据库连接字符串
         LOG_PATH (Path): 日志文件路径
+        LOG_FORMAT (str): 日志格式, 可选 text / json
+        LOG_ENQUEUE (bool): 日志是否经后台队列写出，关闭时在调用方同步写出
+        LOG_ACCESS_SAMPLE_RATE (float): 访问日志的采样比例，0~1，5xx 响应始终记录
+        LOG_AUTH_FAILURE_RATE_LIMIT (int): 每种认证失败日志每秒最多输出的条数，0 表示不限制
         DEBUG (bool): 是否启用调试模式
         SECRET_KEY (str): 用于加密的密钥
         NO_LOGIN (bool): 免登录模式
         TIME_OUT (int): 请求超时时间，单位秒
+        SESSION_CACHE_SIZE (int): 登录会话缓存的最大条目数
+        SESSION_CACHE_TTL (int): 登录会话缓存条目的存活时间，单位秒
+        SESSION_FLUSH_INTERVAL (int): 会话最近访问时间的写回间隔，单位秒
+        SESSION_MAX_AGE (int): 登录 token 自签发起的最长有效期，单位秒，超过后须重新登录
+        SEARCH_COUNT_CACHE_TTL (int): 成员搜索总数的缓存时间，单位秒
+        SEARCH_SINGLE_FLIGHT (bool): 是否合并相同的并发成员搜索，只执行一次查询
+        SEARCH_RESULT_CACHE_TTL (float): 成员搜索结果的缓存时间，单位秒，成员变化时失效，0 表示不缓存
+        SEARCH_BACKEND (str): 全局搜索后端, 可选 auto / like / fts5 / pg_trgm
+        MEMBER_INDEX (bool): 是否启用内存成员索引
+        MEMBER_INDEX_REFRESH_INTERVAL (int): 内存成员索引的全量重建间隔，单位秒，0 表示不重建
+        QQ_REGISTRY_REFRESH_INTERVAL (int): 已注册 QQ 号集合的全量重建间隔，单位秒，0 表示不重建
+        PASSWORD_EXECUTOR (str): 密码哈希的执行池类型, 可选 thread / process
+        PASSWORD_WORKERS (int): 密码哈希执行池的工作线程(进程)数
+        PASSWORD_MAX_CONCURRENCY (int): 同时提交到执行池的密码哈希任务上限
+        CATALOG_CACHE_TTL (int): 搜索信息(部门列表等)缓存的存活时间，单位秒，直接修改数据库中的部门后须等待过期
+        SLOW_REQUEST_THRESHOLD (float): 慢请求日志阈值，单位秒
+        SLOW_QUERY_THRESHOLD (float): 慢查询日志阈值，单位秒
+        EVENT_LOOP_LAG_INTERVAL (float): 事件循环延迟的采样间隔，单位秒，0 表示不采样
+        SQLITE_READ_POOL_SIZE (int): SQLite 读连接池大小，写操作始终使用单个连接
+        SQLITE_READ_MAX_OVERFLOW (int): SQLite 读连接池最大溢出连接数
+        SQLITE_BUSY_TIMEOUT (int): SQLite 等待数据库锁的时间，单位毫秒
+        READ_DATABASE_URL (str): 只读副本连接字符串，多个副本以逗号分隔，为空时读写均使用主库
+        REPLICA_HEALTH_CHECK_INTERVAL (int): 只读副本健康检查间隔，单位秒
+        READ_AFTER_WRITE_WINDOW (int): 用户写入后改从主库读取的时间，单位秒，应大于副本复制延迟
+        MEMBER_EXPORT_BATCH_SIZE (int): 导出成员时每次从数据库读取的行数
+        MEMBER_IMPORT_BATCH_SIZE (int): 导入成员时每批写入的行数
+        MEMBER_IMPORT_MAX_SIZE (int): 导入文件的大小上限，单位字节
+        RATE_LIMIT_STORAGE_URL (str): 限流状态的存储地址，为空时保存在进程内存中，多进程部署时填写 redis:// 地址，需安装 redis 可选依赖(`uv sync --extra redis`)
+        RATE_LIMIT_WINDOW (int): 限流的时间窗口，单位秒
+        LOGIN_IP_RATE_LIMIT (int): 每个 IP 在时间窗口内的登录次数上限，0 表示不限制
+        LOGIN_QQ_RATE_LIMIT (int): 每个 QQ 号在时间窗口内的登录次数上限，0 表示不限制
+        CHECK_QQ_RATE_LIMIT (int): 每个 IP 在时间窗口内检查 QQ 号的次数上限，0 表示不限制
+        CHECK_QQ_TARGET_RATE_LIMIT (int): 每个 QQ 号在时间窗口内被检查的次数上限，0 表示不限制
     """
 
+    HOST: str = "0.0.0.0"
     PORT: int = 8080
+    WORKERS: int = 1
+    REUSE_PORT: bool = False
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
     DATABASE_URL: str = "sqlite+aiosqlite:///./data/test.db"
     LOG_PATH: Path = Path("./logs")
+    LOG_FORMAT: str = "text"
+    LOG_ENQUEUE: bool = True
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0
+    LOG_AUTH_FAILURE_RATE_LIMIT: int = 10
     DEBUG: bool = False
     SECRET_KEY: str = ""
     NO_LOGIN: bool = False
     TIME_OUT: int = 60 * 60
+    SESSION_CACHE_SIZE: int = 10000
+    SESSION_CACHE_TTL: int = 60
+    SESSION_FLUSH_INTERVAL: int = 30
+    SESSION_MAX_AGE: int = 24 * 60 * 60
+    SEARCH_COUNT_CACHE_TTL: int = 10
+    SEARCH_SINGLE_FLIGHT: bool = True
+    SEARCH_RESULT_CACHE_TTL: float = 0
+    SEARCH_BACKEND: str = "auto"
+    MEMBER_INDEX: bool = False
+    MEMBER_INDEX_REFRESH_INTERVAL: int = 300
+    QQ_REGISTRY_REFRESH_INTERVAL: int = 300
+    PASSWORD_EXECUTOR: str = "thread"
+    PASSWORD_WORKERS: int = 4
+    PASSWORD_MAX_CONCURRENCY: int = 4
+    CATALOG_CACHE_TTL: int = 300
+    SLOW_REQUEST_THRESHOLD: float = 1.0
+    SLOW_QUERY_THRESHOLD: float = 0.2
+    EVENT_LOOP_LAG_INTERVAL: float = 0.5
+    SQLITE_READ_POOL_SIZE: int = 10
+    SQLITE_READ_MAX_OVERFLOW: int = 30
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    READ_DATABASE_URL: str = ""
+    REPLICA_HEALTH_CHECK_INTERVAL: int = 10
+    READ_AFTER_WRITE_WINDOW: int = 5
+    MEMBER_EXPORT_BATCH_SIZE: int = 1000
+    MEMBER_IMPORT_BATCH_SIZE: int = 500
+    MEMBER_IMPORT_MAX_SIZE: int = 50 * 1024 * 1024
+    RATE_LIMIT_STORAGE_URL: str = ""
+    RATE_LIMIT_WINDOW: int = 60
+    LOGIN_IP_RATE_LIMIT: int = 20
+    LOGIN_QQ_RATE_LIMIT: int = 5
+    CHECK_QQ_RATE_LIMIT: int = 30
+    CHECK_QQ_TARGET_RATE_LIMIT: int = 10
 
     class Config:
         env_file = ".env"
@@ -32,6 +114,12 @@ class AppConfig(BaseSettings):
     def valid(self):
         if self.SECRET_KEY == "":
             raise Exception("SECRET_KEY 未设置，请在 .env 文件中设置 SECRET_KEY")
+        if self.SEARCH_BACKEND not in ("auto", "like", "fts5", "pg_trgm"):
+            raise Exception(f"SEARCH_BACKEND 无效: {self.SEARCH_BACKEND}")
+        if self.LOG_FORMAT not in ("text", "json"):
+            raise Exception(f"LOG_FORMAT 无效: {self.LOG_FORMAT}")
+        if self.PASSWORD_EXECUTOR not in ("thread", "process"):
+            raise Exception(f"PASSWORD_EXECUTOR 无效: {self.PASSWORD_EXECUTOR}")
 
 
 CONFIG = AppConfig()
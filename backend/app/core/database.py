@@ -1,5 +1,10 @@
+import asyncio
+import time
 from pathlib import Path
+from typing import Optional
 
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -7,55 +12,325 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+# 不从 fastapi 导入: 只使用数据库的场景(alembic, 启动脚本的主进程)不需要加载 FastAPI
+from starlette.requests import Request
 
 from app.core.config import CONFIG
+from app.core.instrumentation import instrument_engine
 from app.core.logger import logger
 
 
 SQLALCHEMY_DATABASE_URL = CONFIG.DATABASE_URL
 
-if SQLALCHEMY_DATABASE_URL == "sqlite+aiosqlite:///./data/test.db":
-    logger.info("当前使用的是测试数据库")
-
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    DATABASE_URL = Path(SQLALCHEMY_DATABASE_URL.split("///")[1])
-    if not DATABASE_URL.parent.exists():
-        DATABASE_URL.parent.mkdir(parents=True, exist_ok=True)
-        print(f"已创建: {DATABASE_URL.parent}")
-
-
-# 创建异步引擎
-engine: AsyncEngine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_size=10,  # 连接池初始大小
-    max_overflow=30,  # 连接池最大溢出连接数
-    pool_timeout=30,  # 连接池超时时间
-    pool_recycle=3600,  # 连接回收时间
-    pool_pre_ping=True,  # 连接池预检查
-    echo=False,  # 是否输出SQL日志
-)
+IS_SQLITE = "sqlite" in SQLALCHEMY_DATABASE_URL
+
+# SQLite 连接参数, 每个连接建立时设置
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # 读写互不阻塞
+    "synchronous": "NORMAL",  # WAL 模式下可保证一致性, 只在检查点时同步
+    "busy_timeout": CONFIG.SQLITE_BUSY_TIMEOUT,  # 等待锁的时间, 单位毫秒
+    "mmap_size": 256 * 1024 * 1024,  # 内存映射读取
+    "cache_size": -64 * 1024,  # 页缓存大小, 负数单位为 KiB
+}
+
+
+def _set_sqlite_pragmas(query_only: bool):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        # 读连接禁止写入, 路由错误时立即报错而不是争抢写锁
+        if query_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return on_connect
+
+
+def _create_pooled_engine(url: str) -> AsyncEngine:
+    # 创建异步引擎
+    return create_async_engine(
+        url,
+        pool_size=10,  # 连接池初始大小
+        max_overflow=30,  # 连接池最大溢出连接数
+        pool_timeout=30,  # 连接池超时时间
+        pool_recycle=3600,  # 连接回收时间
+        pool_pre_ping=True,  # 连接池预检查
+        echo=False,  # 是否输出SQL日志
+    )
+
+
+def _create_read_engine(url: str) -> AsyncEngine:
+    if "sqlite" not in url:
+        return _create_pooled_engine(url)
+
+    # 会话在提交前一直占用连接, 读连接池需要与并发请求数相当
+    read_engine = create_async_engine(
+        url,
+        pool_size=CONFIG.SQLITE_READ_POOL_SIZE,
+        max_overflow=CONFIG.SQLITE_READ_MAX_OVERFLOW,
+        pool_timeout=30,
+        echo=False,
+    )
+    event.listen(read_engine.sync_engine, "connect", _set_sqlite_pragmas(query_only=True))
+    return read_engine
+
+
+def _create_engines() -> tuple[AsyncEngine, AsyncEngine]:
+    """按数据库方言创建读引擎与写引擎
+
+    SQLite 同一时刻只允许一个写事务, 多个写连接只会在数据库锁上互相等待,
+    因此写操作使用单个连接串行执行, 读操作使用连接池并发执行(WAL 模式下读写互不阻塞).
+    其他数据库读写共用同一个连接池.
+    """
+    if IS_SQLITE:
+        read_engine = _create_read_engine(SQLALCHEMY_DATABASE_URL)
+        write_engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL,
+            pool_size=1,  # 单个写连接
+            max_overflow=0,
+            pool_timeout=30,
+            echo=False,
+        )
+        event.listen(write_engine.sync_engine, "connect", _set_sqlite_pragmas(query_only=False))
+        return read_engine, write_engine
+
+    pooled_engine = _create_pooled_engine(SQLALCHEMY_DATABASE_URL)
+    return pooled_engine, pooled_engine
+
+
+# 读引擎与写引擎, 由 `init_engines` 创建
+engine: Optional[AsyncEngine] = None
+write_engine: Optional[AsyncEngine] = None
+
+
+class RoutingSession(Session):
+    """按语句类型选择连接的会话
 
-async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    flush 与 INSERT / UPDATE / DELETE 语句使用写引擎, 其余查询使用读引擎.
+    事务一旦写入, 之后的查询也使用写引擎, 以读到本事务中尚未提交的修改;
+    `info["write"]` 标记本事务是否写入, 提交或回滚后清除.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if self.info.get("write"):
+            return write_engine.sync_engine
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["write"] = True
+            return write_engine.sync_engine
+        return engine.sync_engine
+
+
+class ReadOnlySession(Session):
+    """只读会话
+
+    禁止 flush, 不需要提交. PostgreSQL 上以 `SET TRANSACTION READ ONLY` 开启事务,
+    SQLite 的读连接本身为 `query_only`.
+    """
+
+
+@event.listens_for(ReadOnlySession, "after_begin")
+def _set_read_only(session: Session, transaction, connection):
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _reject_flush(session: Session, flush_context, instances):
+    raise RuntimeError("只读会话不能写入数据")
+
+
+async_session = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+)
 
 Base = declarative_base()
 
 
+class ReplicaSet:
+    """只读副本
+
+    按轮询顺序从健康的副本中选择引擎, 后台任务定期执行 `SELECT 1` 检查副本是否可用.
+    没有可用副本时返回 None, 由调用方回退到主库.
+
+    副本存在复制延迟, 用户自己写入后 `READ_AFTER_WRITE_WINDOW` 秒内的读取改用主库,
+    保证用户能读到自己的修改. 写入记录只保存在当前进程中.
+
+    Attributes:
+        engines (list[AsyncEngine]): 所有副本引擎.
+        healthy (list[AsyncEngine]): 当前健康的副本引擎.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], read_after_write_window: float):
+        self.engines = engines
+        self.healthy = list(engines)
+        self._next = 0
+        self.read_after_write_window = read_after_write_window
+        # 用户 id -> 改回副本读取的时间
+        self._recent_writes: dict[int, float] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        if not self.healthy:
+            return None
+        self._next = (self._next + 1) % len(self.healthy)
+        return self.healthy[self._next]
+
+    def mark_write(self, user_id: int):
+        if not self.engines:
+            return
+        now = time.monotonic()
+        # 顺带清理过期记录, 避免无限增长
+        if len(self._recent_writes) > 10000:
+            self._recent_writes = {k: v for k, v in self._recent_writes.items() if v > now}
+        self._recent_writes[user_id] = now + self.read_after_write_window
+
+    def recently_wrote(self, user_id: int) -> bool:
+        return self._recent_writes.get(user_id, 0) > time.monotonic()
+
+    @staticmethod
+    async def _ping(replica: AsyncEngine, timeout: float) -> bool:
+        try:
+            async with asyncio.timeout(timeout):
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.warning(f"只读副本不可用 {replica.url.render_as_string()}: {e!r}")
+            return False
+
+    async def check_health(self, timeout: float = 5):
+        results = await asyncio.gather(*(self._ping(replica, timeout) for replica in self.engines))
+        healthy = [replica for replica, ok in zip(self.engines, results) if ok]
+        if len(healthy) != len(self.healthy):
+            logger.info(f"可用只读副本: {len(healthy)}/{len(self.engines)}")
+        self.healthy = healthy
+
+    async def monitor(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+
+    async def dispose(self):
+        for replica in self.engines:
+            await replica.dispose()
+
+
+# 副本引擎由 `init_engines` 创建
+READ_REPLICAS = ReplicaSet([], read_after_write_window=CONFIG.READ_AFTER_WRITE_WINDOW)
+
+
+def init_engines():
+    """创建数据库引擎, 重复调用时不做任何事
+
+    导入本模块时不创建引擎, 也不创建数据目录, 由应用启动(`lifespan`)或 `init_db` 调用.
+    """
+    global engine, write_engine
+    if engine is not None:
+        return
+
+    if SQLALCHEMY_DATABASE_URL == "sqlite+aiosqlite:///./data/test.db":
+        logger.info("当前使用的是测试数据库")
+
+    if IS_SQLITE:
+        database_path = Path(SQLALCHEMY_DATABASE_URL.split("///")[1])
+        if not database_path.parent.exists():
+            database_path.parent.mkdir(parents=True, exist_ok=True)
+            logger.info(f"已创建: {database_path.parent}")
+
+    engine, write_engine = _create_engines()
+    READ_REPLICAS.engines = [
+        _create_read_engine(url.strip())
+        for url in CONFIG.READ_DATABASE_URL.split(",")
+        if url.strip()
+    ]
+    READ_REPLICAS.healthy = list(READ_REPLICAS.engines)
+
+    for created in (engine, write_engine, *READ_REPLICAS.engines):
+        instrument_engine(created)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _record_user_write(session: Session):
+    # `get_current_user` 在会话中记录当前用户, 用于之后的读己之写
+    user_id = session.info.get("user_id")
+    if session.info.pop("write", False) and user_id is not None:
+        READ_REPLICAS.mark_write(user_id)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _clear_write(session: Session):
+    session.info.pop("write", None)
+
+
+def has_pending_writes(session: AsyncSession) -> bool:
+    """会话中是否有未提交的修改(未 flush 的对象变更, 或本事务中已执行的写入)"""
+    return bool(session.new or session.dirty or session.deleted or session.info.get("write"))
+
+
 async def init_db():
     """初始化数据库"""
-    async with engine.begin() as conn:
+    # 导入模型, 注册到 `Base.metadata`
+    import app.model  # noqa: F401
+
+    init_engines()
+    async with write_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
+async def dispose_engines():
+    if engine is None:
+        return
+    await engine.dispose()
+    if write_engine is not engine:
+        await write_engine.dispose()
+    await READ_REPLICAS.dispose()
+
+
+def read_session(user_id: Optional[int] = None) -> AsyncSession:
+    """创建只读会话
+
+    存在可用的只读副本且该用户近期没有写入时使用副本, 否则使用主库的读引擎.
+
+    Args:
+        user_id (Optional[int]): 当前用户, 用于读己之写.
+    """
+    replica = None
+    if user_id is None or not READ_REPLICAS.recently_wrote(user_id):
+        replica = READ_REPLICAS.choose()
+    return AsyncSession(
+        bind=replica or engine,
+        sync_session_class=ReadOnlySession,
+        expire_on_commit=False,
+    )
+
+
 async def get_db():
-    """获取数据库会话"""
+    """获取数据库会话
+
+    只有存在未提交的修改时才提交, 纯读取的请求关闭会话即可, 不产生写事务.
+    """
     async with async_session() as session:
         yield session
 
         try:
-            if session.is_active:
+            if session.is_active and has_pending_writes(session):
                 await session.commit()
         except Exception as e:
             await session.rollback()
             raise e
         finally:
             await session.close()
+
+
+async def get_read_db(request: Request):
+    """获取只读数据库会话, 用于不修改数据的接口, 请求结束后不提交"""
+    session_state = getattr(request.state, "session", None)
+    async with read_session(session_state.user_id if session_state else None) as session:
+        yield session
@@ -0,0 +1,103 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import CONFIG
+from app.core.logger import logger
+
+
+@dataclass
+class RequestMetrics:
+    """单个请求的耗时统计
+
+    Attributes:
+        scope (dict): 请求的 ASGI scope, 路由匹配后其中包含 `route`.
+        start (float): 请求开始时间(`time.perf_counter`).
+        sql_count (int): 执行的 SQL 语句数.
+        sql_seconds (float): SQL 语句累计耗时, 单位秒.
+        password_seconds (float): 密码哈希与验证累计耗时, 单位秒.
+        response_bytes (int): 响应体字节数.
+    """
+
+    scope: dict = field(repr=False)
+    start: float = field(default_factory=time.perf_counter)
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    password_seconds: float = 0.0
+    response_bytes: int = 0
+
+    @property
+    def name(self) -> str:
+        """路由名称, 路由匹配前为请求路径"""
+        route = self.scope.get("route")
+        return getattr(route, "name", None) or self.scope["path"]
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """`Server-Timing` 响应头的值"""
+        return ", ".join([
+            f"total;dur={self.elapsed * 1000:.1f}",
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_count} queries"',
+            f"password;dur={self.password_seconds * 1000:.1f}",
+        ])
+
+
+# 当前请求的统计, 由 `InstrumentationMiddleware` 设置, 请求之外为 None
+_CURRENT: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _CURRENT.get()
+
+
+def start_request(scope: dict) -> RequestMetrics:
+    metrics = RequestMetrics(scope=scope)
+    _CURRENT.set(metrics)
+    return metrics
+
+
+def record_password(seconds: float):
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.password_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.sql_count += 1
+        metrics.sql_seconds += elapsed
+
+    if elapsed >= CONFIG.SLOW_QUERY_THRESHOLD:
+        route = metrics.name if metrics is not None else "-"
+        logger.warning(f"慢查询 [{route}] {elapsed * 1000:.1f}ms: {statement}")
+
+
+def _handle_error(exception_context):
+    # 语句执行失败时不会触发 after_cursor_execute, 需清理开始时间
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """为引擎注册 SQL 计数与计时事件, 重复调用无副作用"""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
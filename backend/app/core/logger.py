@@ -1,79 +1,296 @@
+import asyncio
+import copy
 import logging
+import queue
+import random
 import sys
+import threading
+import time
+import traceback
 from pathlib import Path
 from types import FrameType
-from typing import cast
+from typing import Callable, Optional, TextIO, cast
 
+import orjson
 from loguru import logger
 
 from app.core.config import CONFIG
 
 LOG_PATH = Path(CONFIG.LOG_PATH)
 
+_configured = False
+# 写出日志文件的独立 logger, 见 `configure_logging`
+_file_logger = None
+
+# loguru 与标准 logging 同名的日志级别
+STANDARD_LEVELS = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
+
+# 来源已知的日志, 不输出调用位置, 转发时不查找调用方栈帧
+KNOWN_LOGGERS = [
+    "fastapi",
+    "uvicorn",
+    "uvicorn.error",
+    "uvicorn.access",
+]
+
+# JSON 格式下由格式化函数写入 `extra` 的序列化结果
+JSON_KEY = "_json"
+
 
 # 劫持 FastAPI 日志
 class InterceptHandler(logging.Handler):
+    """将标准 logging 的日志转发到 loguru
+
+    日志来源(logger 名称)记录在 `extra["logger"]`; uvicorn 访问日志的各字段同时记录在 `extra` 中,
+    JSON 格式下作为独立字段输出.
+
+    Args:
+        walk_frames (bool): 是否查找调用方所在的栈帧, 使 loguru 记录的模块与行号指向调用方.
+    """
+
+    def __init__(self, walk_frames: bool = True):
+        super().__init__()
+        self.walk_frames = walk_frames
+
     def emit(self, record: logging.LogRecord):
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-        # 获取日志调用堆栈信息
-        frame, depth = logging.currentframe(), 2
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = cast(FrameType, frame.f_back)
-            depth += 1
-        logger.opt(depth=depth, exception=record.exc_info).log(
+        level = record.levelname if record.levelname in STANDARD_LEVELS else record.levelno
+        depth = 0
+        if self.walk_frames:
+            # 获取日志调用堆栈信息
+            frame, depth = logging.currentframe(), 2
+            while frame and frame.f_code.co_filename == logging.__file__:
+                frame = cast(FrameType, frame.f_back)
+                depth += 1
+
+        extra = {"logger": record.name}
+        # uvicorn 访问日志的参数: 客户端地址, 方法, 路径, HTTP 版本, 状态码
+        if record.name == "uvicorn.access" and isinstance(record.args, tuple) and len(record.args) == 5:
+            client, method, path, _, status = record.args
+            extra.update(client=client, method=method, path=path, status=status)
+
+        logger.opt(depth=depth, exception=record.exc_info).bind(**extra).log(
             level, record.getMessage()
         )
 
 
+class AccessLogSampler(logging.Filter):
+    """按比例随机采样 uvicorn 访问日志, 5xx 响应始终保留
+
+    Args:
+        rate (float): 保留的比例, 0~1.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, tuple) and len(record.args) == 5 and record.args[4] >= 500:
+            return True
+        return random.random() < self.rate
+
+
+class LogThrottle:
+    """限制同类日志的输出频率
+
+    每个键每秒最多输出 `rate` 条, 超出的丢弃并计数, 下一秒的第一条日志附带丢弃的条数.
+
+    Attributes:
+        rate (int): 每个键每秒最多输出的条数, 0 表示不限制.
+    """
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        # 键 -> [窗口开始时间, 已输出条数, 丢弃条数]
+        self._windows: dict[str, list] = {}
+
+    def log(self, level: str, message: str, key: Optional[str] = None):
+        """输出日志, 键默认为日志内容"""
+        if self.rate > 0:
+            key = key or message
+            now = time.monotonic()
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 1:
+                dropped = window[2] if window is not None else 0
+                window = self._windows[key] = [now, 0, 0]
+                if dropped:
+                    message = f"{message} (前 1 秒内另有 {dropped} 条已省略)"
+            if window[1] >= self.rate:
+                window[2] += 1
+                return
+            window[1] += 1
+        logger.opt(depth=1).log(level, message)
+
+
+class BackgroundSink:
+    """在后台线程中写出日志的 loguru sink
+
+    调用方只把格式化后的日志放入进程内的队列(不加锁竞争, 不进行系统调用);
+    后台线程每次取出队列中已有的全部日志, 合并后一次写出.
+
+    loguru 自带的 `enqueue=True` 经多进程队列传递, 每条日志都要序列化并写管道, 调用方开销反而更大.
+
+    Args:
+        write (Callable[[str], None]): 写出一批日志, 在后台线程中调用.
+    """
+
+    def __init__(self, write: Callable[[str], None]):
+        self._write = write
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str):
+        self._queue.put(message)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            messages = [item for item in batch if isinstance(item, str)]
+            if messages:
+                try:
+                    self._write("".join(messages))
+                except Exception as e:
+                    print(f"日志写出失败: {e!r}", file=sys.stderr)
+
+            # 队列中的 Event 表示其之前的日志均已写出, None 表示停止
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in batch:
+                return
+
+    def drain(self):
+        """等待此前放入队列的日志全部写出"""
+        if not self._thread.is_alive():
+            return
+        written = threading.Event()
+        self._queue.put(written)
+        written.wait()
+
+    async def complete(self):
+        """`await logger.complete()` 时调用"""
+        await asyncio.to_thread(self.drain)
+
+    def stop(self):
+        """loguru 移除 sink 时调用, 写出剩余日志后结束后台线程"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def _stream_writer(stream: TextIO) -> Callable[[str], None]:
+    def write(text: str):
+        stream.write(text)
+        stream.flush()
+
+    return write
+
+
+def _dumps(entry: dict) -> str:
+    return orjson.dumps(entry, default=str).decode()
+
+
+def _json_format(record: dict) -> str:
+    """JSON 格式: 每行一个对象, 包含时间, 级别, 来源, 日志内容, `extra` 中的字段与异常"""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "message": record["message"],
+    }
+    entry.update((key, value) for key, value in record["extra"].items() if key != JSON_KEY)
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"][JSON_KEY] = _dumps(entry)
+    return "{extra[" + JSON_KEY + "]}\n"
+
+
 # 替换 FastAPI 的日志记录器
-def configure_logging():
+def configure_logging(force: bool = False):
+    """配置日志输出, 重复调用时不做任何事
+
+    导入本模块时不配置, 由应用启动(`lifespan`)与启动脚本调用; 此前的日志使用 loguru 的默认输出.
+    `LOG_ENQUEUE` 开启时控制台与文件均经后台队列写出, 调用方只负责格式化.
+
+    Args:
+        force (bool): 已配置时仍按当前配置重新配置.
+    """
+    global _configured, _file_logger
+    if _configured and not force:
+        return
+    _configured = True
+
     logger.remove()
+    if _file_logger is not None:
+        _file_logger.remove()
+    level = "DEBUG" if CONFIG.DEBUG else "INFO"
+    json_format = CONFIG.LOG_FORMAT == "json"
+
+    # 日志文件的轮转, 保留与压缩由 loguru 完成. 经后台队列写出时,
+    # 由一个独立的 logger(没有 handler 时复制得到)在后台线程中以原样输出整批日志
+    file_options = dict(
+        rotation="00:00",  # 每天更新
+        retention="7 days",  # 保留7天
+        compression="zip",  # 压缩
+        encoding="utf-8",
+    )
+    file_path = LOG_PATH / ("app_{time:YYYY-MM-DD}.jsonl" if json_format else "app_{time:YYYY-MM-DD}.log")
+    if CONFIG.LOG_ENQUEUE:
+        _file_logger = copy.deepcopy(logger)
+        _file_logger.add(file_path, format="{message}", level=0, **file_options)
+        console_sink = BackgroundSink(_stream_writer(sys.stdout))
+        file_sink = BackgroundSink(_file_logger.opt(raw=True).info)
+    else:
+        console_sink = sys.stdout
+        file_sink = file_path
 
     # 控制台输出
     logger.add(
-        sys.stdout,
-        format="<level>{level: <4}</level> | <cyan>{time:HH:mm:ss.SSS}</cyan> | <level>{message}</level>",
-        level="DEBUG" if CONFIG.DEBUG else "INFO",
-        colorize=True,
+        console_sink,
+        format=_json_format if json_format else (
+            "<level>{level: <4}</level> | <cyan>{time:HH:mm:ss.SSS}</cyan> | <level>{message}</level>"
+        ),
+        level=level,
+        colorize=not json_format,
     )
 
     # 文件输出
     logger.add(
-        LOG_PATH / "app_{time:YYYY-MM-DD}.log",
-        rotation="00:00",  # 每天更新
-        retention="7 days",  # 保留7天
-        compression="zip",  # 压缩
-        encoding="utf-8",
-        enqueue=True,
-        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <4} | {message}",
-        level="DEBUG" if CONFIG.DEBUG else "INFO",
+        file_sink,
+        format=_json_format if json_format else "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <4} | {message}",
+        level=level,
+        **(file_options if not CONFIG.LOG_ENQUEUE else {}),
     )
 
     # 劫持标准 logging 模块
     logging.basicConfig(
         handlers=[InterceptHandler()],
         level=0,
+        force=True,
     )
 
-    log_pool = [
-        "fastapi",
-        "uvicorn",
-        "uvicorn.error",
-        "uvicorn.access",
-    ]
-
-    if CONFIG.DEBUG:
-        log_pool.extend(["sqlalchemy.engine", "sqlalchemy.engine.Engine"])
-
     # 指定劫持日志源
-    for logger_name in log_pool:
+    for logger_name in KNOWN_LOGGERS:
         logging_logger = logging.getLogger(logger_name)
-        logging_logger.handlers = [InterceptHandler()]
+        logging_logger.handlers = [InterceptHandler(walk_frames=False)]
         logging_logger.propagate = False
 
+    if CONFIG.DEBUG:
+        for logger_name in ["sqlalchemy.engine", "sqlalchemy.engine.Engine"]:
+            logging_logger = logging.getLogger(logger_name)
+            logging_logger.handlers = [InterceptHandler()]
+            logging_logger.propagate = False
+
+    access_logger = logging.getLogger("uvicorn.access")
+    access_logger.filters = []
+    if CONFIG.LOG_ACCESS_SAMPLE_RATE < 1:
+        access_logger.addFilter(AccessLogSampler(CONFIG.LOG_ACCESS_SAMPLE_RATE))
 
-configure_logging()
-logger.info("Logger 初始化完成!")
+    logger.info("Logger 初始化完成!")
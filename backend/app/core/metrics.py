@@ -0,0 +1,181 @@
+import asyncio
+import bisect
+import time
+from typing import Callable, Iterable, Optional
+
+# Prometheus 客户端库的默认分桶, 单位秒
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """指标基类
+
+    所有指标只在事件循环线程中修改, 不加锁.
+
+    Attributes:
+        name (str): 指标名称.
+        documentation (str): 指标说明, 输出为 `# HELP`.
+        label_names (tuple[str, ...]): 标签名称.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _ValueMetric(Metric):
+    """单值指标, 可直接修改数值, 也可传入 `collect` 在输出时读取当前值
+
+    有标签时 `collect` 返回标签值元组到数值的映射, 否则返回单个数值.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Iterable[str] = (),
+            collect: Optional[Callable[[], float | dict[tuple[str, ...], float]]] = None,
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._collect = collect
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        values = self._values
+        if self._collect is not None:
+            if not self.label_names:
+                yield f"{self.name} {_format_value(self._collect())}"
+                return
+            values = self._collect()
+        for labels, value in values.items():
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+
+class Counter(_ValueMetric):
+    type = "counter"
+
+
+class Gauge(_ValueMetric):
+    type = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Iterable[str] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各分桶计数(非累计)..., +Inf 计数], 总和
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(self._sums[labels])}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}"
+
+
+class Registry:
+    """指标注册表, 以 Prometheus 文本格式输出所有指标"""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY: Histogram = REGISTRY.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route name.",
+    ("route", "method"),
+))
+REQUESTS_TOTAL: Counter = REGISTRY.register(Counter(
+    "http_requests_total",
+    "HTTP requests by route name and status code.",
+    ("route", "method", "status"),
+))
+REQUESTS_IN_FLIGHT: Gauge = REGISTRY.register(Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed.",
+))
+RATE_LIMITED_TOTAL: Counter = REGISTRY.register(Counter(
+    "rate_limited_requests_total",
+    "Requests rejected by rate limiters.",
+    ("limiter",),
+))
+EVENT_LOOP_LAG: Histogram = REGISTRY.register(Histogram(
+    "event_loop_lag_seconds",
+    "Event loop scheduling delay.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+
+
+async def monitor_event_loop(interval: float):
+    """定期测量事件循环的调度延迟, 在应用生命周期内运行"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import secrets
+import time
+from base64 import urlsafe_b64encode
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.core.config import CONFIG
+from app.core.instrumentation import record_password
+
+PASSWORD_METHOD = "pbkdf2:sha512"
+
+
+def _hash(password: str) -> str:
+    return generate_password_hash(password, method=PASSWORD_METHOD)
+
+
+def _verify(password_hash: str, password: str) -> bool:
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    """在线程池或进程池中计算密码哈希, 避免阻塞事件循环
+
+    PBKDF2 单次计算耗时数十到数百毫秒. `hashlib` 计算时会释放 GIL, 线程池即可并行;
+    进程池适用于需要与其他 CPU 密集任务完全隔离的部署.
+
+    Attributes:
+        waiting (int): 等待执行的任务数(队列深度).
+        running (int): 正在执行的任务数.
+        completed (int): 已完成的任务数.
+        max_waiting (int): 队列深度的历史峰值.
+        busy_seconds (float): 任务累计执行时间, 单位秒.
+    """
+
+    def __init__(self, executor: str, workers: int, max_concurrency: int):
+        self.executor_type = executor
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.max_waiting = 0
+        self.busy_seconds = 0.0
+
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password",
+                )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        requested_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            now = time.perf_counter()
+            self.busy_seconds += now - start
+            # 计入当前请求的密码耗时, 含排队时间
+            record_password(now - requested_at)
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password_hash: str, password: str) -> bool:
+        return await self._run(_verify, password_hash, password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+PASSWORD_HASHER = PasswordHasher(
+    executor=CONFIG.PASSWORD_EXECUTOR,
+    workers=CONFIG.PASSWORD_WORKERS,
+    max_concurrency=CONFIG.PASSWORD_MAX_CONCURRENCY,
+)
+
+
+async def hash_password(password: str) -> str:
+    """异步计算密码哈希"""
+    return await PASSWORD_HASHER.hash(password)
+
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    """批量计算密码哈希
+
+    按执行池大小分组并行计算, 一组完成后再提交下一组, 避免批量任务占满队列使登录请求长时间等待.
+    """
+    hashes = []
+    size = max(1, PASSWORD_HASHER.workers)
+    for i in range(0, len(passwords), size):
+        hashes.extend(await asyncio.gather(*(PASSWORD_HASHER.hash(p) for p in passwords[i:i + size])))
+    return hashes
+
+
+async def verify_password(password_hash: str, password: str) -> bool:
+    """异步验证密码"""
+    return await PASSWORD_HASHER.verify(password_hash, password)
+
+
+class SessionToken(NamedTuple):
+    """通过签名校验的登录 token 内容
+
+    Attributes:
+        session_id (int): 会话 ID, 即 `UserSession` 的主键.
+        user_id (int): 用户 ID.
+        issued_at (int): 签发时间, Unix 时间戳, 单位秒.
+    """
+
+    session_id: int
+    user_id: int
+    issued_at: int
+
+
+def _sign(payload: str) -> bytes:
+    digest = hmac.new(CONFIG.SECRET_KEY.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).digest()
+    return urlsafe_b64encode(digest).rstrip(b"=")
+
+
+def issue_session_token(session_id: int, user_id: int, issued_at: datetime) -> str:
+    """签发登录 token
+
+    格式为 `会话ID.用户ID.签发时间.随机串.签名`, 签名为以 `SECRET_KEY` 计算的 HMAC-SHA256.
+    数据库中只保存 `hash_session_token` 的结果.
+    """
+    payload = f"{session_id}.{user_id}.{int(issued_at.timestamp())}.{secrets.token_urlsafe(16)}"
+    return f"{payload}.{_sign(payload).decode('ascii')}"
+
+
+def parse_session_token(token: str) -> Optional[SessionToken]:
+    """校验 token 的格式与签名, 不访问数据库
+
+    Returns:
+        Optional[SessionToken]: token 内容, 格式错误或签名不符时为 None.
+    """
+    payload, _, signature = token.rpartition(".")
+    fields = payload.split(".")
+    if len(fields) != 4 or not hmac.compare_digest(signature.encode("utf-8"), _sign(payload)):
+        return None
+    try:
+        return SessionToken(int(fields[0]), int(fields[1]), int(fields[2]))
+    except ValueError:
+        return None
+
+
+def hash_session_token(token: str) -> str:
+    """数据库中保存的 token 哈希, token 本身随机性足够, 无需加盐与多轮迭代"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from starlette.middleware.sessions import SessionMiddleware
+
+from app.api import router
+from app.core.database import READ_REPLICAS, dispose_engines, init_engines
+from app.core.metrics import monitor_event_loop
+from app.handler.metrics import metrics_handler
+from app.core.logger import configure_logging, logger
+from app.core.security import PASSWORD_HASHER
+from app.search import MEMBER_INDEX, init_search_backend
+from app.utils import AuthMiddleware, InstrumentationMiddleware
+from app.utils.qq_registry import QQ_REGISTRY
+from app.utils.rate_limit import RATE_LIMIT_STORAGE
+from app.utils.session_cache import SESSION_CACHE
+from app.core.config import CONFIG
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # on_startup
+    configure_logging()
+    init_engines()
+    logger.info("验证配置文件中...")
+    try:
+        CONFIG.valid()
+    except Exception as e:
+        logger.error(f"配置文件验证失败: {e}")
+        raise e
+    logger.info("配置文件验证通过")
+    # 建表在启动工作进程前执行一次, 见 `app.server.prepare`
+    await init_search_backend()
+    SESSION_CACHE.start()
+
+    refresh_task = None
+    if CONFIG.MEMBER_INDEX:
+        await MEMBER_INDEX.load()
+        logger.info(f"成员索引加载完成, 共 {len(MEMBER_INDEX)} 人")
+        if CONFIG.MEMBER_INDEX_REFRESH_INTERVAL > 0:
+            refresh_task = asyncio.create_task(
+                MEMBER_INDEX.refresh_periodically(CONFIG.MEMBER_INDEX_REFRESH_INTERVAL)
+            )
+
+    await QQ_REGISTRY.load()
+    logger.info(f"已注册 QQ 号加载完成, 共 {len(QQ_REGISTRY)} 个")
+    registry_task = None
+    if CONFIG.QQ_REGISTRY_REFRESH_INTERVAL > 0:
+        registry_task = asyncio.create_task(
+            QQ_REGISTRY.refresh_periodically(CONFIG.QQ_REGISTRY_REFRESH_INTERVAL)
+        )
+
+    replica_task = None
+    if READ_REPLICAS:
+        await READ_REPLICAS.check_health()
+        logger.info(f"只读副本: {len(READ_REPLICAS.healthy)}/{len(READ_REPLICAS.engines)} 可用")
+        replica_task = asyncio.create_task(READ_REPLICAS.monitor(CONFIG.REPLICA_HEALTH_CHECK_INTERVAL))
+
+    lag_task = None
+    if CONFIG.EVENT_LOOP_LAG_INTERVAL > 0:
+        lag_task = asyncio.create_task(monitor_event_loop(CONFIG.EVENT_LOOP_LAG_INTERVAL))
+
+    yield
+
+    # on_shutdown
+    if refresh_task is not None:
+        refresh_task.cancel()
+    if registry_task is not None:
+        registry_task.cancel()
+    if replica_task is not None:
+        replica_task.cancel()
+    if lag_task is not None:
+        lag_task.cancel()
+    await SESSION_CACHE.stop()
+    await RATE_LIMIT_STORAGE.close()
+    PASSWORD_HASHER.shutdown()
+    await dispose_engines()
+    # 等待队列中的日志写出
+    await logger.complete()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="title",
+        debug=True,
+        lifespan=lifespan,
+        docs_url="/docs",
+        redoc_url="/redoc",
+        openapi_url="/openapi.json",
+    )
+
+    app.add_middleware(AuthMiddleware)
+
+    app.add_middleware(SessionMiddleware, secret_key=CONFIG.SECRET_KEY)
+
+    # 最外层, 统计包括认证在内的完整请求耗时
+    app.add_middleware(InstrumentationMiddleware, routes=router.routes)
+
+    app.include_router(router)
+
+    # Prometheus 监控指标, 不需要认证
+    app.get("/metrics", include_in_schema=False)(metrics_handler)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Hello World"}
+
+    return app
+
@@ -1,15 +1,18 @@
-import secrets
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
-from fastapi import Depends, HTTPException
-from sqlalchemy import select
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import delete, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
 
+from app.core.config import CONFIG
 from app.core.database import get_db
 from app.core.logger import logger
+from app.core.security import hash_session_token, issue_session_token, parse_session_token, verify_password
 from app.utils import get_current_user
-from app.model import User
+from app.utils.rate_limit import LOGIN_QQ_LIMITER
+from app.utils.session_cache import SESSION_CACHE
+from app.model import User, UserSession
 from app.schema.auth import LoginRequest, LoginResponse
 
 
@@ -17,6 +20,9 @@ async def login_handler(
         request: LoginRequest,
         db: AsyncSession = Depends(get_db),
 ):
+    # 按 IP 的限流在路由依赖中完成, 此处按目标账号限流, 均在查询与验证密码之前
+    await LOGIN_QQ_LIMITER.check(str(request.qq_id))
+
     user = (
         (await db.execute(
             select(User).where(User.qq_id == request.qq_id)
@@ -33,7 +39,7 @@ async def login_handler(
             }
         )
 
-    if not user.verify_password(request.password):
+    if not await verify_password(user.password_hash, request.password):
         raise HTTPException(
             status_code=403,
             detail={
@@ -44,8 +50,26 @@ async def login_handler(
 
 
     try:
-        user.update_at = datetime.now(timezone.utc)
-        user.token = secrets.token_hex(32)
+        # 登录后立即读取个人信息时, 副本可能尚未同步该用户
+        db.info["user_id"] = user.id
+        now = datetime.now(timezone.utc)
+        user.update_at = now
+
+        # 每次登录创建新会话, 顺带清理该用户已过期的会话
+        await db.execute(
+            delete(UserSession)
+            .where(UserSession.user_id == user.id)
+            .where(or_(
+                UserSession.last_seen_at < now - timedelta(seconds=CONFIG.TIME_OUT + CONFIG.SESSION_FLUSH_INTERVAL),
+                UserSession.created_at < now - timedelta(seconds=CONFIG.SESSION_MAX_AGE),
+            ))
+        )
+        user_session = UserSession(user_id=user.id, token_hash="", created_at=now, last_seen_at=now)
+        db.add(user_session)
+        # token 中带有会话 ID, 先写入会话以取得 ID
+        await db.flush()
+        token = issue_session_token(user_session.id, user.id, now)
+        user_session.token_hash = hash_session_token(token)
         await db.commit()
 
         response = JSONResponse(
@@ -58,8 +82,8 @@ async def login_handler(
 
         response.set_cookie(
             "token",
-            value=str(user.token),
-            max_age=86400,
+            value=token,
+            max_age=CONFIG.SESSION_MAX_AGE,
         )
 
         return response
@@ -75,14 +99,22 @@ async def login_handler(
 
 
 async def logout_handler(
+        request: Request,
         user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db)
 ):
+    # token 已由认证中间件(或 `get_current_user`)校验
+    claims = parse_session_token(request.cookies["token"])
     try:
-        user.token = None
-        user.update_at = None
+        # 只注销当前会话, 其他设备上的登录不受影响
+        await db.execute(
+            delete(UserSession)
+            .where(UserSession.id == claims.session_id)
+            .where(UserSession.user_id == user.id)
+        )
 
         await db.commit()
+        SESSION_CACHE.invalidate(claims.session_id)
         return JSONResponse(content="注销成功")
     except Exception as e:
         raise e
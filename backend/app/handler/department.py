@@ -0,0 +1,202 @@
+from fastapi import Depends, HTTPException
+from sqlalchemy import delete, exists, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.logger import logger
+from app.handler.member import invalidate_member_search
+from app.model import User, UserLevel, Department, user_department_association
+from app.search import MEMBER_INDEX
+from app.utils import get_current_user, has_permission
+from app.schema.department import DepartmentMembersRequest, DepartmentMembersResponse
+
+
+async def _get_managed_department(code: str, user: User, db: AsyncSession) -> Department:
+    """获取部门并检查当前用户能否管理其成员
+
+    超级管理员可以管理所有部门, 部长只能管理自己所在的部门.
+    """
+    department = (
+        (await db.execute(
+            select(Department).where(Department.code == code)
+        ))
+        .scalars().first()
+    )
+    if department is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "message": "部门不存在",
+                "code": "DEPARTMENT_NOT_FOUND"
+            }
+        )
+
+    if has_permission(user, UserLevel.SUPERADMIN):
+        return department
+
+    if has_permission(user, UserLevel.MINISTER):
+        is_member = (
+            await db.execute(
+                select(
+                    exists().where(
+                        user_department_association.c.user_id == user.id,
+                        user_department_association.c.department_id == department.id,
+                    )
+                )
+            )
+        ).scalar()
+        if is_member:
+            return department
+
+    raise HTTPException(
+        status_code=403,
+        detail={
+            "message": "权限不足",
+            "code": "PERMISSION_DENIED"
+        }
+    )
+
+
+async def _check_targets(qq_ids: list[int], user: User, db: AsyncSession):
+    """部长只能操作普通成员, 请求中包含其他级别的成员时整体拒绝"""
+    if has_permission(user, UserLevel.SUPERADMIN):
+        return
+
+    denied = (
+        (await db.execute(
+            select(User.qq_id)
+            .where(User.qq_id.in_(qq_ids))
+            .where(User.level != UserLevel.MEMBER)
+            .order_by(User.qq_id)
+        ))
+        .scalars().all()
+    )
+    if denied:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "message": f"部长只能操作普通成员: {', '.join(map(str, denied))}",
+                "code": "TARGET_LEVEL_DENIED"
+            }
+        )
+
+
+def _target_users(qq_ids: list[int], user: User):
+    """请求中的成员; 部长只能操作普通成员(已由 `_check_targets` 检查, 此处防止并发修改级别)"""
+    query = select(User.id).where(User.qq_id.in_(qq_ids))
+    if not has_permission(user, UserLevel.SUPERADMIN):
+        query = query.where(User.level == UserLevel.MEMBER)
+    return query
+
+
+async def add_members_handler(
+        code: str,
+        request: DepartmentMembersRequest,
+        user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+):
+    """添加部门成员
+
+    超级管理员可以管理所有部门, 部长只能管理自己所在的部门, 且只能添加普通成员.
+
+    Raises:
+        HTTPException: 403 `PERMISSION_DENIED` 无权管理该部门;
+            403 `TARGET_LEVEL_DENIED` 部长的请求中包含普通成员以外的成员, 不做任何修改.
+    """
+    department = await _get_managed_department(code, user, db)
+    await _check_targets(request.qq_ids, user, db)
+    association = user_department_association
+
+    # 单条 INSERT ... SELECT, 跳过已在部门中的成员
+    candidates = (
+        _target_users(request.qq_ids, user)
+        .add_columns(literal(department.id))
+        .where(
+            ~exists().where(
+                association.c.user_id == User.id,
+                association.c.department_id == department.id,
+            )
+        )
+    )
+    try:
+        added = (
+            await db.execute(
+                insert(association)
+                .from_select(["user_id", "department_id"], candidates)
+                .returning(association.c.user_id)
+            )
+        ).scalars().all()
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+
+        logger.error(e)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "服务器内部错误，请联系管理员",
+                "code": "SERVER_ERROR"
+            }
+        )
+
+    if added:
+        invalidate_member_search()
+        if MEMBER_INDEX.ready:
+            MEMBER_INDEX.add_to_department(department.id, added)
+
+    return DepartmentMembersResponse(
+        changed=len(added),
+        skipped=len(set(request.qq_ids)) - len(added),
+    )
+
+
+async def remove_members_handler(
+        code: str,
+        request: DepartmentMembersRequest,
+        user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+):
+    """移除部门成员
+
+    超级管理员可以管理所有部门, 部长只能管理自己所在的部门, 且只能移除普通成员.
+
+    Raises:
+        HTTPException: 403 `PERMISSION_DENIED` 无权管理该部门;
+            403 `TARGET_LEVEL_DENIED` 部长的请求中包含普通成员以外的成员, 不做任何修改.
+    """
+    department = await _get_managed_department(code, user, db)
+    await _check_targets(request.qq_ids, user, db)
+    association = user_department_association
+
+    # 单条 DELETE ... WHERE IN
+    try:
+        removed = (
+            await db.execute(
+                delete(association)
+                .where(association.c.department_id == department.id)
+                .where(association.c.user_id.in_(_target_users(request.qq_ids, user)))
+                .returning(association.c.user_id)
+            )
+        ).scalars().all()
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+
+        logger.error(e)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "服务器内部错误，请联系管理员",
+                "code": "SERVER_ERROR"
+            }
+        )
+
+    if removed:
+        invalidate_member_search()
+        if MEMBER_INDEX.ready:
+            MEMBER_INDEX.remove_from_department(department.id, removed)
+
+    return DepartmentMembersResponse(
+        changed=len(removed),
+        skipped=len(set(request.qq_ids)) - len(removed),
+    )
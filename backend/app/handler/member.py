@@ -1,28 +1,58 @@
-from datetime import timezone
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import partial
+from typing import Optional
 
-from fastapi import Depends, HTTPException
-from sqlalchemy import select, or_, and_, func, cast, String
+from fastapi import Depends, HTTPException, Request
+from starlette.responses import Response
+from sqlalchemy import Select, select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import subqueryload
 
-from app.core.database import get_db
+from app.core.config import CONFIG
+from app.core.database import READ_REPLICAS, read_session
 from app.core.logger import logger
 from app.schema.signup import CollegeInfo
+from app.search import MEMBER_INDEX, get_search_backend
 from app.utils import get_current_user, has_permission
+from app.utils.cache import TTLCache
+from app.utils.http_cache import CachedResponse
+from app.utils.member_json import member_dict, member_list_body, member_list_response
+from app.utils.single_flight import SingleFlight
 from app.model import User, UserLevel, College, Department, user_department_association
 from app.schema.member import (
     UserLevelInfo,
-    MemberInfo,
-    MemberListResponse,
     SearchInfoResponse,
     SearchRequest,
 )
 from app.schema.profile import DepartmentInfo
 
+# 搜索条件签名 -> 总数
+_COUNT_CACHE: TTLCache[tuple, int] = TTLCache(maxsize=1024, ttl=CONFIG.SEARCH_COUNT_CACHE_TTL)
 
-async def get_search_info_handler(
-        db: AsyncSession = Depends(get_db),
-):
+# 搜索请求签名 -> 序列化后的响应体, 合并相同的并发搜索
+SEARCH_FLIGHT: SingleFlight[tuple, bytes] = SingleFlight(ttl=CONFIG.SEARCH_RESULT_CACHE_TTL)
+
+# 搜索结果只读取这些列, 不加载 `password_hash` 等字段
+MEMBER_COLUMNS = (
+    User.id,
+    User.qq_id,
+    User.mc_name,
+    User.nickname,
+    User.create_at,
+    User.real_name,
+    User.student_id,
+    User.college_name,
+    User.major,
+    User.grade,
+    User.class_index,
+    User.level,
+)
+
+# 聚合部门信息时使用的分隔符: 部门之间 / 代码与名称之间
+DEPARTMENT_SEPARATOR = "\x1e"
+DEPARTMENT_FIELD_SEPARATOR = "\x1f"
+
+
+async def _build_search_info() -> SearchInfoResponse:
     colleges_info = []
     for college in College:
         if college != College.OTHERS:
@@ -32,12 +62,13 @@ async def get_search_info_handler(
             ))
 
     departments_info = []
-    departments = (
-        (await db.execute(
-            select(Department)
-        ))
-        .scalars().all()
-    )
+    async with read_session() as db:
+        departments = (
+            (await db.execute(
+                select(Department)
+            ))
+            .scalars().all()
+        )
     for department in departments:
         departments_info.append(
             DepartmentInfo(
@@ -63,122 +94,279 @@ async def get_search_info_handler(
     return response
 
 
-async def search_handler(
+# 接口不会修改学院与部门目录, 部门只在数据库中直接维护, 缓存只按 TTL 失效:
+# 直接修改部门后最多 `CATALOG_CACHE_TTL` 秒内仍返回旧的部门列表.
+# 客户端须重新验证, 以便 TTL 过期后取得新的列表
+_SEARCH_INFO = CachedResponse(
+    _build_search_info,
+    cache_control="private, no-cache",
+    ttl=CONFIG.CATALOG_CACHE_TTL,
+)
+
+
+def invalidate_member_search():
+    """成员变化后调用, 清空搜索总数与搜索结果缓存"""
+    _COUNT_CACHE.clear()
+    SEARCH_FLIGHT.invalidate()
+
+
+async def get_search_info_handler(request: Request):
+    return await _SEARCH_INFO.respond(request)
+
+
+def search_signature(request: SearchRequest, sensitive_permission: bool) -> tuple:
+    """搜索条件签名, 与分页参数无关, 用于缓存总数"""
+    return (
+        request.global_query,
+        request.create_at_start,
+        request.create_at_end,
+        tuple(sorted(request.colleges or [])),
+        tuple(sorted(request.departments or [])),
+        tuple(sorted(request.levels or [])),
+        sensitive_permission,
+    )
+
+
+def search_request_signature(request: SearchRequest, sensitive_permission: bool, after_id: Optional[int]) -> tuple:
+    """完整的搜索请求签名, 包含分页参数, 签名相同的请求结果相同"""
+    return (
+        search_signature(request, sensitive_permission),
+        request.page_size,
+        after_id,
+        # 按游标分页时忽略页码
+        request.page_index if after_id is None else None,
+    )
+
+
+def encode_cursor(user_id: int) -> str:
+    return urlsafe_b64encode(str(user_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "无效的分页游标",
+                "code": "INVALID_CURSOR"
+            }
+        )
+
+
+def departments_column(dialect_name: str):
+    """每个成员所属部门聚合为一个字符串的关联子查询
+
+    格式为 `代码\\x1f名称\\x1e代码\\x1f名称...`, 无部门时为 NULL, 使用 `parse_departments` 解析.
+
+    Args:
+        dialect_name (str): 数据库方言名称, PostgreSQL 使用 `string_agg`, 其余使用 `group_concat`.
+    """
+    item = Department.code + DEPARTMENT_FIELD_SEPARATOR + Department.name
+    if dialect_name == "postgresql":
+        aggregate = func.string_agg(item, DEPARTMENT_SEPARATOR)
+    else:
+        aggregate = func.group_concat(item, DEPARTMENT_SEPARATOR)
+
+    return (
+        select(aggregate)
+        .select_from(user_department_association)
+        .join(Department, Department.id == user_department_association.c.department_id)
+        .where(user_department_association.c.user_id == User.id)
+        .scalar_subquery()
+        .label("departments")
+    )
+
+
+def parse_departments(value: Optional[str]) -> list[dict]:
+    if not value:
+        return []
+    departments = []
+    for item in value.split(DEPARTMENT_SEPARATOR):
+        code, name = item.split(DEPARTMENT_FIELD_SEPARATOR, 1)
+        departments.append({"name": name, "code": code})
+    return departments
+
+
+async def build_search_filters(
         request: SearchRequest,
-        user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db),
-):
-    sensitivePermission = has_permission(user, UserLevel.ADMIN)
-    offset = (request.page_index - 1) * request.page_size
+        sensitive_permission: bool,
+        db: AsyncSession,
+) -> list:
+    """根据搜索请求构建 `User` 的过滤条件
+
+    Args:
+        request (SearchRequest): 搜索请求.
+        sensitive_permission (bool): 是否允许按敏感信息搜索.
+        db (AsyncSession): 数据库会话, 用于解析部门代码.
+    """
     filters = []
 
-    try:
-        # 全局搜索
-        if request.global_query is not None:
-            global_filters = [
-                func.lower(cast(User.qq_id, String)).ilike(f"%{request.global_query}%"),
-                User.nickname.ilike(f"%{request.global_query}%"),
-                User.mc_name.ilike(f"%{request.global_query}%"),
-            ]
-
-            if sensitivePermission:
-                sensitive_global_filters = [
-                    User.real_name.ilike(f"%{request.global_query}%"),
-                    User.student_id.ilike(f"%{request.global_query}%"),
-                    User.college_name.ilike(f"%{request.global_query}%"),
-                    User.major.ilike(f"%{request.global_query}%"),
-                ]
-                global_filters.extend(sensitive_global_filters)
-
-            filters.append(or_(*global_filters))
-
-        # 入库时间
-        if request.create_at_start is not None and request.create_at_end is not None:
-            filters.append(User.create_at.between(request.create_at_start, request.create_at_end))
-
-        # 学院
-        if request.colleges:
-            colleges = []
-            for college in College:
-                if college.name in request.colleges:
-                    colleges.append(college)
-            filters.append(User.college_enum.in_(colleges))
-
-        # 部门
-        if request.departments:
-            departments = (
-                (await db.execute(
-                    select(Department)
-                    .where(Department.code.in_(request.departments))
-                ))
-                .scalars().all()
-            )
+    # 全局搜索
+    if request.global_query is not None:
+        filters.append(
+            get_search_backend().global_filter(request.global_query, sensitive_permission)
+        )
 
-            department_ids = [_.id for _ in departments]
-            filters.append(
-                User.id.in_(
-                    select(user_department_association.c.user_id)
-                    .where(user_department_association.c.department_id.in_(department_ids))
-                )
-            )
+    # 入库时间
+    if request.create_at_start is not None and request.create_at_end is not None:
+        filters.append(User.create_at.between(request.create_at_start, request.create_at_end))
+
+    # 学院
+    if request.colleges:
+        colleges = []
+        for college in College:
+            if college.name in request.colleges:
+                colleges.append(college)
+        filters.append(User.college_enum.in_(colleges))
 
-        # 等级
-        if request.levels:
-            levels = []
-            for level in UserLevel:
-                if level.name in request.levels:
-                    levels.append(level)
-            filters.append(User.level.in_(levels))
-
-        # 搜索
-        base_query = select(User).where(and_(*filters))
-        query = (
-            (
-                base_query.order_by(
-                    User.id.desc(),
-                )
-                .offset(offset)
-                .limit(request.page_size)
-            ).options(
-                subqueryload(User.departments),
+    # 部门
+    if request.departments:
+        departments = (
+            (await db.execute(
+                select(Department)
+                .where(Department.code.in_(request.departments))
+            ))
+            .scalars().all()
+        )
+
+        department_ids = [_.id for _ in departments]
+        filters.append(
+            User.id.in_(
+                select(user_department_association.c.user_id)
+                .where(user_department_association.c.department_id.in_(department_ids))
             )
         )
-        users = (
-            (await db.execute(query))
-            .scalars().all()
+
+    # 等级
+    if request.levels:
+        levels = []
+        for level in UserLevel:
+            if level.name in request.levels:
+                levels.append(level)
+        filters.append(User.level.in_(levels))
+
+    return filters
+
+
+def build_search_query(
+        request: SearchRequest,
+        filters: list,
+        after_id: Optional[int],
+        dialect_name: str,
+) -> Select:
+    """构建成员搜索语句, 只查询所需列, 部门在同一条语句中聚合
+
+    提供游标时按 id 键集分页, 否则按页码分页. 多取一条用于判断是否存在下一页.
+    """
+    query = (
+        select(*MEMBER_COLUMNS, departments_column(dialect_name))
+        .where(and_(*filters))
+    )
+    if after_id is not None:
+        query = query.where(User.id < after_id)
+    else:
+        query = query.offset((request.page_index - 1) * request.page_size)
+
+    return (
+        query.order_by(
+            User.id.desc(),
         )
+        .limit(request.page_size + 1)
+    )
 
-        # 构建结果
-        members = []
-        for user_info in users:
-            departments = []
-            for department in user_info.departments:
-                departments.append(DepartmentInfo(
-                    name=department.name,
-                    code=department.code
-                ))
-
-            members.append(MemberInfo(
-                qq_id=user_info.qq_id,
-                mc_name=user_info.mc_name,
-                nickname=user_info.nickname,
-                create_at=user_info.create_at.replace(tzinfo=timezone.utc),
-                real_name=user_info.real_name if sensitivePermission else "***",
-                student_id=user_info.student_id if sensitivePermission else "***",
-                college_name=user_info.college_name,
-                major=user_info.major if sensitivePermission else None,
-                grade=user_info.grade if sensitivePermission else None,
-                class_index=user_info.class_index if sensitivePermission else None,
-                departments=departments,
-                level=user_info.level.value,
-            ))
-        total = len(members)
 
-        response = MemberListResponse(
-            members=members,
-            total=total,
+async def search_members(
+        request: SearchRequest,
+        sensitive_permission: bool,
+        after_id: Optional[int],
+        db: AsyncSession,
+) -> bytes:
+    """执行成员搜索, 返回序列化后的响应体"""
+    filters = await build_search_filters(request, sensitive_permission, db)
+
+    # 总数, 按搜索条件缓存
+    signature = search_signature(request, sensitive_permission)
+    total = _COUNT_CACHE.get(signature)
+    if total is None:
+        total = (
+            await db.execute(
+                select(func.count()).select_from(User).where(and_(*filters))
+            )
+        ).scalar_one()
+        _COUNT_CACHE.set(signature, total)
+
+    # 搜索
+    query = build_search_query(request, filters, after_id, db.get_bind().dialect.name)
+    rows = (await db.execute(query)).all()
+
+    # 多取一条用于判断是否存在下一页
+    has_next = len(rows) > request.page_size
+    rows = rows[:request.page_size]
+    next_cursor = encode_cursor(rows[-1].id) if has_next and rows else None
+
+    # 构建结果, 直接序列化为 JSON
+    members = []
+    for row in rows:
+        members.append(member_dict(
+            qq_id=row.qq_id,
+            mc_name=row.mc_name,
+            nickname=row.nickname,
+            create_at=row.create_at,
+            real_name=row.real_name,
+            student_id=row.student_id,
+            college_name=row.college_name,
+            major=row.major,
+            grade=row.grade,
+            class_index=row.class_index,
+            departments=parse_departments(row.departments),
+            level=row.level.value,
+            sensitive_permission=sensitive_permission,
+        ))
+
+    return member_list_body(members, total, next_cursor)
+
+
+async def _search_members_shared(
+        request: SearchRequest,
+        sensitive_permission: bool,
+        after_id: Optional[int],
+) -> bytes:
+    # 结果由多个请求共享, 不使用发起请求的会话
+    async with read_session() as db:
+        return await search_members(request, sensitive_permission, after_id, db)
+
+
+async def search_handler(
+        request: SearchRequest,
+        user: User = Depends(get_current_user),
+):
+    sensitivePermission = has_permission(user, UserLevel.ADMIN)
+    after_id = decode_cursor(request.cursor) if request.cursor else None
+
+    # 启用内存索引时不访问数据库
+    if MEMBER_INDEX.ready:
+        members, total, next_id = MEMBER_INDEX.search(request, sensitivePermission, after_id)
+        return member_list_response(
+            members,
+            total,
+            encode_cursor(next_id) if next_id is not None else None,
         )
-        return response
+
+    try:
+        # 近期有写入的用户须读取主库(读己之写), 不与其他请求共享结果
+        if CONFIG.SEARCH_SINGLE_FLIGHT and not READ_REPLICAS.recently_wrote(user.id):
+            body = await SEARCH_FLIGHT.do(
+                search_request_signature(request, sensitivePermission, after_id),
+                partial(_search_members_shared, request, sensitivePermission, after_id),
+            )
+        else:
+            # 只在需要时创建会话, 每个请求只选择一次只读副本
+            async with read_session(user.id) as db:
+                body = await search_members(request, sensitivePermission, after_id, db)
+
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -187,4 +375,4 @@ async def search_handler(
                 "message": "服务器内部错误，请联系管理员",
                 "code": "SERVER_ERROR"
             }
-        )
\ No newline at end of file
+        )
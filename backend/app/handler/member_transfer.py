@@ -0,0 +1,491 @@
+import csv
+import importlib.util
+import io
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator
+
+from fastapi import Depends, HTTPException, Query, Request
+from pydantic import ValidationError
+from sqlalchemy import and_, bindparam, literal, select, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
+
+from app.core.config import CONFIG
+from app.core.database import get_db, read_session
+from app.core.logger import logger
+from app.core.security import hash_passwords
+from app.handler.member import (
+    MEMBER_COLUMNS,
+    build_search_filters,
+    departments_column,
+    invalidate_member_search,
+    parse_departments,
+)
+from app.model import User, UserLevel, College
+from app.search import MEMBER_INDEX
+from app.utils import get_current_user, has_permission
+from app.utils.member_json import MEMBER_KEYS, dumps, member_dict
+from app.utils.permission import lower_levels
+from app.utils.qq_registry import QQ_REGISTRY
+from app.schema.member import (
+    MemberImportError,
+    MemberImportResponse,
+    MemberImportRow,
+    SearchRequest,
+)
+
+# openpyxl 为可选依赖, 未安装时不支持导入 XLSX; 导入较慢, 在第一次导入 XLSX 时加载
+HAS_OPENPYXL = importlib.util.find_spec("openpyxl") is not None
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# CSV 导出列, 与成员搜索结果的字段一致, 另加学院代码以便原样导入
+EXPORT_COLUMNS = [
+    *MEMBER_KEYS.values(),
+    "collegeCode",
+]
+
+CSV_MEDIA_TYPES = ("text/csv", "application/csv", "text/plain")
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# 导入时更新的列, 已存在的成员保留入库时间, 等级与部门
+UPSERT_COLUMNS = (
+    "nickname",
+    "mc_name",
+    "real_name",
+    "student_id",
+    "college_enum",
+    "college_name",
+    "major",
+    "grade",
+    "class_index",
+)
+
+# 学院代码或名称 -> 学院
+_COLLEGES = {
+    **{college.name: college for college in College},
+    **{str(college.value): college for college in College},
+}
+
+
+def _require_admin(user: User):
+    if not has_permission(user, UserLevel.ADMIN):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "message": "权限不足",
+                "code": "PERMISSION_DENIED"
+            }
+        )
+
+
+# ---------- 导出 ----------
+
+def _export_record(row) -> dict:
+    record = member_dict(
+        qq_id=row.qq_id,
+        mc_name=row.mc_name,
+        nickname=row.nickname,
+        create_at=row.create_at,
+        real_name=row.real_name,
+        student_id=row.student_id,
+        college_name=row.college_name,
+        major=row.major,
+        grade=row.grade,
+        class_index=row.class_index,
+        departments=parse_departments(row.departments),
+        level=row.level.value,
+        sensitive_permission=True,
+    )
+    record["collegeCode"] = row.college_enum.name
+    return record
+
+
+def _encode_csv(records: list[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    departments_key = MEMBER_KEYS["departments"]
+    for record in records:
+        record[departments_key] = ",".join(department["code"] for department in record[departments_key])
+        writer.writerow([record[column] for column in EXPORT_COLUMNS])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(records: list[dict]) -> bytes:
+    return b"".join(dumps(record) + b"\n" for record in records)
+
+
+async def _export_chunks(request: SearchRequest, export_format: str) -> AsyncIterator[bytes]:
+    """按 id 顺序分批读取并编码, 服务端游标每次只保留一批行, 内存占用与成员总数无关"""
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+    if export_format == "csv":
+        # BOM 便于 Excel 识别 UTF-8
+        yield ("\ufeff" + ",".join(EXPORT_COLUMNS) + "\r\n").encode("utf-8")
+
+    try:
+        async with read_session() as db:
+            filters = await build_search_filters(request, True, db)
+            query = (
+                select(*MEMBER_COLUMNS, User.college_enum, departments_column(db.get_bind().dialect.name))
+                .where(and_(*filters))
+                .order_by(User.id)
+                .execution_options(yield_per=CONFIG.MEMBER_EXPORT_BATCH_SIZE)
+            )
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield encode([_export_record(row) for row in rows])
+    except Exception as e:
+        # 响应头已发送, 只能中断响应
+        logger.error(f"成员导出失败: {e}")
+        raise
+
+
+async def export_handler(
+        request: SearchRequest,
+        export_format: str = Query("csv", alias="format"),
+        user: User = Depends(get_current_user),
+):
+    _require_admin(user)
+
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": f"不支持的导出格式: {export_format}",
+                "code": "INVALID_FORMAT"
+            }
+        )
+
+    return StreamingResponse(
+        _export_chunks(request, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="members.{export_format}"'},
+    )
+
+
+# ---------- 导入 ----------
+
+async def _receive_file(request: Request):
+    """将请求体写入临时文件, 超过 1 MiB 的部分落盘"""
+    file = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > CONFIG.MEMBER_IMPORT_MAX_SIZE:
+            file.close()
+            raise HTTPException(
+                status_code=413,
+                detail={
+                    "message": "导入文件过大",
+                    "code": "FILE_TOO_LARGE"
+                }
+            )
+        file.write(chunk)
+    file.seek(0)
+    return file
+
+
+def _read_csv(file) -> Iterator[tuple]:
+    yield from csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+
+
+def _read_xlsx(file) -> Iterator[tuple]:
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _cell(value):
+    """单元格统一转为去除首尾空白的字符串, 空单元格为 None"""
+    if value is None:
+        return None
+    # XLSX 中的数字单元格读取为浮点数
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in e.errors()
+    )
+
+
+def _member_values(row: MemberImportRow) -> dict:
+    college = _COLLEGES.get(row.college_code) if row.college_code else None
+    if college is None:
+        college = _COLLEGES.get(row.college_name, College.OTHERS)
+
+    return {
+        "qq_id": row.qq_id,
+        "nickname": row.nickname,
+        "mc_name": row.mc_name,
+        "real_name": row.real_name,
+        "student_id": row.student_id,
+        "college_enum": college,
+        "college_name": row.college_name if college in (College.OTHERS, College.NOT_HNU) else str(college.value),
+        "major": row.major,
+        "grade": row.grade,
+        "class_index": row.class_index,
+    }
+
+
+async def _write_members(db: AsyncSession, values: list[dict], levels: list[UserLevel]) -> tuple[set[int], set[int]]:
+    """写入一批成员
+
+    新成员(含密码哈希的行)以 `INSERT ... ON CONFLICT (qq_id) DO UPDATE` 写入, 其余行只更新基本信息与敏感信息.
+    密码只在插入时写入, 不在冲突时更新; 已有成员只有级别属于 `levels` 时才会被更新.
+    返回数据库实际写入的行, 因级别不符而跳过的行不计入.
+
+    Args:
+        db (AsyncSession): 数据库会话.
+        values (list[dict]): 成员各列的值.
+        levels (list[UserLevel]): 允许修改的已有成员级别.
+
+    Returns:
+        tuple[set[int], set[int]]: 实际插入与实际更新的成员 QQ 号.
+    """
+    users = User.__table__
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    inserted, updated = set(), set()
+    # 展开的 IN 参数不能用于 executemany, 各级别分别绑定
+    writable = users.c.level.in_([literal(level, users.c.level.type) for level in levels])
+
+    inserts = [value for value in values if "password_hash" in value]
+    if inserts:
+        if sqlite:
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(users)
+        # 查询已有成员之后才注册的成员同样按已有成员处理
+        statement = statement.on_conflict_do_update(
+            index_elements=[users.c.qq_id],
+            set_={name: statement.excluded[name] for name in UPSERT_COLUMNS},
+            where=writable,
+        ).returning(users.c.qq_id, users.c.password_hash)
+        # 冲突时不更新密码, 返回的密码哈希(加盐, 各不相同)与写入的一致即为插入
+        hashes = {value["qq_id"]: value["password_hash"] for value in inserts}
+        for qq_id, password_hash in (await db.execute(statement, inserts)).tuples():
+            (inserted if password_hash == hashes[qq_id] else updated).add(qq_id)
+
+    updates = [
+        {f"b_{name}": item for name, item in value.items()}
+        for value in values if "password_hash" not in value
+    ]
+    statement = (
+        update(users)
+        .where(users.c.qq_id == bindparam("b_qq_id"))
+        .where(writable)
+        .values({name: bindparam(f"b_{name}") for name in UPSERT_COLUMNS})
+    )
+    if updates and sqlite:
+        # SQLite 的 executemany 返回准确的 rowcount; 有行被跳过时再查询实际更新的行,
+        # 写事务持有写锁, 查询期间级别不会再被修改
+        ids = [item["b_qq_id"] for item in updates]
+        if (await db.execute(statement, updates)).rowcount == len(updates):
+            updated.update(ids)
+        else:
+            updated.update(await db.scalars(select(users.c.qq_id).where(users.c.qq_id.in_(ids)).where(writable)))
+    else:
+        # asyncpg 不支持 executemany 的 rowcount, UPDATE 也不支持 executemany 时 RETURNING, 逐行更新
+        for item in updates:
+            updated.update(await db.scalars(statement.returning(users.c.qq_id), item))
+
+    return inserted, updated
+
+
+def _write_error(e: DBAPIError) -> str:
+    if isinstance(e, IntegrityError):
+        return "MC 用户名或学号与已有成员重复"
+    return f"数据库拒绝写入: {e.orig}"
+
+
+async def _import_batch(
+        db: AsyncSession,
+        batch: list[tuple[int, MemberImportRow]],
+        report: MemberImportResponse,
+        importer: User,
+):
+    users = User.__table__
+    # QQ 号 -> 已有成员的级别
+    existing = dict(
+        (await db.execute(
+            select(users.c.qq_id, users.c.level).where(users.c.qq_id.in_([row.qq_id for _, row in batch]))
+        ))
+        .tuples().all()
+    )
+    levels = lower_levels(importer.level)
+
+    pending = []
+    seen = set()
+    for number, row in batch:
+        if row.qq_id in seen:
+            report.errors.append(MemberImportError(row=number, qq_id=row.qq_id, message="QQ 号在文件中重复"))
+            continue
+        seen.add(row.qq_id)
+        level = existing.get(row.qq_id)
+        if level is None and row.password is None:
+            report.errors.append(MemberImportError(row=number, qq_id=row.qq_id, message="新成员须填写密码"))
+            continue
+        if level is not None and level not in levels:
+            report.errors.append(MemberImportError(
+                row=number, qq_id=row.qq_id, message="不能修改级别不低于自己的成员",
+            ))
+            continue
+        pending.append((number, row, _member_values(row)))
+
+    # 只有新成员写入密码, 导入不会修改已有成员的密码.
+    # 在写事务之外计算密码哈希, 避免长时间占用写连接
+    new_rows = [row for _, row, _ in pending if row.qq_id not in existing]
+    hashes = iter(await hash_passwords([row.password for row in new_rows]))
+    now = datetime.now(timezone.utc)
+    for _, row, value in pending:
+        if row.qq_id not in existing:
+            value["password_hash"] = next(hashes)
+            value["create_at"] = now
+
+    def count(rows: list[tuple[int, MemberImportRow, dict]], inserted: set[int], updated: set[int]):
+        # 按数据库实际写入的行计数; 读取已有成员之后级别被改为不可修改的行未被写入, 报告为错误
+        for number, row, _ in rows:
+            if row.qq_id in inserted:
+                report.inserted += 1
+                QQ_REGISTRY.add(row.qq_id)
+            elif row.qq_id in updated:
+                report.updated += 1
+            else:
+                report.errors.append(MemberImportError(
+                    row=number, qq_id=row.qq_id, message="不能修改级别不低于自己的成员",
+                ))
+
+    try:
+        written = await _write_members(db, [value for _, _, value in pending], levels)
+        await db.commit()
+        count(pending, *written)
+        return
+    except DBAPIError:
+        await db.rollback()
+
+    # 整批写入失败(唯一约束冲突, 或 PostgreSQL 拒绝超长的值等)时逐行写入, 定位出错的行
+    for item in pending:
+        number, row, value = item
+        try:
+            written = await _write_members(db, [value], levels)
+            await db.commit()
+            count([item], *written)
+        except DBAPIError as e:
+            await db.rollback()
+            report.errors.append(MemberImportError(row=number, qq_id=row.qq_id, message=_write_error(e)))
+
+
+async def import_handler(
+        request: Request,
+        user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+):
+    """导入成员
+
+    请求体为 CSV (UTF-8) 或 XLSX 文件, 按 `Content-Type` 区分, 首行为列名, 列名见 `MemberImportRow`.
+    以 QQ 号为键新增或更新成员, 文件中的值覆盖已有信息, 等级, 部门与密码不变.
+    只能更新级别低于自己的已有成员, 其余已有成员的行报告为错误.
+    每批单独提交; 出错的行不影响其他行, 在响应中逐行报告.
+    """
+    _require_admin(user)
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == XLSX_MEDIA_TYPE:
+        if not HAS_OPENPYXL:
+            raise HTTPException(
+                status_code=415,
+                detail={
+                    "message": "服务器未安装 openpyxl, 不支持导入 XLSX",
+                    "code": "UNSUPPORTED_FORMAT"
+                }
+            )
+        read_rows = _read_xlsx
+    elif content_type in CSV_MEDIA_TYPES:
+        read_rows = _read_csv
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail={
+                "message": "仅支持导入 CSV 或 XLSX 文件",
+                "code": "UNSUPPORTED_FORMAT"
+            }
+        )
+
+    report = MemberImportResponse(inserted=0, updated=0, errors=[])
+    file = await _receive_file(request)
+    try:
+        with file:
+            rows = read_rows(file)
+            header = [_cell(name) for name in next(rows, ())]
+            if "QQID" not in header:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "message": "导入文件缺少 QQID 列",
+                        "code": "INVALID_FILE"
+                    }
+                )
+
+            seen = set()
+            batch = []
+            # 首行为列名, 数据行从第 2 行开始
+            for number, cells in enumerate(rows, start=2):
+                values = {name: _cell(cell) for name, cell in zip(header, cells) if name}
+                if not any(values.values()):
+                    continue
+
+                try:
+                    row = MemberImportRow.model_validate(values)
+                except ValidationError as e:
+                    qq_id = values.get("QQID")
+                    report.errors.append(MemberImportError(
+                        row=number,
+                        qq_id=int(qq_id) if qq_id and qq_id.isdigit() else None,
+                        message=_validation_message(e),
+                    ))
+                    continue
+
+                if row.qq_id in seen:
+                    report.errors.append(MemberImportError(row=number, qq_id=row.qq_id, message="QQ 号在文件中重复"))
+                    continue
+                seen.add(row.qq_id)
+
+                batch.append((number, row))
+                if len(batch) >= CONFIG.MEMBER_IMPORT_BATCH_SIZE:
+                    await _import_batch(db, batch, report, user)
+                    batch = []
+
+            if batch:
+                await _import_batch(db, batch, report, user)
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+        logger.error(f"成员导入失败: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": f"无法读取导入文件, 已导入 {report.inserted + report.updated} 行",
+                "code": "INVALID_FILE"
+            }
+        )
+    finally:
+        if report.inserted or report.updated:
+            invalidate_member_search()
+            if MEMBER_INDEX.ready:
+                await MEMBER_INDEX.load()
+
+    report.errors.sort(key=lambda error: error.row)
+    logger.info(f"成员导入: 新增 {report.inserted}, 更新 {report.updated}, 错误 {len(report.errors)}")
+    return report
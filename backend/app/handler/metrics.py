@@ -0,0 +1,87 @@
+from starlette.responses import Response
+
+from app.core import database
+from app.core.metrics import REGISTRY, Counter, Gauge
+from app.core.security import PASSWORD_HASHER
+from app.handler.member import SEARCH_FLIGHT
+from app.utils.session_cache import SESSION_CACHE
+
+
+def _engine_pools():
+    """各引擎的 (engine, database) 标签与连接池
+
+    读写共用一个引擎(如 PostgreSQL)时只输出 `engine="write"`, 避免重复计数.
+    """
+    if database.engine is None:
+        return
+    yield ("write", "primary"), database.write_engine.pool
+    if database.engine is not database.write_engine:
+        yield ("read", "primary"), database.engine.pool
+    for index, replica in enumerate(database.READ_REPLICAS.engines):
+        yield ("read", f"replica{index}"), replica.pool
+
+
+def _pool_stat(name: str) -> dict[tuple[str, ...], float]:
+    # 引擎尚未创建时没有样本; 部分连接池(如 NullPool / StaticPool)不提供统计, 记为 0
+    stats = {}
+    for labels, pool in _engine_pools():
+        stat = getattr(pool, name, None)
+        stats[labels] = stat() if stat is not None else 0
+    return stats
+
+
+def _session_cache_hit_ratio() -> float:
+    total = SESSION_CACHE.hits + SESSION_CACHE.misses
+    return SESSION_CACHE.hits / total if total else 0.0
+
+
+# 以下指标在输出时读取当前值
+_POOL_LABELS = ("engine", "database")
+REGISTRY.register(Gauge(
+    "db_pool_size", "Database connection pool size.", _POOL_LABELS,
+    collect=lambda: _pool_stat("size"),
+))
+REGISTRY.register(Gauge(
+    "db_pool_checked_out", "Database connections currently checked out.", _POOL_LABELS,
+    collect=lambda: _pool_stat("checkedout"),
+))
+REGISTRY.register(Gauge(
+    "db_pool_overflow", "Database connections opened beyond the pool size.", _POOL_LABELS,
+    # 连接数未达到池大小时 overflow() 为负数
+    collect=lambda: {labels: max(0, value) for labels, value in _pool_stat("overflow").items()},
+))
+REGISTRY.register(Counter(
+    "auth_session_cache_hits_total", "Session cache hits in AuthMiddleware.",
+    collect=lambda: SESSION_CACHE.hits,
+))
+REGISTRY.register(Counter(
+    "auth_session_cache_misses_total", "Session cache misses in AuthMiddleware.",
+    collect=lambda: SESSION_CACHE.misses,
+))
+REGISTRY.register(Gauge(
+    "auth_session_cache_hit_ratio", "Session cache hit ratio since startup.",
+    collect=_session_cache_hit_ratio,
+))
+REGISTRY.register(Gauge(
+    "password_hash_waiting", "Password hashing tasks waiting for the executor.",
+    collect=lambda: PASSWORD_HASHER.waiting,
+))
+REGISTRY.register(Gauge(
+    "password_hash_running", "Password hashing tasks currently running.",
+    collect=lambda: PASSWORD_HASHER.running,
+))
+REGISTRY.register(Counter(
+    "member_search_shared_total", "Member searches that joined an identical in-flight query.",
+    collect=lambda: SEARCH_FLIGHT.shared,
+))
+REGISTRY.register(Counter(
+    "member_search_cache_hits_total", "Member searches served from the result cache.",
+    collect=lambda: SEARCH_FLIGHT.cache_hits,
+))
+
+
+async def metrics_handler():
+    return Response(
+        content=REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,15 +1,20 @@
+import asyncio
 from datetime import timezone
 
-from fastapi import Depends, HTTPException
-from sqlalchemy import select
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from starlette.responses import JSONResponse
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.logger import logger
+from app.core.security import hash_password, parse_session_token, verify_password
+from app.handler.member import invalidate_member_search
 from app.utils import get_current_user
-from app.model import User, College
+from app.utils.session_cache import SESSION_CACHE
+from app.model import User, UserSession, College
+from app.search import MEMBER_INDEX
 from app.schema.profile import (
     DepartmentInfo,
     GetProfileResponse,
@@ -20,8 +25,9 @@ from app.schema.profile import (
 
 async def get_info_handler(
         user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_read_db),
 ):
+    # 可能来自只读副本, 响应以该查询结果为准
     user_with_departments = (
         (await db.execute(
             select(User)
@@ -41,18 +47,18 @@ async def get_info_handler(
         )
 
     response = GetProfileResponse(
-        qq_id=user.qq_id,
-        mc_name=user.mc_name,
-        nickname=user.nickname,
-        create_at=user.create_at.replace(tzinfo=timezone.utc),
-        real_name=user.real_name,
-        student_id=user.student_id,
-        college_name=user.college_name,
-        major=user.major,
-        grade=user.grade,
-        class_index=user.class_index,
+        qq_id=user_with_departments.qq_id,
+        mc_name=user_with_departments.mc_name,
+        nickname=user_with_departments.nickname,
+        create_at=user_with_departments.create_at.replace(tzinfo=timezone.utc),
+        real_name=user_with_departments.real_name,
+        student_id=user_with_departments.student_id,
+        college_name=user_with_departments.college_name,
+        major=user_with_departments.major,
+        grade=user_with_departments.grade,
+        class_index=user_with_departments.class_index,
         departments=department_info,
-        level=user.level.value,
+        level=user_with_departments.level.value,
     )
 
     return response
@@ -99,7 +105,7 @@ async def update_profile_handler(
         user.class_index = request.class_index
 
     # 学院枚举处理
-    if request.departments is not None:
+    if request.college_name is not None:
         matching_college = None
         for college in College:
             if college.name == request.college_name:
@@ -116,6 +122,9 @@ async def update_profile_handler(
 
     try:
         await db.commit()
+        invalidate_member_search()
+        if MEMBER_INDEX.ready:
+            MEMBER_INDEX.upsert(user)
         return JSONResponse(content={"message": "修改成功."})
     except Exception as e:
         await db.rollback()
@@ -132,10 +141,17 @@ async def update_profile_handler(
 
 async def change_password_handler(
         request: ChangePasswordRequest,
+        http_request: Request,
         user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db),
 ):
-    if not user.verify_password(request.old_password):
+    # 两次验证互不依赖, 并发执行
+    old_password_valid, same_as_old = await asyncio.gather(
+        verify_password(user.password_hash, request.old_password),
+        verify_password(user.password_hash, request.new_password),
+    )
+
+    if not old_password_valid:
         raise HTTPException(
             status_code=403,
             detail={
@@ -144,7 +160,7 @@ async def change_password_handler(
             }
         )
 
-    if user.verify_password(request.new_password):
+    if same_as_old:
         raise HTTPException(
             status_code=400,
             detail={
@@ -153,10 +169,19 @@ async def change_password_handler(
             }
         )
 
-    user.password = request.new_password
+    user.password_hash = await hash_password(request.new_password)
+    # token 已由认证中间件(或 `get_current_user`)校验
+    claims = parse_session_token(http_request.cookies["token"])
 
     try:
+        # 与新密码在同一事务中删除该用户的其他会话, 只保留当前会话
+        await db.execute(
+            delete(UserSession)
+            .where(UserSession.user_id == user.id)
+            .where(UserSession.id != claims.session_id)
+        )
         await db.commit()
+        SESSION_CACHE.invalidate_user(user.id)
         return JSONResponse(content={"message": "密码修改成功."})
     except Exception as e:
         await db.rollback()
@@ -1,14 +1,20 @@
 from datetime import datetime, timezone
 
-from fastapi import Depends, HTTPException
-from sqlalchemy import select
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import exists, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
 
 from app.core.logger import logger
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.security import hash_password
+from app.handler.member import invalidate_member_search
 from app.model import User, College
+from app.search import MEMBER_INDEX
+from app.utils.http_cache import CachedResponse
+from app.utils.qq_registry import QQ_REGISTRY
+from app.utils.rate_limit import CHECK_QQ_TARGET_LIMITER
 from app.schema.signup import (
     CollegeInfo,
     CollegeListResponse,
@@ -16,7 +22,7 @@ from app.schema.signup import (
 )
 
 
-async def get_info_handler():
+async def _build_college_list() -> CollegeListResponse:
     colleges = []
     for college in College:
         if college == College.OTHERS:
@@ -30,18 +36,32 @@ async def get_info_handler():
     return CollegeListResponse(colleges=colleges)
 
 
+# 学院列表只随版本变化
+_COLLEGE_LIST = CachedResponse(_build_college_list, cache_control="public, max-age=3600")
+
+
+async def get_info_handler(request: Request):
+    return await _COLLEGE_LIST.respond(request)
+
+
 async def check_qq_handler(
         qq_id: int,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_read_db),
 ):
-    user = (
-        (await db.execute(
-            select(User).where(User.qq_id == qq_id)
-        ))
-        .scalars().first()
-    )
+    # 按 IP 的限流在路由依赖中完成, 此处按被检查的 QQ 号限流, 均在查询之前
+    await CHECK_QQ_TARGET_LIMITER.check(str(qq_id))
+
+    # 内存集合中不存在时直接返回, 存在时以数据库为准
+    if not QQ_REGISTRY.ready or QQ_REGISTRY.might_exist(qq_id):
+        registered = (
+            await db.execute(
+                select(exists().where(User.qq_id == qq_id))
+            )
+        ).scalar()
+    else:
+        registered = False
 
-    if user:
+    if registered:
         raise HTTPException(
             status_code=409,
             detail={
@@ -85,12 +105,16 @@ async def signup_handler(
         user.college_name = str(matching_college.value)
 
 
-    user.password=request.password
+    user.password_hash = await hash_password(request.password)
     user.create_at=datetime.now(timezone.utc)
 
     try:
         db.add(user)
         await db.commit()
+        QQ_REGISTRY.add(user.qq_id)
+        invalidate_member_search()
+        if MEMBER_INDEX.ready:
+            MEMBER_INDEX.upsert(user, department_ids=[])
 
         return JSONResponse(content="注册成功")
     except IntegrityError as e:
@@ -1,13 +1,4 @@
-from uvicorn import run
-
 from . import create_app
-from app.core.config import CONFIG
 
+# 工作进程导入的 ASGI 应用; 启动服务见 `app.server`
 app = create_app()
-
-if __name__ == "__main__":
-    run(
-        app,
-        host="0.0.0.0",
-        port=CONFIG.PORT,
-    )
@@ -3,11 +3,12 @@ from enum import Enum
 from typing import List, Optional
 
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import ForeignKey, Integer, String, DateTime, Table, Column
+from sqlalchemy import DDL, ForeignKey, Integer, String, DateTime, Table, Column, Index, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app.core.database import Base
+from app.core.security import PASSWORD_METHOD
 
 
 class UserLevel(Enum):
@@ -87,6 +88,8 @@ user_department_association = Table(
     Base.metadata,
     Column("user_id", ForeignKey("users.id"), primary_key=True),
     Column("department_id", Integer, ForeignKey("departments.id"), primary_key=True),
+    # 主键以 user_id 开头, 按部门筛选成员时需要反向索引
+    Index("ix_user_department_association_department_id", "department_id", "user_id"),
 )
 
 
@@ -130,15 +133,24 @@ class User(Base):
         departments (List[Department]): 所属部门列表.
         level (UserLevel): 权限级别.
         password_hash (str): 密码哈希.
-        update_at (datetime): 最近一次登录更新时间.
-        token (str): 用于身份验证的唯一令牌.
+        update_at (datetime): 最近一次登录时间.
 
     Methods:
         password: 设置密码时自动生成哈希值, 不可读取.
         verify_password(password: str) -> bool: 验证密码是否正确.
+
+    Notes:
+        `password` 与 `verify_password` 会同步计算 PBKDF2, 在请求处理中应改用
+        `app.core.security` 中的 `hash_password` / `verify_password`.
     """
 
     __tablename__ = "users"
+    # 与成员搜索的筛选条件对应, 末列 id 用于按 id 倒序分页
+    __table_args__ = (
+        Index("ix_users_college_enum_id", "college_enum", "id"),
+        Index("ix_users_level_id", "level", "id"),
+        Index("ix_users_create_at", "create_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -170,7 +182,6 @@ class User(Base):
     # 其他信息
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     update_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
-    token: Mapped[Optional[str]] = mapped_column(String(255), unique=True, index=True, nullable=True)
 
     @property
     def password(self):
@@ -178,7 +189,96 @@ class User(Base):
 
     @password.setter
     def password(self, password: str):
-        self.password_hash = generate_password_hash(password, method="pbkdf2:sha512")
+        self.password_hash = generate_password_hash(password, method=PASSWORD_METHOD)
 
     def verify_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
+
+
+class UserSession(Base):
+    """登录会话
+
+    每次登录创建一个会话, 同一用户可同时保持多个会话. 登录 token 中带有会话 ID,
+    认证时按主键查询, 数据库中只保存 token 的哈希.
+
+    Attributes:
+        id (int): 唯一标识符.
+        user_id (int): 用户 ID.
+        user (User): 用户.
+        token_hash (str): token 的 SHA-256 哈希.
+        created_at (datetime): 登录时间, 即 token 的签发时间.
+        last_seen_at (datetime): 最近一次访问时间, 用于滑动过期.
+    """
+
+    __tablename__ = "user_sessions"
+    # SQLite 默认复用已删除的最大 rowid, 注销后的会话 ID 可能分配给新登录的会话
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    user: Mapped["User"] = relationship("User")
+    token_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+# ---------- 全局搜索索引 ----------
+# 与 Alembic 迁移 f2964ebb8ec3 创建的对象一致, `init_db` 建表时同样创建,
+# 使未执行迁移的新数据库也能使用 `app.search` 的 fts5 / pg_trgm 后端
+
+# SQLite: FTS5 表名 -> 参与搜索的列, 公开信息与敏感信息分别建立索引
+SEARCH_FTS_TABLES = {
+    "users_fts_public": ["qq_id", "nickname", "mc_name"],
+    "users_fts_sensitive": ["real_name", "student_id", "college_name", "major"],
+}
+
+# PostgreSQL: 索引名 -> 索引表达式, 须与 `app.search.backend` 中的查询表达式一致
+SEARCH_TRGM_INDEXES = {
+    "ix_users_qq_id_trgm": "lower(CAST(qq_id AS VARCHAR))",
+    "ix_users_nickname_trgm": "nickname",
+    "ix_users_mc_name_trgm": "mc_name",
+    "ix_users_real_name_trgm": "real_name",
+    "ix_users_student_id_trgm": "student_id",
+    "ix_users_college_name_trgm": "college_name",
+    "ix_users_major_trgm": "major",
+}
+
+
+def _fts_statements(name: str, columns: list[str]) -> list[str]:
+    """FTS5 外部内容表与同步触发器, 只在相关列变化时更新索引"""
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {name} USING fts5("
+        f"{column_list}, content='users', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON users BEGIN "
+        f"INSERT INTO {name}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+        f"END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON users BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"END",
+        f"CREATE TRIGGER {name}_au AFTER UPDATE OF {column_list} ON users BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {name}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+        f"END",
+    ]
+
+
+def _listen_search_index_ddl(table: Table):
+    for name, columns in SEARCH_FTS_TABLES.items():
+        for statement in _fts_statements(name, columns):
+            event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+        # 触发器随 users 表删除, FTS 表须单独删除
+        event.listen(table, "after_drop", DDL(f"DROP TABLE IF EXISTS {name}").execute_if(dialect="sqlite"))
+
+    event.listen(
+        table, "after_create",
+        DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+    )
+    for name, expression in SEARCH_TRGM_INDEXES.items():
+        statement = f"CREATE INDEX {name} ON users USING gin (({expression}) gin_trgm_ops)"
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+_listen_search_index_ddl(User.__table__)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -8,5 +10,5 @@ class LoginRequest(BaseModel):
 
 class LoginResponse(BaseModel):
     qq_id: int = Field(..., serialization_alias="QQID")
-    mc_name: str = Field(..., serialization_alias="MCName")
+    mc_name: Optional[str] = Field(..., serialization_alias="MCName")
     nickname: str
@@ -0,0 +1,19 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class DepartmentMembersRequest(BaseModel):
+    """批量添加或移除部门成员的请求"""
+    qq_ids: List[int] = Field(..., alias="QQIDs", min_length=1, max_length=1000)
+
+
+class DepartmentMembersResponse(BaseModel):
+    """批量添加或移除部门成员的结果
+
+    Attributes:
+        changed (int): 实际添加或移除的成员数.
+        skipped (int): 未变化的 QQ 号数(成员不存在, 或已在/不在部门中).
+    """
+    changed: int
+    skipped: int
@@ -30,6 +30,7 @@ class MemberInfo(BaseModel):
 class MemberListResponse(BaseModel):
     members: List[MemberInfo]
     total: int
+    next_cursor: Optional[str] = Field(None, serialization_alias="nextCursor")
 
 
 class SearchInfoResponse(BaseModel):
@@ -45,6 +46,8 @@ class SearchRequest(BaseModel):
 
     Notes:
         colleges, levels 传入对应模型的 `code`.
+        传入 `cursor` (上一页响应中的 `nextCursor`) 时按游标分页, 忽略 `page_index`.
+        `page_size` 取 1 至 100, `page_index` 从 1 开始.
     """
     global_query: Optional[str] = Field(None, alias="globalQuery")
     create_at_start: Optional[datetime] = Field(None, alias="createAtStart")
@@ -52,6 +55,40 @@ class SearchRequest(BaseModel):
     colleges: Optional[List[str]]
     departments: Optional[List[str]]
     levels: Optional[List[str]]
-    page_size: Optional[int] = Field(5, alias="pageSize")
-    page_index: Optional[int] = Field(1, alias="pageIndex")
+    page_size: int = Field(5, ge=1, le=100, alias="pageSize")
+    page_index: int = Field(1, ge=1, alias="pageIndex")
+    cursor: Optional[str] = None
 
+
+
+class MemberImportRow(BaseModel):
+    """成员导入文件中的一行
+
+    Notes:
+        列名与注册请求一致. `collegeCode` 为学院枚举代码, 缺省时按 `collegeName` 匹配学院代码或名称.
+        `password` 只用于新成员, 已存在的成员可不填写, 填写时也不会修改其密码.
+        长度上限与 `User` 的对应列一致.
+    """
+    qq_id: int = Field(..., alias="QQID")
+    nickname: str = Field(..., min_length=1, max_length=50)
+    password: Optional[str] = Field(None, min_length=1)
+    mc_name: Optional[str] = Field(None, max_length=50, alias="MCName")
+    real_name: str = Field(..., min_length=1, max_length=20, alias="realName")
+    student_id: Optional[str] = Field(None, max_length=20, alias="studentID")
+    college_code: Optional[str] = Field(None, alias="collegeCode")
+    college_name: str = Field(..., min_length=1, max_length=50, alias="collegeName")
+    major: Optional[str] = Field(None, max_length=20)
+    grade: Optional[int] = None
+    class_index: Optional[int] = Field(None, alias="classIndex")
+
+
+class MemberImportError(BaseModel):
+    row: int
+    qq_id: Optional[int] = Field(None, serialization_alias="QQID")
+    message: str
+
+
+class MemberImportResponse(BaseModel):
+    inserted: int
+    updated: int
+    errors: List[MemberImportError]
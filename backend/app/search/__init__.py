@@ -0,0 +1,52 @@
+from app.core.config import CONFIG
+from app.core import database
+from app.core.logger import logger
+
+from .backend import (
+    LikeSearchBackend,
+    SQLiteFTSSearchBackend,
+    PostgresTrgmSearchBackend,
+)
+from .member_index import MEMBER_INDEX, MemberIndex
+
+__all__ = [
+    "BACKENDS",
+    "LikeSearchBackend",
+    "SQLiteFTSSearchBackend",
+    "PostgresTrgmSearchBackend",
+    "MEMBER_INDEX",
+    "MemberIndex",
+    "get_search_backend",
+    "init_search_backend",
+]
+
+BACKENDS = {
+    "like": LikeSearchBackend,
+    "fts5": SQLiteFTSSearchBackend,
+    "pg_trgm": PostgresTrgmSearchBackend,
+}
+
+_backend: LikeSearchBackend = LikeSearchBackend()
+
+
+def get_search_backend() -> LikeSearchBackend:
+    """获取当前使用的全局搜索后端"""
+    return _backend
+
+
+async def init_search_backend():
+    """根据配置与数据库中已有的索引选择全局搜索后端"""
+    global _backend
+
+    name = CONFIG.SEARCH_BACKEND
+    if name == "auto":
+        name = {"sqlite": "fts5", "postgresql": "pg_trgm"}.get(database.engine.dialect.name, "like")
+
+    backend = BACKENDS[name]()
+    async with database.engine.connect() as conn:
+        if not await backend.available(conn):
+            logger.warning(f"搜索索引 {backend.name} 不可用, 请执行数据库迁移. 已回退到 ILIKE 搜索")
+            backend = LikeSearchBackend()
+
+    _backend = backend
+    logger.info(f"全局搜索后端: {_backend.name}")
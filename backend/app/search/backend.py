@@ -0,0 +1,101 @@
+from sqlalchemy import ColumnElement, String, cast, column, func, or_, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.model import User
+
+# 公开信息与敏感信息分别建立索引, 非管理员只会命中公开索引
+PUBLIC_FTS_TABLE = "users_fts_public"
+SENSITIVE_FTS_TABLE = "users_fts_sensitive"
+
+
+class LikeSearchBackend:
+    """全局搜索后端: `ILIKE '%q%'`
+
+    不依赖任何额外索引, 适用于所有数据库, 也是其余后端在无法使用索引时的回退实现.
+    """
+
+    name = "like"
+
+    async def available(self, conn: AsyncConnection) -> bool:
+        return True
+
+    def global_filter(self, query: str, sensitive_permission: bool) -> ColumnElement[bool]:
+        """构建全局搜索条件
+
+        Args:
+            query (str): 搜索关键字.
+            sensitive_permission (bool): 是否同时搜索敏感信息.
+        """
+        # 关键字按字面值匹配, 转义其中的 `%` 与 `_`
+        global_filters = [
+            func.lower(cast(User.qq_id, String)).icontains(query, autoescape=True),
+            User.nickname.icontains(query, autoescape=True),
+            User.mc_name.icontains(query, autoescape=True),
+        ]
+
+        if sensitive_permission:
+            global_filters.extend([
+                User.real_name.icontains(query, autoescape=True),
+                User.student_id.icontains(query, autoescape=True),
+                User.college_name.icontains(query, autoescape=True),
+                User.major.icontains(query, autoescape=True),
+            ])
+
+        return or_(*global_filters)
+
+
+class SQLiteFTSSearchBackend(LikeSearchBackend):
+    """全局搜索后端: SQLite FTS5 trigram 索引
+
+    索引表与同步触发器由 Alembic 迁移或 `init_db` 建表时创建(见 `app.model.SEARCH_FTS_TABLES`),
+    注册与修改资料时由触发器在同一事务内更新.
+    trigram 分词无法匹配少于 3 个字符的关键字, 此时回退到 `ILIKE`.
+    """
+
+    name = "fts5"
+    MIN_QUERY_LENGTH = 3
+
+    async def available(self, conn: AsyncConnection) -> bool:
+        tables = (
+            await conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (:public, :sensitive)"),
+                {"public": PUBLIC_FTS_TABLE, "sensitive": SENSITIVE_FTS_TABLE},
+            )
+        ).scalars().all()
+        return len(tables) == 2
+
+    @staticmethod
+    def _match(fts_table: str, query: str) -> ColumnElement[bool]:
+        # 作为短语查询, 避免关键字被解析为 FTS5 语法
+        phrase = '"' + query.replace('"', '""') + '"'
+        fts = table(fts_table, column("rowid"))
+        return User.id.in_(
+            select(fts.c.rowid).where(text(f"{fts_table} MATCH :phrase").bindparams(phrase=phrase))
+        )
+
+    def global_filter(self, query: str, sensitive_permission: bool) -> ColumnElement[bool]:
+        if len(query) < self.MIN_QUERY_LENGTH:
+            return super().global_filter(query, sensitive_permission)
+
+        global_filters = [self._match(PUBLIC_FTS_TABLE, query)]
+        if sensitive_permission:
+            global_filters.append(self._match(SENSITIVE_FTS_TABLE, query))
+
+        return or_(*global_filters)
+
+
+class PostgresTrgmSearchBackend(LikeSearchBackend):
+    """全局搜索后端: PostgreSQL pg_trgm GIN 索引
+
+    Alembic 迁移或 `init_db` 建表时为每个参与搜索的列(表达式)建立 GIN 索引,
+    查询条件与 `LikeSearchBackend` 完全一致, 由优化器使用 BitmapOr 合并各列索引.
+    索引由 PostgreSQL 自动维护, 无需额外同步.
+    """
+
+    name = "pg_trgm"
+
+    async def available(self, conn: AsyncConnection) -> bool:
+        extension = (
+            await conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        ).scalar()
+        return extension is not None
@@ -0,0 +1,398 @@
+import asyncio
+from bisect import bisect_right
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import select
+
+from app.core.database import async_session
+from app.core.logger import logger
+from app.model import College, Department, User, UserLevel, user_department_association
+from app.schema.member import SearchRequest
+from app.utils.member_json import member_dict
+
+NGRAM = 3
+# 拼接同一成员多个字段时使用的分隔符, 保证关键字不会跨字段匹配
+SEPARATOR = "\x00"
+# 索引使用的 `User` 字段
+USER_FIELDS = (
+    "id", "qq_id", "nickname", "mc_name", "create_at", "real_name", "student_id",
+    "college_enum", "college_name", "major", "grade", "class_index", "level",
+)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class MemberIndex:
+    """内存成员目录索引
+
+    成员数据以列式数组保存, 行号即数组下标; 在此基础上维护:
+
+    - 学院, 等级, 部门的倒排索引(值 -> 行号集合).
+    - 全局搜索的 trigram 倒排索引, 公开信息与敏感信息分开保存,
+      非管理员只会命中公开索引.
+
+    搜索语义与 `search_handler` 的 SQL 路径一致(关键字按字面值做不区分大小写的子串匹配).
+    所有修改均为同步操作, 在单个事件循环内不会与搜索交错.
+    全量加载期间的增量更新在重建后重放, 不会被加载时读到的旧数据覆盖.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._load_lock = asyncio.Lock()
+        # 加载期间记录的增量更新, 不在加载时为 None
+        self._journal: Optional[list[tuple[Callable, tuple]]] = None
+        self._reset()
+
+    def _reset(self):
+        # 列式存储
+        self._ids: list[int] = []
+        self._qq_ids: list[int] = []
+        self._nicknames: list[str] = []
+        self._mc_names: list[Optional[str]] = []
+        self._create_ats: list[datetime] = []
+        self._real_names: list[str] = []
+        self._student_ids: list[Optional[str]] = []
+        self._college_enums: list[College] = []
+        self._college_names: list[str] = []
+        self._majors: list[Optional[str]] = []
+        self._grades: list[Optional[int]] = []
+        self._class_indexes: list[Optional[int]] = []
+        self._levels: list[UserLevel] = []
+        self._departments: list[set[int]] = []
+
+        # 以分隔符拼接的小写文本, 用于校验子串匹配
+        self._public_texts: list[str] = []
+        self._sensitive_texts: list[str] = []
+
+        # 倒排索引
+        self._rows: dict[int, int] = {}
+        self._by_college: dict[College, set[int]] = {}
+        self._by_level: dict[UserLevel, set[int]] = {}
+        self._by_department: dict[int, set[int]] = {}
+        self._public_grams: dict[str, set[int]] = {}
+        self._sensitive_grams: dict[str, set[int]] = {}
+
+        # 部门目录
+        self._department_info: dict[int, dict] = {}
+        self._department_ids: dict[str, int] = {}
+
+        # 行号顺序是否与 ID 顺序一致(ID 自增时总是成立), 成立时可直接按行号排序
+        self._ordered = True
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def load(self):
+        """从数据库全量加载索引
+
+        查询期间索引照常提供搜索与增量更新; 增量更新同时记录下来,
+        在以查询结果重建索引后按顺序重放, 重建与重放之间没有 await.
+        """
+        async with self._load_lock:
+            self._journal = []
+            try:
+                departments, users, memberships = await self._fetch()
+            finally:
+                journal, self._journal = self._journal, None
+
+            user_departments: dict[int, set[int]] = {}
+            for user_id, department_id in memberships:
+                user_departments.setdefault(user_id, set()).add(department_id)
+
+            self._reset()
+            for department in departments:
+                self.upsert_department(department.id, department.name, department.code)
+            for user in users:
+                self.upsert(user, user_departments.get(user.id, set()))
+            for method, args in journal:
+                method(*args)
+            self.ready = True
+
+    @staticmethod
+    async def _fetch() -> tuple[list, list, list]:
+        async with async_session() as db:
+            departments = (await db.execute(select(Department.id, Department.name, Department.code))).all()
+            users = (
+                await db.execute(
+                    select(*(getattr(User, name) for name in USER_FIELDS)).order_by(User.id)
+                )
+            ).all()
+            memberships = (
+                await db.execute(
+                    select(
+                        user_department_association.c.user_id,
+                        user_department_association.c.department_id,
+                    )
+                )
+            ).all()
+        return departments, users, memberships
+
+    def _record(self, method: Callable, *args):
+        """加载期间记录增量更新, 供重建后重放"""
+        if self._journal is not None:
+            self._journal.append((method, args))
+
+    async def refresh_periodically(self, interval: float):
+        """定期全量重建, 用于多进程部署下同步其他进程的修改"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"成员索引重建失败: {e}")
+
+    # ---------- 增量更新 ----------
+
+    def upsert_department(self, department_id: int, name: str, code: str):
+        self._record(self.upsert_department, department_id, name, code)
+        old = self._department_info.get(department_id)
+        if old is not None:
+            self._department_ids.pop(old["code"], None)
+        self._department_info[department_id] = {"name": name, "code": code}
+        self._department_ids[code] = department_id
+        self._by_department.setdefault(department_id, set())
+
+    def upsert(self, user, department_ids: Optional[Iterable[int]] = None):
+        """新增或更新成员
+
+        Args:
+            user: `User` 实例或包含相同字段的查询结果行.
+            department_ids (Optional[Iterable[int]]): 所属部门 ID, 为 None 时保留原有部门.
+        """
+        if self._journal is not None:
+            # 重放时实例可能已被修改, 记录当前的值
+            snapshot = SimpleNamespace(**{name: getattr(user, name) for name in USER_FIELDS})
+            self._record(self.upsert, snapshot, None if department_ids is None else list(department_ids))
+        row = self._rows.get(user.id)
+        if row is None:
+            row = len(self._ids)
+            if self._ids and user.id < self._ids[-1]:
+                self._ordered = False
+            self._rows[user.id] = row
+            for column in (
+                self._ids, self._qq_ids, self._nicknames, self._mc_names, self._create_ats,
+                self._real_names, self._student_ids, self._college_enums, self._college_names,
+                self._majors, self._grades, self._class_indexes, self._levels,
+                self._public_texts, self._sensitive_texts,
+            ):
+                column.append(None)
+            self._departments.append(set())
+        else:
+            self._unindex(row)
+
+        self._ids[row] = user.id
+        self._qq_ids[row] = user.qq_id
+        self._nicknames[row] = user.nickname
+        self._mc_names[row] = user.mc_name
+        self._create_ats[row] = _as_utc(user.create_at)
+        self._real_names[row] = user.real_name
+        self._student_ids[row] = user.student_id
+        self._college_enums[row] = user.college_enum
+        self._college_names[row] = user.college_name
+        self._majors[row] = user.major
+        self._grades[row] = user.grade
+        self._class_indexes[row] = user.class_index
+        self._levels[row] = user.level
+        if department_ids is not None:
+            self._departments[row] = set(department_ids)
+
+        self._public_texts[row] = SEPARATOR.join(
+            value.lower() for value in (str(user.qq_id), user.nickname, user.mc_name) if value
+        )
+        self._sensitive_texts[row] = SEPARATOR.join(
+            value.lower() for value in (user.real_name, user.student_id, user.college_name, user.major) if value
+        )
+        self._index(row)
+
+    def set_departments(self, user_id: int, department_ids: Iterable[int]):
+        department_ids = list(department_ids)
+        self._record(self.set_departments, user_id, department_ids)
+        row = self._rows.get(user_id)
+        if row is None:
+            return
+        for department_id in self._departments[row]:
+            self._by_department[department_id].discard(row)
+        self._departments[row] = set(department_ids)
+        for department_id in self._departments[row]:
+            self._by_department.setdefault(department_id, set()).add(row)
+
+    def add_to_department(self, department_id: int, user_ids: Iterable[int]):
+        user_ids = list(user_ids)
+        self._record(self.add_to_department, department_id, user_ids)
+        members = self._by_department.setdefault(department_id, set())
+        for user_id in user_ids:
+            row = self._rows.get(user_id)
+            if row is not None:
+                self._departments[row].add(department_id)
+                members.add(row)
+
+    def remove_from_department(self, department_id: int, user_ids: Iterable[int]):
+        user_ids = list(user_ids)
+        self._record(self.remove_from_department, department_id, user_ids)
+        members = self._by_department.setdefault(department_id, set())
+        for user_id in user_ids:
+            row = self._rows.get(user_id)
+            if row is not None:
+                self._departments[row].discard(department_id)
+                members.discard(row)
+
+    def _index(self, row: int):
+        self._by_college.setdefault(self._college_enums[row], set()).add(row)
+        self._by_level.setdefault(self._levels[row], set()).add(row)
+        for department_id in self._departments[row]:
+            self._by_department.setdefault(department_id, set()).add(row)
+        for gram in _ngrams(self._public_texts[row]):
+            self._public_grams.setdefault(gram, set()).add(row)
+        for gram in _ngrams(self._sensitive_texts[row]):
+            self._sensitive_grams.setdefault(gram, set()).add(row)
+
+    def _unindex(self, row: int):
+        self._by_college[self._college_enums[row]].discard(row)
+        self._by_level[self._levels[row]].discard(row)
+        for department_id in self._departments[row]:
+            self._by_department[department_id].discard(row)
+        for gram in _ngrams(self._public_texts[row]):
+            self._public_grams[gram].discard(row)
+        for gram in _ngrams(self._sensitive_texts[row]):
+            self._sensitive_grams[gram].discard(row)
+
+    # ---------- 搜索 ----------
+
+    def _match_text(
+            self,
+            query: str,
+            grams: dict[str, set[int]],
+            texts: list[str],
+    ) -> set[int]:
+        if SEPARATOR in query:
+            return set()
+
+        if len(query) >= NGRAM:
+            postings = [grams.get(gram) for gram in _ngrams(query)]
+            if not all(postings):
+                return set()
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        else:
+            candidates = range(len(self._ids))
+
+        return {row for row in candidates if query in texts[row]}
+
+    def _filter(self, request: SearchRequest, sensitive_permission: bool) -> list[int]:
+        rows: Optional[set[int]] = None
+
+        def narrow(matched: set[int]):
+            nonlocal rows
+            rows = set(matched) if rows is None else rows & matched
+
+        # 全局搜索
+        if request.global_query is not None:
+            query = request.global_query.lower()
+            matched = self._match_text(query, self._public_grams, self._public_texts)
+            if sensitive_permission:
+                matched |= self._match_text(query, self._sensitive_grams, self._sensitive_texts)
+            narrow(matched)
+
+        # 学院
+        if request.colleges:
+            matched = set()
+            for college in College:
+                if college.name in request.colleges:
+                    matched |= self._by_college.get(college, set())
+            narrow(matched)
+
+        # 部门
+        if request.departments:
+            matched = set()
+            for code in request.departments:
+                department_id = self._department_ids.get(code)
+                if department_id is not None:
+                    matched |= self._by_department.get(department_id, set())
+            narrow(matched)
+
+        # 等级
+        if request.levels:
+            matched = set()
+            for level in UserLevel:
+                if level.name in request.levels:
+                    matched |= self._by_level.get(level, set())
+            narrow(matched)
+
+        result = range(len(self._ids)) if rows is None else rows
+
+        # 入库时间
+        if request.create_at_start is not None and request.create_at_end is not None:
+            start = _as_utc(request.create_at_start)
+            end = _as_utc(request.create_at_end)
+            result = [row for row in result if start <= self._create_ats[row] <= end]
+
+        if not self._ordered:
+            return sorted(result, key=self._ids.__getitem__, reverse=True)
+        if isinstance(result, range):
+            return result[::-1]
+        return sorted(result, reverse=True)
+
+    def _member_dict(self, row: int, sensitive_permission: bool) -> dict:
+        return member_dict(
+            qq_id=self._qq_ids[row],
+            mc_name=self._mc_names[row],
+            nickname=self._nicknames[row],
+            create_at=self._create_ats[row],
+            real_name=self._real_names[row],
+            student_id=self._student_ids[row],
+            college_name=self._college_names[row],
+            major=self._majors[row],
+            grade=self._grades[row],
+            class_index=self._class_indexes[row],
+            departments=[
+                self._department_info[department_id]
+                for department_id in sorted(self._departments[row])
+                if department_id in self._department_info
+            ],
+            level=self._levels[row].value,
+            sensitive_permission=sensitive_permission,
+        )
+
+    def search(
+            self,
+            request: SearchRequest,
+            sensitive_permission: bool,
+            after_id: Optional[int] = None,
+    ) -> tuple[list[dict], int, Optional[int]]:
+        """搜索成员
+
+        Args:
+            request (SearchRequest): 搜索请求.
+            sensitive_permission (bool): 是否允许查看与搜索敏感信息.
+            after_id (Optional[int]): 游标分页时上一页最后一个成员的 ID.
+
+        Returns:
+            tuple[list[dict], int, Optional[int]]: 当前页成员(`MemberInfo` 的序列化结果), 总数, 下一页游标对应的成员 ID.
+        """
+        rows = self._filter(request, sensitive_permission)
+        total = len(rows)
+
+        if after_id is not None:
+            start = bisect_right(rows, -after_id, key=lambda row: -self._ids[row])
+        else:
+            start = (request.page_index - 1) * request.page_size
+        page = list(rows[start:start + request.page_size])
+
+        next_id = None
+        if page and start + request.page_size < total:
+            next_id = self._ids[page[-1]]
+
+        return [self._member_dict(row, sensitive_permission) for row in page], total, next_id
+
+
+MEMBER_INDEX = MemberIndex()
@@ -0,0 +1,81 @@
+import asyncio
+import socket
+from typing import Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.core.config import CONFIG
+from app.core.database import dispose_engines, init_db
+from app.core.logger import configure_logging, logger
+
+# 工作进程按导入路径加载应用
+APP = "app.main:app"
+
+
+def prepare():
+    """启动工作进程前在主进程中执行一次: 建表
+
+    完成后释放连接池, 工作进程各自建立连接.
+    """
+    async def _prepare():
+        try:
+            await init_db()
+        finally:
+            await dispose_engines()
+
+    asyncio.run(_prepare())
+    logger.info("数据库初始化完成")
+
+
+class ReusePortServer(uvicorn.Server):
+    """每个工作进程以 SO_REUSEPORT 各自绑定端口, 由内核在进程间分配新连接"""
+
+    def run(self, sockets: Optional[list[socket.socket]] = None):
+        family = socket.AF_INET6 if ":" in self.config.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.config.host, self.config.port))
+        sock.listen(self.config.backlog)
+        super().run(sockets=[sock])
+
+
+def run():
+    """生产环境启动入口, 以 `python -m app.server` 运行
+
+    本模块不导入应用本身, 主进程与工作进程启动时重新执行的本模块都不会创建应用;
+    工作进程按 `APP` 导入并创建一次应用.
+
+    - 主进程建表后启动 `WORKERS` 个工作进程, 工作进程退出后自动重启.
+    - 默认由主进程绑定端口, 工作进程共享该套接字; `REUSE_PORT` 开启时各进程以 SO_REUSEPORT 绑定.
+    - 安装了 uvloop / httptools 时自动使用.
+    - 收到 SIGTERM / SIGINT 后停止接受新连接, 等待处理中的请求完成(最多 `GRACEFUL_SHUTDOWN_TIMEOUT` 秒),
+      再执行应用的关闭流程释放连接池.
+    """
+    configure_logging()
+    prepare()
+
+    config = uvicorn.Config(
+        APP,
+        host=CONFIG.HOST,
+        port=CONFIG.PORT,
+        workers=CONFIG.WORKERS,
+        loop="auto",
+        http="auto",
+        timeout_graceful_shutdown=CONFIG.GRACEFUL_SHUTDOWN_TIMEOUT,
+        # 保留 `app.core.logger` 对 uvicorn 日志的接管
+        log_config=None,
+    )
+
+    if CONFIG.WORKERS <= 1:
+        uvicorn.Server(config).run()
+    elif CONFIG.REUSE_PORT:
+        Multiprocess(config, target=ReusePortServer(config).run, sockets=[]).run()
+    else:
+        sock = config.bind_socket()
+        Multiprocess(config, target=uvicorn.Server(config).run, sockets=[sock]).run()
+
+
+if __name__ == "__main__":
+    run()
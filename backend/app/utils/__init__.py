@@ -1,3 +1,3 @@
 from .get_current_user import get_current_user
-from .middleware import AuthMiddleware
+from .middleware import AuthMiddleware, InstrumentationMiddleware
 from .permission import has_permission
@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """带过期时间的 LRU 缓存
+
+    容量满时淘汰最久未使用的条目, 条目超过 `ttl` 秒后视为失效.
+    仅在单个事件循环内使用, 不做加锁处理.
+
+    Attributes:
+        maxsize (int): 最大条目数.
+        ttl (float): 条目存活时间, 单位秒.
+        hits (int): 命中次数.
+        misses (int): 未命中次数.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expire_at, value = item
+        if expire_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        expire_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expire_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> Optional[V]:
+        item = self._data.pop(key, None)
+        return None if item is None else item[1]
+
+    def values(self) -> list[V]:
+        return [value for _, value in self._data.values()]
+
+    def items(self) -> list[tuple[K, V]]:
+        return [(key, value) for key, (_, value) in self._data.items()]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
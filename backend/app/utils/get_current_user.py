@@ -1,9 +1,10 @@
 from fastapi import HTTPException, Request, Depends
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.security import parse_session_token
 from app.model import User
+from app.utils.session_cache import load_session
 
 
 async def get_current_user(
@@ -20,13 +21,18 @@ async def get_current_user(
             }
         )
 
-    user = (
-        (await db.execute(
-            select(User).where(User.token == token)
-        ))
-        .scalars()
-        .first()
-    )
+    # 复用认证中间件已解析的用户, 并挂载到当前请求的数据库会话
+    state_user = getattr(request.state, "user", None)
+    session = getattr(request.state, "session", None)
+    if state_user is not None:
+        user = await db.merge(state_user, load=False)
+    elif session is not None:
+        user = await db.get(User, session.user_id)
+    else:
+        # 未经过认证中间件(免登录模式)
+        claims = parse_session_token(token)
+        user_session = await load_session(db, claims, token) if claims is not None else None
+        user = user_session.user if user_session is not None else None
 
     if not user:
         raise HTTPException(
@@ -37,4 +43,7 @@ async def get_current_user(
             }
         )
 
+    # 提交写入后据此保证读己之写
+    db.info["user_id"] = user.id
+
     return user
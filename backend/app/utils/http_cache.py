@@ -0,0 +1,65 @@
+import hashlib
+import time
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class CachedResponse:
+    """预序列化的 JSON 响应
+
+    首次请求(或失效后)调用 `build` 生成响应模型并序列化为字节, 之后直接返回缓存的字节.
+    响应带有强 ETag, 请求头 `If-None-Match` 命中时返回 `304 Not Modified`.
+
+    Attributes:
+        cache_control (str): 响应的 `Cache-Control` 头.
+        ttl (Optional[float]): 缓存存活时间, 单位秒, 为 None 时只能手动失效.
+    """
+
+    def __init__(
+            self,
+            build: Callable[[], Awaitable[BaseModel]],
+            cache_control: str,
+            ttl: Optional[float] = None,
+    ):
+        self.cache_control = cache_control
+        self.ttl = ttl
+        self._build = build
+        self._body: Optional[bytes] = None
+        self._etag = ""
+        self._expire_at = 0.0
+
+    def invalidate(self):
+        self._body = None
+
+    async def _load(self) -> bytes:
+        if self._body is None or (self.ttl is not None and self._expire_at < time.monotonic()):
+            model = await self._build()
+            body = model.model_dump_json(by_alias=True).encode("utf-8")
+            self._etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            self._body = body
+            if self.ttl is not None:
+                self._expire_at = time.monotonic() + self.ttl
+        return self._body
+
+    def _not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            # If-None-Match 使用弱比较
+            if tag == "*" or tag.removeprefix("W/") == self._etag:
+                return True
+        return False
+
+    async def respond(self, request: Request) -> Response:
+        body = await self._load()
+        headers = {"ETag": self._etag, "Cache-Control": self.cache_control}
+
+        if self._not_modified(request):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+import orjson
+from starlette.responses import Response
+
+from app.schema.member import MemberInfo, MemberListResponse
+
+# 字段名 -> 序列化别名, 与 `MemberInfo` / `MemberListResponse` 保持一致
+MEMBER_KEYS = {
+    name: field.serialization_alias or name
+    for name, field in MemberInfo.model_fields.items()
+}
+LIST_KEYS = {
+    name: field.serialization_alias or name
+    for name, field in MemberListResponse.model_fields.items()
+}
+
+
+def format_datetime(value: datetime) -> str:
+    """与 Pydantic 的 JSON 序列化结果一致的 UTC 时间字符串"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    else:
+        value = value.astimezone(timezone.utc)
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def member_dict(
+        qq_id: int,
+        mc_name: Optional[str],
+        nickname: str,
+        create_at: datetime,
+        real_name: str,
+        student_id: Optional[str],
+        college_name: str,
+        major: Optional[str],
+        grade: Optional[int],
+        class_index: Optional[int],
+        departments: list[dict],
+        level: str,
+        sensitive_permission: bool,
+) -> dict:
+    """直接构建 `MemberInfo` 的序列化结果, 按权限屏蔽敏感信息
+
+    Args:
+        departments (list[dict]): 部门列表, 元素为 `{"name": ..., "code": ...}`.
+        sensitive_permission (bool): 是否允许查看敏感信息.
+    """
+    return {
+        MEMBER_KEYS["qq_id"]: qq_id,
+        MEMBER_KEYS["mc_name"]: mc_name,
+        MEMBER_KEYS["nickname"]: nickname,
+        MEMBER_KEYS["create_at"]: format_datetime(create_at),
+        MEMBER_KEYS["real_name"]: real_name if sensitive_permission else "***",
+        MEMBER_KEYS["student_id"]: student_id if sensitive_permission else "***",
+        MEMBER_KEYS["college_name"]: college_name,
+        MEMBER_KEYS["major"]: major if sensitive_permission else None,
+        MEMBER_KEYS["grade"]: grade if sensitive_permission else None,
+        MEMBER_KEYS["class_index"]: class_index if sensitive_permission else None,
+        MEMBER_KEYS["departments"]: departments,
+        MEMBER_KEYS["level"]: level,
+    }
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content)
+
+
+def member_list_body(members: list[dict], total: int, next_cursor: Optional[str]) -> bytes:
+    """序列化成员列表, 跳过 Pydantic 校验与 `jsonable_encoder`"""
+    content = {
+        LIST_KEYS["members"]: members,
+        LIST_KEYS["total"]: total,
+        LIST_KEYS["next_cursor"]: next_cursor,
+    }
+    return dumps(content)
+
+
+def member_list_response(members: list[dict], total: int, next_cursor: Optional[str]) -> Response:
+    return Response(content=member_list_body(members, total, next_cursor), media_type="application/json")
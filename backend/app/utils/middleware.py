@@ -1,54 +1,97 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from inspect import cleandoc
-from typing import Callable
+from typing import Optional, Sequence
 
-from fastapi import HTTPException, Request, Depends
-from starlette.responses import Response
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+from starlette.routing import BaseRoute, Match
+from starlette.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.database import get_db
+from app.core.database import async_session
 from app.core.config import CONFIG
-from app.core.logger import logger
+from app.core.instrumentation import start_request
+from app.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUESTS_TOTAL
+from app.core.logger import LogThrottle, logger
+from app.core.security import parse_session_token
 from app.model import User
+from app.utils.session_cache import SESSION_CACHE, CachedSession, load_session
 
 SIGNUP_PATHS = ["/signup", "/signup/info", "/signup/check_qq"]
 EXCLUDE_PATHS = ["/login", *SIGNUP_PATHS]
 EXCLUDE_API_PATHS = ["/api" + api for api in EXCLUDE_PATHS]
+DOCS_PATHS = ["/docs", "/openapi.json", "/redoc"]
+METRICS_PATH = "/metrics"
+
+# 认证失败日志可能被大量无效请求刷屏, 限制输出频率
+AUTH_FAILURE_LOG = LogThrottle(CONFIG.LOG_AUTH_FAILURE_RATE_LIMIT)
+
+
+class AuthMiddleware:
+    """用户认证中间件
+
+    纯 ASGI 实现, 不额外包装响应体.
+    伪造或超过最长有效期的 token 只校验签名即可拒绝, 不访问数据库;
+    其余 token 先查会话缓存, 未命中时按主键查询会话, 以确认未被注销.
+    认证通过后将会话写入 `scope["state"]["session"]`;
+    若本次请求从数据库加载了用户, 同时写入 `scope["state"]["user"]`,
+    供 `get_current_user` 直接复用, 避免重复查询.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.requires_auth(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            session, user = await self.authenticate(HTTPConnection(scope).cookies.get("token"))
+        except HTTPException as e:
+            response = JSONResponse(
+                status_code=e.status_code,
+                content={"detail": e.detail},
+            )
+            await response(scope, receive, send)
+            return
 
+        state = scope.setdefault("state", {})
+        state["session"] = session
+        state["user"] = user
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    """用户认证中间件"""
+        await self.app(scope, receive, send)
 
-    async def dispatch(
-            self,
-            request: Request,
-            call_next: Callable,
-            db: AsyncSession = Depends(get_db),
-    ) -> Response:
+    @staticmethod
+    def requires_auth(path: str) -> bool:
         # 免登录模式, 取消所有验证
         if CONFIG.NO_LOGIN:
-            return await call_next(request)
+            return False
 
-        # 放行文档相关路径
-        if request.url.path in ["/docs", "/openapi.json", "/redoc"]:
-            return await call_next(request)
+        # 放行文档相关路径与监控指标
+        if path in DOCS_PATHS or path == METRICS_PATH:
+            return False
 
         # 放行非 API 路径
-        if not request.url.path.startswith("/api"):
-            return await call_next(request)
+        if not path.startswith("/api"):
+            return False
 
         # 放行不需要认证的 API 路径
-        if request.url.path in EXCLUDE_API_PATHS:
-            return await call_next(request)
+        if path in EXCLUDE_API_PATHS:
+            return False
+
+        return True
 
-        # 获取 Token
-        token = request.cookies.get("token")
+    @staticmethod
+    async def authenticate(token: Optional[str]) -> tuple[CachedSession, Optional[User]]:
+        """验证 Token
 
-        # 验证 Token
+        Returns:
+            tuple[CachedSession, Optional[User]]: 会话, 以及缓存未命中时从数据库加载的用户.
+        """
         if not token:
-            logger.info("认证失败: 缺少 token")
+            AUTH_FAILURE_LOG.log("INFO", "认证失败: 缺少 token")
             raise HTTPException(
                 status_code=401, detail={
                     "message": "认证失败: 缺少 token",
@@ -56,42 +99,35 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 }
             )
 
-        async for db in get_db():
+        claims = parse_session_token(token)
+        if claims is None:
+            AUTH_FAILURE_LOG.log("INFO", "认证失败: 无效的 token")
+            raise HTTPException(status_code=401, detail={
+                "message": "认证失败: 无效的 token",
+                "code": "INVALID_TOKEN"
+            })
+
+        now = datetime.now(timezone.utc)
+        if claims.issued_at + CONFIG.SESSION_MAX_AGE < now.timestamp():
+            AUTH_FAILURE_LOG.log("INFO", "认证失败: 登录已过期")
+            raise HTTPException(status_code=401, detail={
+                "message": "认证失败: 登录已过期",
+                "code": "EXPIRED"
+            })
+
+        # 优先使用会话缓存, 命中时不访问数据库
+        user = None
+        session = SESSION_CACHE.get(claims.session_id)
+        if session is not None and not session.matches(claims, token):
+            # 会话 ID 相同但 token 不符(如已注销的旧 token), 按未命中处理, 由数据库校验
+            session = None
+        if session is None:
             try:
-                user = (
-                    (await db.execute(
-                        select(User).where(User.token ==  token)
-                    ))
-                    .scalars().first()
-                )
-
-                if not user:
-                    logger.info("认证失败: 用户不存在")
-                    raise HTTPException(status_code=401, detail={
-                        "message": "认证失败: 用户不存在",
-                        "code": "USER_NOT_FOUND"
-                    })
-
-                if not user.update_at:
-                    logger.info("认证失败: 登录已过期")
-                    raise HTTPException(status_code=401, detail={
-                        "message": "认证失败: 登录已过期",
-                        "code": "EXPIRED"
-                    })
-
-                if user.update_at + timedelta(seconds=CONFIG.TIME_OUT) < datetime.now(timezone.utc):
-                    logger.info("认证失败: 登录已过期")
-                    raise HTTPException(status_code=401, detail={
-                        "message": "认证失败: 登录已过期",
-                        "code": "EXPIRED"
-                    })
-
-                user.update_at = datetime.now(timezone.utc)
-                await db.commit()
-
-                return await call_next(request)
+                async with async_session() as db:
+                    user_session = await load_session(db, claims, token)
             except Exception as e:
                 # 把内部错误也规范成对象形式，便于前端解析
+                logger.error(e)
                 raise HTTPException(
                     status_code=500,
                     detail={
@@ -102,14 +138,101 @@ class AuthMiddleware(BaseHTTPMiddleware):
                         "code": "SERVER_ERROR"
                     }
                 )
-            finally:
-                await db.close()
-
-        logger.error("数据库连接失败")
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "message": "数据库连接失败",
-                "code": "DB_CONN_FAIL"
-            }
-        )
+
+            # 会话已注销, 或 token 与会话不符
+            if user_session is None:
+                AUTH_FAILURE_LOG.log("INFO", "认证失败: 用户不存在")
+                raise HTTPException(status_code=401, detail={
+                    "message": "认证失败: 用户不存在",
+                    "code": "USER_NOT_FOUND"
+                })
+
+            user = user_session.user
+            session = SESSION_CACHE.put(user_session)
+
+        if session.expire_at < now:
+            SESSION_CACHE.invalidate(session.session_id)
+            AUTH_FAILURE_LOG.log("INFO", "认证失败: 登录已过期")
+            raise HTTPException(status_code=401, detail={
+                "message": "认证失败: 登录已过期",
+                "code": "EXPIRED"
+            })
+
+        # 滑动过期, 最近访问时间由后台任务批量写回
+        SESSION_CACHE.touch(session, now)
+
+        return session, user
+
+
+class InstrumentationMiddleware:
+    """请求统计中间件
+
+    记录每个请求的总耗时, SQL 语句数与耗时, 密码哈希耗时以及响应体大小.
+    超过 `SLOW_REQUEST_THRESHOLD` 的请求记录为警告, 其余请求记录为调试日志.
+    同时更新 `/metrics` 输出的按路由名称统计的延迟直方图与进行中请求数.
+    调试模式下在响应中添加 `Server-Timing` 头, 可在浏览器开发者工具中查看.
+
+    应作为最外层中间件注册, 以便统计认证中间件中的数据库查询.
+
+    Args:
+        routes (Sequence[BaseRoute]): 用于匹配路由名称的路由列表, 认证失败的请求在路由匹配前返回.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Sequence[BaseRoute] = ()):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = start_request(scope)
+        status_code = 500
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if CONFIG.DEBUG:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", metrics.server_timing())
+            elif message["type"] == "http.response.body":
+                metrics.response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            elapsed = metrics.elapsed
+
+            route = self.route_name(scope)
+            REQUEST_LATENCY.observe(elapsed, route, scope["method"])
+            REQUESTS_TOTAL.inc(route, scope["method"], str(status_code))
+
+            summary = (
+                f"{scope['method']} {metrics.name} {status_code} {elapsed * 1000:.1f}ms "
+                f"sql={metrics.sql_count}/{metrics.sql_seconds * 1000:.1f}ms "
+                f"password={metrics.password_seconds * 1000:.1f}ms "
+                f"bytes={metrics.response_bytes}"
+            )
+            if elapsed >= CONFIG.SLOW_REQUEST_THRESHOLD:
+                logger.warning(f"慢请求: {summary}")
+            else:
+                logger.debug(summary)
+
+    def route_name(self, scope: Scope) -> str:
+        """请求对应的路由名称
+
+        认证失败的请求在路由匹配前返回, 需要自行匹配;
+        未匹配任何路由的请求归为一类, 避免任意路径产生大量标签.
+        """
+        route = scope.get("route")
+        if route is None:
+            for candidate in self.routes:
+                if candidate.matches(scope)[0] == Match.FULL:
+                    route = candidate
+                    break
+        return getattr(route, "name", None) or "unmatched"
@@ -23,3 +23,12 @@ def has_permission(
         return user.level in permission
 
     return user.level == permission
+
+
+# 权限级别从低到高
+LEVEL_ORDER = [UserLevel.MEMBER, UserLevel.MINISTER, UserLevel.ADMIN, UserLevel.SUPERADMIN]
+
+
+def lower_levels(level: UserLevel) -> list[UserLevel]:
+    """低于指定级别的所有级别, 用于限制只能修改级别低于自己的成员"""
+    return LEVEL_ORDER[:LEVEL_ORDER.index(level)]
@@ -0,0 +1,78 @@
+import asyncio
+from array import array
+from bisect import bisect_left
+
+from sqlalchemy import select
+
+from app.core.database import async_session
+from app.core.logger import logger
+from app.model import User
+
+# 新注册的 QQ 号先放入集合, 超过该数量时合并进有序数组
+MERGE_THRESHOLD = 1024
+
+
+class QQRegistry:
+    """已注册 QQ 号的内存集合, 用于注册时检查 QQ 号是否可用
+
+    QQ 号保存在有序的 `array('q')` 中(每个 8 字节), 以二分查找判断是否存在;
+    启动后新注册的 QQ 号先放入一个小集合, 累积到一定数量后合并.
+
+    结果为"不存在"时直接采信; 为"存在"时仍需查询数据库确认.
+    多进程部署下其他进程的注册只能在定期重建后看到, 此时由注册时的唯一约束兜底.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._sorted = array("q")
+        self._added: set[int] = set()
+        # 加载期间不合并, 避免合并结果被加载结果覆盖
+        self._loading = False
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._added)
+
+    @staticmethod
+    def _search(values: array, qq_id: int) -> bool:
+        i = bisect_left(values, qq_id)
+        return i < len(values) and values[i] == qq_id
+
+    def might_exist(self, qq_id: int) -> bool:
+        return qq_id in self._added or self._search(self._sorted, qq_id)
+
+    def add(self, qq_id: int):
+        if self.might_exist(qq_id):
+            return
+        self._added.add(qq_id)
+        if len(self._added) >= MERGE_THRESHOLD and not self._loading:
+            self._sorted = array("q", sorted([*self._sorted, *self._added]))
+            self._added = set()
+
+    async def load(self):
+        """从数据库全量加载"""
+        self._loading = True
+        try:
+            async with async_session() as db:
+                qq_ids = array(
+                    "q",
+                    (await db.execute(select(User.qq_id).order_by(User.qq_id))).scalars(),
+                )
+        finally:
+            self._loading = False
+
+        # 保留加载期间新注册的 QQ 号
+        self._added = {qq_id for qq_id in self._added if not self._search(qq_ids, qq_id)}
+        self._sorted = qq_ids
+        self.ready = True
+
+    async def refresh_periodically(self, interval: float):
+        """定期全量重建, 用于多进程部署下同步其他进程的注册"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"QQ 号集合重建失败: {e}")
+
+
+QQ_REGISTRY = QQRegistry()
@@ -0,0 +1,166 @@
+import math
+import time
+from abc import ABC, abstractmethod
+
+from fastapi import HTTPException, Request
+
+from app.core.config import CONFIG
+from app.core.logger import logger
+from app.core.metrics import RATE_LIMITED_TOTAL
+from app.utils.cache import TTLCache
+
+
+class RateLimitStorage(ABC):
+    """限流状态存储
+
+    以令牌桶计数: 桶容量为 `limit`, 每秒补充 `limit / window` 个令牌, 每次请求消耗一个.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, limit: int, window: float) -> float:
+        """消耗一个令牌
+
+        Returns:
+            float: 令牌不足时距离下一个令牌的秒数, 否则为 0.
+        """
+
+    async def close(self):
+        pass
+
+
+class MemoryRateLimitStorage(RateLimitStorage):
+    """进程内存中的令牌桶, 适用于单进程部署
+
+    桶在补满所需的时间后过期; 容量满时淘汰最久未使用的桶.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        # 键 -> [剩余令牌数, 更新时间]
+        self._buckets: TTLCache[str, list[float]] = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def consume(self, key: str, limit: int, window: float) -> float:
+        rate = limit / window
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        tokens = limit if bucket is None else min(limit, bucket[0] + (now - bucket[1]) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets.set(key, [tokens, now], ttl=window)
+        return retry_after
+
+
+# 与 `MemoryRateLimitStorage` 相同的令牌桶, 在 Redis 中原子执行.
+# 返回字符串, 避免 Redis 将 Lua 数字截断为整数
+TOKEN_BUCKET_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local rate = limit / window
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = limit
+if bucket[1] then
+    tokens = math.min(limit, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+end
+
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitStorage(RateLimitStorage):
+    """Redis (或兼容 Redis 协议的服务, 如 Valkey / KeyDB) 中的令牌桶, 多个工作进程共享限流状态"""
+
+    def __init__(self, url: str):
+        # redis 为可选依赖(extra `redis`), 仅在配置了 RATE_LIMIT_STORAGE_URL 时导入
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL 需要安装 redis, 请执行 `uv sync --extra redis`") from e
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def consume(self, key: str, limit: int, window: float) -> float:
+        # 各进程使用墙上时钟, 部署在同一主机或时钟同步的主机上
+        result = await self._script(keys=[key], args=[limit, window, time.time()])
+        return float(result)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_storage(url: str) -> RateLimitStorage:
+    if not url:
+        return MemoryRateLimitStorage()
+    return RedisRateLimitStorage(url)
+
+
+RATE_LIMIT_STORAGE = create_storage(CONFIG.RATE_LIMIT_STORAGE_URL)
+
+
+def client_ip(request: Request) -> str:
+    """客户端 IP; 部署在反向代理之后时需启用 uvicorn 的 `--proxy-headers`"""
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """请求限流
+
+    实例可直接作为路由依赖, 按客户端 IP 限流; 也可在处理函数中调用 `check` 按其他键限流.
+    应在访问数据库与计算密码哈希之前检查. 存储不可用时放行请求.
+
+    Attributes:
+        name (str): 限流器名称, 用于区分存储键与监控指标.
+        limit (int): 时间窗口内的请求次数上限, 0 表示不限制.
+        window (float): 时间窗口, 单位秒.
+    """
+
+    def __init__(self, name: str, limit: int, window: float):
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    async def check(self, key: str):
+        if self.limit <= 0:
+            return
+
+        try:
+            retry_after = await RATE_LIMIT_STORAGE.consume(
+                f"rate_limit:{self.name}:{key}", self.limit, self.window
+            )
+        except Exception as e:
+            logger.warning(f"限流存储不可用, 已放行请求: {e}")
+            return
+
+        if retry_after > 0:
+            RATE_LIMITED_TOTAL.inc(self.name)
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "message": "请求过于频繁，请稍后再试",
+                    "code": "TOO_MANY_REQUESTS"
+                },
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def __call__(self, request: Request):
+        await self.check(client_ip(request))
+
+
+LOGIN_IP_LIMITER = RateLimiter("login_ip", CONFIG.LOGIN_IP_RATE_LIMIT, CONFIG.RATE_LIMIT_WINDOW)
+LOGIN_QQ_LIMITER = RateLimiter("login_qq", CONFIG.LOGIN_QQ_RATE_LIMIT, CONFIG.RATE_LIMIT_WINDOW)
+CHECK_QQ_LIMITER = RateLimiter("check_qq", CONFIG.CHECK_QQ_RATE_LIMIT, CONFIG.RATE_LIMIT_WINDOW)
+CHECK_QQ_TARGET_LIMITER = RateLimiter(
+    "check_qq_target", CONFIG.CHECK_QQ_TARGET_RATE_LIMIT, CONFIG.RATE_LIMIT_WINDOW
+)
@@ -0,0 +1,194 @@
+import asyncio
+import hmac
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.core.config import CONFIG
+from app.core.database import async_session
+from app.core.logger import logger
+from app.core.security import SessionToken, hash_session_token
+from app.model import UserLevel, UserSession
+from app.utils.cache import TTLCache
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite 取出的时间不带时区, 统一按 UTC 处理
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@dataclass
+class CachedSession:
+    """缓存的登录会话
+
+    Attributes:
+        session_id (int): 会话 ID.
+        user_id (int): 用户 ID.
+        token_hash (str): token 的 SHA-256 哈希.
+        level (UserLevel): 用户权限级别.
+        last_seen (datetime): 最近一次访问时间(内存中的值, 可能尚未写回数据库).
+        persisted_at (datetime): 最近一次已写回(或已排队写回)数据库的访问时间.
+    """
+
+    session_id: int
+    user_id: int
+    token_hash: str
+    level: UserLevel
+    last_seen: datetime
+    persisted_at: datetime
+
+    @property
+    def expire_at(self) -> datetime:
+        return self.last_seen + timedelta(seconds=CONFIG.TIME_OUT)
+
+    def matches(self, claims: SessionToken, token: str) -> bool:
+        """token 是否属于该会话, 与 `load_session` 的校验一致"""
+        return (
+                self.user_id == claims.user_id
+                and hmac.compare_digest(self.token_hash, hash_session_token(token))
+        )
+
+
+class SessionCache:
+    """会话 ID -> 会话 的进程内缓存
+
+    token 的签名由调用方先行校验, 缓存按 token 中的会话 ID 索引;
+    命中后调用方仍须以 `CachedSession.matches` 比对用户 ID 与 token 哈希.
+
+    - 命中时不访问数据库, 只在内存中滑动过期时间.
+    - `last_seen_at` 采用写回策略: 每个会话最多每 `flush_interval` 秒排队一次写入,
+      由后台任务批量提交.
+    - 缓存条目本身的存活时间为 `ttl` 秒, 用于限制多进程部署下注销等操作的可见延迟.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._sessions: TTLCache[int, CachedSession] = TTLCache(maxsize, ttl)
+        self._pending: dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def hits(self) -> int:
+        return self._sessions.hits
+
+    @property
+    def misses(self) -> int:
+        return self._sessions.misses
+
+    def get(self, session_id: int) -> Optional[CachedSession]:
+        return self._sessions.get(session_id)
+
+    def put(self, user_session: UserSession) -> CachedSession:
+        """根据数据库中的会话记录(须已加载 `user`)建立缓存条目"""
+        last_seen = _as_utc(user_session.last_seen_at)
+        pending = self._pending.get(user_session.id)
+        if pending is not None and pending > last_seen:
+            last_seen = pending
+
+        session = CachedSession(
+            session_id=user_session.id,
+            user_id=user_session.user_id,
+            token_hash=user_session.token_hash,
+            level=user_session.user.level,
+            last_seen=last_seen,
+            persisted_at=last_seen,
+        )
+        self._sessions.set(user_session.id, session)
+        return session
+
+    def touch(self, session: CachedSession, now: Optional[datetime] = None):
+        """刷新会话的最近访问时间, 必要时排队写回数据库"""
+        now = now or datetime.now(timezone.utc)
+        session.last_seen = now
+        if now - session.persisted_at >= timedelta(seconds=self.flush_interval):
+            session.persisted_at = now
+            self._pending[session.session_id] = now
+
+    def invalidate(self, session_id: int):
+        """移除缓存会话以及尚未写回的访问时间"""
+        self._sessions.pop(session_id)
+        self._pending.pop(session_id, None)
+
+    def invalidate_user(self, user_id: int):
+        """移除用户的所有缓存会话, 用于权限等用户信息变化后重新加载"""
+        for session_id, session in self._sessions.items():
+            if session.user_id == user_id:
+                self._sessions.pop(session_id)
+
+    async def flush(self):
+        """将排队中的访问时间批量写回数据库"""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        try:
+            async with async_session() as db:
+                # 已注销的会话不存在对应行, 不会被写回
+                sessions = UserSession.__table__
+                await db.execute(
+                    update(sessions)
+                    .where(sessions.c.id == bindparam("b_session_id"))
+                    .values(last_seen_at=bindparam("b_last_seen_at")),
+                    [
+                        {"b_session_id": session_id, "b_last_seen_at": last_seen}
+                        for session_id, last_seen in pending.items()
+                    ],
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"会话访问时间写回失败: {e}")
+            for session_id, last_seen in pending.items():
+                self._pending.setdefault(session_id, last_seen)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+async def load_session(db: AsyncSession, claims: SessionToken, token: str) -> Optional[UserSession]:
+    """按主键查询 token 对应的会话, 同时加载用户
+
+    Args:
+        db (AsyncSession): 数据库会话.
+        claims (SessionToken): 已通过签名校验的 token 内容.
+        token (str): 原始 token, 与数据库中的哈希比对.
+
+    Returns:
+        Optional[UserSession]: 会话, 已注销或与 token 不符时为 None.
+    """
+    user_session = await db.get(UserSession, claims.session_id, options=[joinedload(UserSession.user)])
+    if (
+            user_session is None
+            or user_session.user_id != claims.user_id
+            or not hmac.compare_digest(user_session.token_hash, hash_session_token(token))
+    ):
+        return None
+    return user_session
+
+
+SESSION_CACHE = SessionCache(
+    maxsize=CONFIG.SESSION_CACHE_SIZE,
+    ttl=CONFIG.SESSION_CACHE_TTL,
+    flush_interval=CONFIG.SESSION_FLUSH_INTERVAL,
+)
@@ -0,0 +1,72 @@
+import asyncio
+import functools
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+from app.utils.cache import TTLCache
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """合并相同键的并发调用
+
+    同一个键同时只执行一次调用, 期间到达的调用方等待并共享同一个结果(或异常).
+    调用在独立的任务中执行, 发起调用的请求被取消时不影响其他等待者.
+    `ttl` 大于 0 时结果在完成后继续缓存 `ttl` 秒.
+
+    `invalidate` 之后到达的调用方不再加入此前发起的调用, 这些调用的结果也不会写入缓存.
+    仅在单个事件循环内使用, 不做加锁处理.
+
+    Attributes:
+        shared (int): 加入进行中调用的次数.
+        cache_hits (int): 命中结果缓存的次数.
+    """
+
+    def __init__(self, ttl: float = 0, maxsize: int = 1024):
+        self.shared = 0
+        self._calls: dict[K, asyncio.Task] = {}
+        self._results: Optional[TTLCache[K, V]] = TTLCache(maxsize, ttl) if ttl > 0 else None
+        self._generation = 0
+
+    @property
+    def cache_hits(self) -> int:
+        return self._results.hits if self._results is not None else 0
+
+    async def do(self, key: K, call: Callable[[], Awaitable[V]]) -> V:
+        """执行 `call`, 已有相同键的调用进行中(或结果已缓存)时复用其结果
+
+        Args:
+            key (K): 调用的键, 键相同的调用须返回相同的结果.
+            call (Callable[[], Awaitable[V]]): 无参数的协程函数.
+        """
+        if self._results is not None:
+            result = self._results.get(key)
+            if result is not None:
+                return result
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(call())
+            task.add_done_callback(functools.partial(self._done, key, self._generation))
+            self._calls[key] = task
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def _done(self, key: K, generation: int, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 同时取出异常, 避免所有等待者都已取消时输出 "exception was never retrieved"
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self._results is not None and generation == self._generation:
+            self._results.set(key, task.result())
+
+    def invalidate(self):
+        """数据变化后调用, 清空结果缓存, 之后的调用重新执行"""
+        self._generation += 1
+        self._calls.clear()
+        if self._results is not None:
+            self._results.clear()
@@ -0,0 +1,18 @@
+"""基准测试
+
+所有脚本均在 backend 目录下以 `python -m bench.<name>` 运行.
+未设置 DATABASE_URL 时使用临时目录中的 SQLite 数据库, 不会触碰 `data/` 下的数据.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix="hmo_bench_"))
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{TMP_DIR / 'bench.db'}")
+os.environ.setdefault("LOG_PATH", str(TMP_DIR / "logs"))
+
+# 压测请求均来自同一地址, 不限流
+for name in ("LOGIN_IP_RATE_LIMIT", "LOGIN_QQ_RATE_LIMIT", "CHECK_QQ_RATE_LIMIT", "CHECK_QQ_TARGET_RATE_LIMIT"):
+    os.environ.setdefault(name, "0")
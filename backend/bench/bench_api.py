@@ -0,0 +1,293 @@
+"""全接口压测场景
+
+向数据库写入测试数据后, 在进程内通过 httpx 的 ASGI transport 对 `create_app()` 依次运行以下场景:
+
+- login: 登录风暴, 大量已有成员同时登录.
+- search: 混合筛选条件的成员搜索, 普通成员与管理员各占一半.
+- profile: 已登录成员读取个人信息.
+- signup: 注册风暴, 新用户集中注册.
+- mixed: 读写混合, 登录与修改个人信息(写)和成员搜索(读)同时进行.
+
+每个场景以固定并发的闭环方式发送请求, 按接口统计吞吐量与 p50/p95/p99 延迟,
+结果以 JSON 输出, 便于在不同提交之间比较. 指定 `--baseline` 时同时打印与基线的差异.
+
+用法(在 backend 目录下):
+    python -m bench.bench_api --users 10000 --output result.json
+    python -m bench.bench_api --users 10000 --baseline result.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from app import create_app
+from app.core import database
+
+from .bench_member_index import random_request
+from .seed import PASSWORD, QQ_ID_BASE, generate_users, seed_database
+
+SCENARIOS = ["login", "search", "profile", "signup", "mixed"]
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+class Recorder:
+    """按接口记录延迟与错误数"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def send(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        endpoint = f"{method} {url.split('?')[0]}"
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+        return response
+
+    def results(self, elapsed: float) -> dict:
+        return {
+            endpoint: summarize(latencies, self.errors[endpoint], elapsed)
+            for endpoint, latencies in self.latencies.items()
+        }
+
+
+async def run_closed_loop(count: int, concurrency: int, task: Callable[[int], Awaitable[None]]) -> float:
+    """以固定并发执行 `count` 次 `task`, 返回总耗时"""
+    remaining = iter(range(count))
+
+    async def worker():
+        for i in remaining:
+            await task(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def login(recorder: Recorder, client: httpx.AsyncClient, qq_id: int) -> str:
+    response = await recorder.send(client, "POST", "/api/login", json={"QQID": qq_id, "password": PASSWORD})
+    return response.cookies.get("token", "")
+
+
+async def scenario_login(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    recorder = Recorder()
+    qq_ids = [QQ_ID_BASE + rng.randrange(args.users) for _ in range(args.logins)]
+
+    async def task(i: int):
+        await login(recorder, client, qq_ids[i])
+
+    elapsed = await run_closed_loop(args.logins, args.concurrency, task)
+    return recorder.results(elapsed)
+
+
+async def scenario_search(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    recorder = Recorder()
+    users = generate_users(args.users, args.seed)
+    # 普通成员与管理员的令牌, 分别对应屏蔽与不屏蔽敏感信息
+    tokens = [
+        await login(Recorder(), client, next(u["qq_id"] for u in users if u["level"].name == level))
+        for level in ("MEMBER", "ADMIN")
+    ]
+    bodies = [random_request(rng, users) for _ in range(args.searches)]
+
+    async def task(i: int):
+        await recorder.send(
+            client, "POST", "/api/member/search",
+            json=bodies[i], headers={"Cookie": f"token={tokens[i % 2]}"},
+        )
+
+    elapsed = await run_closed_loop(args.searches, args.concurrency, task)
+    return recorder.results(elapsed)
+
+
+async def scenario_profile(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    recorder = Recorder()
+    qq_ids = rng.sample(range(QQ_ID_BASE, QQ_ID_BASE + args.users), min(args.users, args.concurrency))
+    tokens = [await login(Recorder(), client, qq_id) for qq_id in qq_ids]
+
+    async def task(i: int):
+        await recorder.send(client, "GET", "/api/profile", headers={"Cookie": f"token={tokens[i % len(tokens)]}"})
+
+    elapsed = await run_closed_loop(args.profiles, args.concurrency, task)
+    return recorder.results(elapsed)
+
+
+async def scenario_signup(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    recorder = Recorder()
+    # 新用户的 QQ 号与学号不与已有数据冲突
+    base = QQ_ID_BASE + args.users
+
+    async def task(i: int):
+        qq_id = base + i
+        await recorder.send(client, "GET", f"/api/signup/check_qq?qq_id={qq_id}")
+        await recorder.send(client, "POST", "/api/signup", json={
+            "QQID": qq_id,
+            "nickname": f"signup{i}",
+            "password": PASSWORD,
+            "MCName": f"Signup_{i}",
+            "realName": "注册",
+            "studentID": f"2099{i:08d}",
+            "collegeName": rng.choice(["SM", "CCSEE", "SOL"]),
+            "major": None,
+            "grade": None,
+            "classIndex": None,
+        })
+
+    elapsed = await run_closed_loop(args.signups, args.concurrency, task)
+    return recorder.results(elapsed)
+
+
+async def scenario_mixed(client: httpx.AsyncClient, args, rng: random.Random) -> dict:
+    recorder = Recorder()
+    users = generate_users(args.users, args.seed)
+    qq_ids = rng.sample(range(QQ_ID_BASE, QQ_ID_BASE + args.users), min(args.users, args.concurrency))
+    tokens = [await login(Recorder(), client, qq_id) for qq_id in qq_ids]
+    bodies = [random_request(rng, users) for _ in range(args.mixed)]
+    # 约 5% 登录, 25% 修改个人信息, 其余为搜索
+    operations = rng.choices(["login", "update", "search"], [5, 25, 70], k=args.mixed)
+
+    async def task(i: int):
+        token = tokens[i % len(tokens)]
+        if operations[i] == "login":
+            await login(recorder, client, QQ_ID_BASE + rng.randrange(args.users))
+        elif operations[i] == "update":
+            await recorder.send(
+                client, "PUT", "/api/profile/update",
+                json={"nickname": f"mixed{i}"}, headers={"Cookie": f"token={token}"},
+            )
+        else:
+            await recorder.send(
+                client, "POST", "/api/member/search",
+                json=bodies[i], headers={"Cookie": f"token={token}"},
+            )
+
+    elapsed = await run_closed_loop(args.mixed, args.concurrency, task)
+    results = recorder.results(elapsed)
+    results["total"] = summarize(
+        [latency for latencies in recorder.latencies.values() for latency in latencies],
+        sum(recorder.errors.values()),
+        elapsed,
+    )
+    return results
+
+
+SCENARIO_RUNNERS = {
+    "login": scenario_login,
+    "search": scenario_search,
+    "profile": scenario_profile,
+    "signup": scenario_signup,
+    "mixed": scenario_mixed,
+}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_results(results: dict, baseline: Optional[dict]):
+    print(f"{'endpoint':<32}{'req/s':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'errors':>8}")
+    for scenario, endpoints in results["scenarios"].items():
+        print(f"[{scenario}]")
+        for endpoint, stats in endpoints.items():
+            if not stats["requests"]:
+                continue
+            line = (
+                f"  {endpoint:<30}{stats['throughput']:>10.1f}{stats['p50_ms']:>11.2f}"
+                f"{stats['p95_ms']:>11.2f}{stats['p99_ms']:>11.2f}{stats['errors']:>8}"
+            )
+            base = (baseline or {}).get("scenarios", {}).get(scenario, {}).get(endpoint)
+            if base and base.get("requests"):
+                line += (
+                    f"   req/s {(stats['throughput'] / base['throughput'] - 1) * 100:+.1f}%"
+                    f"  p99 {(stats['p99_ms'] / base['p99_ms'] - 1) * 100:+.1f}%"
+                )
+            print(line)
+
+
+async def main(args) -> dict:
+    await seed_database(args.users, seed=args.seed)
+    rng = random.Random(args.seed)
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "dialect": database.engine.dialect.name,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in args.scenarios:
+                results["scenarios"][scenario] = await SCENARIO_RUNNERS[scenario](client, args, rng)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--searches", type=int, default=500)
+    parser.add_argument("--profiles", type=int, default=1000)
+    parser.add_argument("--signups", type=int, default=32)
+    parser.add_argument("--mixed", type=int, default=1000)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="结果 JSON 的写入路径, 默认输出到标准输出")
+    parser.add_argument("--baseline", type=Path, help="用于比较的历史结果 JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+
+    print_results(results, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
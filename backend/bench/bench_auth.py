@@ -0,0 +1,77 @@
+"""认证中间件基准测试
+
+在进程内通过 httpx 的 ASGI transport 并发请求 `/api/profile`,
+输出吞吐量与 p50/p99 延迟.
+
+用法(在 backend 目录下):
+    python -m bench.bench_auth --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app import create_app
+from app.core.database import init_db
+
+SIGNUP = {
+    "QQID": 10001,
+    "nickname": "bench",
+    "password": "bench",
+    "MCName": "bench",
+    "realName": "bench",
+    "studentID": "bench",
+    "collegeName": "SM",
+    "major": None,
+    "grade": None,
+    "classIndex": None,
+}
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def main(total: int, concurrency: int):
+    await init_db()
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/api/signup", json=SIGNUP)
+            response = await client.post("/api/login", json={"QQID": SIGNUP["QQID"], "password": SIGNUP["password"]})
+            client.cookies.set("token", response.cookies["token"])
+
+            # 预热
+            for _ in range(50):
+                assert (await client.get("/api/profile")).status_code == 200
+
+            latencies: list[float] = []
+            remaining = iter(range(total))
+
+            async def worker():
+                for _ in remaining:
+                    start = time.perf_counter()
+                    response = await client.get("/api/profile")
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+    print(f"requests:    {total}")
+    print(f"concurrency: {concurrency}")
+    print(f"req/s:       {total / elapsed:.1f}")
+    print(f"p50 (ms):    {percentile(latencies, 0.50) * 1000:.2f}")
+    print(f"p99 (ms):    {percentile(latencies, 0.99) * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,111 @@
+"""QQ 号可用性检查基准测试
+
+在写入测试数据的数据库上, 以相同的查询序列(默认 90% 未注册, 模拟边输入边检查)比较:
+
+- entity: 改动前的做法, `select(User)` 加载完整实体.
+- exists: 只执行 `EXISTS` 查询.
+- registry: 先查内存中的已注册 QQ 号集合, 存在时再执行 `EXISTS`.
+
+先核对三者结果一致, 不一致时以非零状态退出; 之后分别统计单次检查耗时,
+并通过 HTTP 接口比较启用与停用内存集合时 `/api/signup/check_qq` 的吞吐量.
+
+用法(在 backend 目录下):
+    python -m bench.bench_check_qq --users 100000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+
+import httpx
+from sqlalchemy import exists, select
+
+from app import create_app
+from app.core.database import read_session
+from app.model import User
+from app.utils.qq_registry import QQ_REGISTRY
+
+from .bench_api import Recorder, run_closed_loop
+from .seed import QQ_ID_BASE, seed_database
+
+
+async def check_entity(qq_id: int) -> bool:
+    async with read_session() as db:
+        return (await db.execute(select(User).where(User.qq_id == qq_id))).scalars().first() is not None
+
+
+async def check_exists(qq_id: int) -> bool:
+    async with read_session() as db:
+        return (await db.execute(select(exists().where(User.qq_id == qq_id)))).scalar()
+
+
+async def check_registry(qq_id: int) -> bool:
+    if not QQ_REGISTRY.might_exist(qq_id):
+        return False
+    return await check_exists(qq_id)
+
+
+def random_queries(rng: random.Random, users: int, count: int, registered_ratio: float) -> list[int]:
+    return [
+        QQ_ID_BASE + rng.randrange(users) if rng.random() < registered_ratio
+        else QQ_ID_BASE + users + rng.randrange(10 ** 6)
+        for _ in range(count)
+    ]
+
+
+async def main(args) -> int:
+    await seed_database(args.users)
+    rng = random.Random(0)
+    queries = random_queries(rng, args.users, args.queries, args.registered)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    await QQ_REGISTRY.load()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"registry: {len(QQ_REGISTRY)} QQ ids, load {elapsed * 1000:.0f} ms, peak {peak / 2 ** 20:.1f} MiB")
+
+    checks = {"entity": check_entity, "exists": check_exists, "registry": check_registry}
+    results = {name: [await check(qq_id) for qq_id in queries[:1000]] for name, check in checks.items()}
+    if not results["entity"] == results["exists"] == results["registry"]:
+        print("results differ")
+        return 1
+
+    for name, check in checks.items():
+        start = time.perf_counter()
+        for qq_id in queries:
+            await check(qq_id)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<10}{elapsed / len(queries) * 1e6:>10.1f} us/check")
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for ready in (False, True):
+                QQ_REGISTRY.ready = ready
+                recorder = Recorder()
+
+                async def task(i: int):
+                    await recorder.send(client, "GET", f"/api/signup/check_qq?qq_id={queries[i]}")
+
+                elapsed = await run_closed_loop(len(queries), args.concurrency, task)
+                stats = recorder.results(elapsed)["GET /api/signup/check_qq"]
+                print(
+                    f"  HTTP registry={'on ' if ready else 'off'}{stats['throughput']:>10.1f} req/s"
+                    f"   p50 {stats['p50_ms']:.2f} ms   p99 {stats['p99_ms']:.2f} ms"
+                )
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--registered", type=float, default=0.1, help="查询中已注册 QQ 号的比例")
+    parser.add_argument("--concurrency", type=int, default=16)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,146 @@
+"""日志开销基准测试
+
+模拟每个请求产生的日志: 一条 uvicorn 访问日志(经标准 logging 转发到 loguru)与一条认证失败日志
+(无效 token 刷接口时每个请求都会产生), 统计不同配置下每个请求在调用方的日志耗时,
+以及之后等待后台队列写完的时间. 控制台输出写入临时文件, 或以 `--console pipe` 写入管道,
+由另一个进程读取(与容器日志采集相同).
+
+- before: 改动前的配置, 控制台同步写出, 文件经 loguru 的 `enqueue=True` 写出, 转发访问日志时查找调用方栈帧.
+- loguru-enqueue: 控制台与文件均使用 loguru 的 `enqueue=True`, 作为对比.
+- text-sync: 文本格式, `LOG_ENQUEUE=false`.
+- text: 文本格式, 经后台队列写出(默认配置).
+- json: JSON 格式, 经后台队列写出.
+- json-sampled: JSON 格式, 访问日志采样 10%, 认证失败日志每秒最多 10 条.
+
+用法(在 backend 目录下):
+    python -m bench.bench_logging --requests 20000
+    python -m bench.bench_logging --requests 20000 --console pipe
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import subprocess
+import sys
+import time
+
+from loguru import logger
+
+from app.core import logger as app_logger
+from app.core.config import CONFIG
+from app.core.logger import InterceptHandler, LogThrottle, configure_logging
+
+from . import TMP_DIR
+
+ACCESS_FORMAT = '%s - "%s %s HTTP/%s" %d'
+
+# 未采样, 不限制频率的配置
+UNSAMPLED = {"LOG_ACCESS_SAMPLE_RATE": 1.0, "LOG_AUTH_FAILURE_RATE_LIMIT": 0}
+
+# 名称 -> 配置; None 表示不使用 `configure_logging`, 见 `configure_loguru`
+VARIANTS = {
+    "before": None,
+    "loguru-enqueue": None,
+    "text-sync": {**UNSAMPLED, "LOG_FORMAT": "text", "LOG_ENQUEUE": False},
+    "text": {**UNSAMPLED, "LOG_FORMAT": "text", "LOG_ENQUEUE": True},
+    "json": {**UNSAMPLED, "LOG_FORMAT": "json", "LOG_ENQUEUE": True},
+    "json-sampled": {
+        "LOG_FORMAT": "json", "LOG_ENQUEUE": True,
+        "LOG_ACCESS_SAMPLE_RATE": 0.1, "LOG_AUTH_FAILURE_RATE_LIMIT": 10,
+    },
+}
+
+
+def configure_loguru(console_enqueue: bool):
+    """改动前 `configure_logging` 的输出配置, 可选控制台也使用 loguru 的 `enqueue=True`"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<level>{level: <4}</level> | <cyan>{time:HH:mm:ss.SSS}</cyan> | <level>{message}</level>",
+        level="INFO",
+        colorize=True,
+        enqueue=console_enqueue,
+    )
+    logger.add(
+        app_logger.LOG_PATH / "loguru_{time:YYYY-MM-DD}.log",
+        encoding="utf-8",
+        enqueue=True,
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <4} | {message}",
+        level="INFO",
+    )
+    logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+    access_logger = logging.getLogger("uvicorn.access")
+    access_logger.handlers = [InterceptHandler(walk_frames=True)]
+    access_logger.filters = []
+    access_logger.propagate = False
+
+
+def complete():
+    """等待所有 sink 写完"""
+    async def _complete():
+        await logger.complete()
+
+    asyncio.run(_complete())
+
+
+def run(requests: int, auth_failure_log: LogThrottle) -> float:
+    access_logger = logging.getLogger("uvicorn.access")
+    start = time.perf_counter()
+    for i in range(requests):
+        auth_failure_log.log("INFO", "认证失败: 用户不存在")
+        access_logger.info(ACCESS_FORMAT, "127.0.0.1:50000", "GET", "/api/profile", "1.1", 401)
+    return time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def open_console(kind: str):
+    if kind == "file":
+        with open(TMP_DIR / "console.log", "w", encoding="utf-8") as console:
+            yield console
+        return
+
+    reader = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    with io.TextIOWrapper(reader.stdin, encoding="utf-8") as console:
+        yield console
+    reader.wait()
+
+
+def main(args):
+    results = []
+    with open_console(args.console) as console:
+        for name, overrides in VARIANTS.items():
+            with contextlib.redirect_stdout(console):
+                if overrides is None:
+                    configure_loguru(console_enqueue=name == "loguru-enqueue")
+                    auth_failure_log = LogThrottle(0)
+                else:
+                    for key, value in overrides.items():
+                        setattr(CONFIG, key, value)
+                    configure_logging(force=True)
+                    auth_failure_log = LogThrottle(CONFIG.LOG_AUTH_FAILURE_RATE_LIMIT)
+
+            run(min(1000, args.requests), auth_failure_log)
+            complete()
+
+            elapsed = run(args.requests, auth_failure_log)
+            start = time.perf_counter()
+            complete()
+            drain = time.perf_counter() - start
+            results.append((name, elapsed, drain))
+        logger.remove()
+
+    print(f"requests: {args.requests}, 2 log events per request, console: {args.console}")
+    for name, elapsed, drain in results:
+        print(
+            f"  {name:<14}{elapsed / args.requests * 1e6:>8.1f} us/request in caller"
+            f"   drain {drain * 1000:>7.0f} ms"
+            f"   total {(elapsed + drain) / args.requests * 1e6:>8.1f} us/request"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--console", choices=["file", "pipe"], default="file")
+    main(parser.parse_args())
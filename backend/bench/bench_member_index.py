@@ -0,0 +1,146 @@
+"""内存成员索引基准测试
+
+生成随机搜索条件, 分别经 SQL 路径与 `MemberIndex` 执行 `search_handler`,
+先逐条比对两者结果(含敏感信息屏蔽), 再比较耗时; 另检查全量重建期间的增量更新不会丢失.
+结果不一致时以非零状态退出.
+
+用法(在 backend 目录下):
+    python -m bench.bench_member_index --users 20000 --queries 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.handler.member import search_handler
+from app.model import College, User, UserLevel
+from app.schema.member import SearchRequest
+from app.search import MEMBER_INDEX, init_search_backend
+
+from .seed import DEPARTMENT_NAMES, QQ_ID_BASE, generate_users, seed_database
+
+
+async def check_reload_keeps_upserts(user: dict) -> bool:
+    """全量重建读取数据库之后, 重建之前修改的成员(如修改个人信息)不应被旧数据覆盖"""
+    fetch = MEMBER_INDEX._fetch
+    changed = User(**{**user, "nickname": "reload-check"})
+
+    async def fetch_then_update():
+        result = await fetch()
+        MEMBER_INDEX.upsert(changed)
+        return result
+
+    MEMBER_INDEX._fetch = fetch_then_update
+    try:
+        await MEMBER_INDEX.load()
+    finally:
+        MEMBER_INDEX._fetch = fetch
+
+    request = SearchRequest.model_validate({
+        "colleges": None, "departments": None, "levels": None, "globalQuery": "reload-check",
+    })
+    _, total, _ = MEMBER_INDEX.search(request, False)
+    print(f"reload keeps concurrent upserts: {'ok' if total == 1 else 'FAILED'}")
+    return total == 1
+
+
+def random_request(rng: random.Random, users: list[dict]) -> dict:
+    body = {"colleges": None, "departments": None, "levels": None}
+
+    if rng.random() < 0.6:
+        user = rng.choice(users)
+        source = rng.choice(["qq_id", "nickname", "mc_name", "real_name", "student_id", "college_name", "major"])
+        value = str(user[source] or user["nickname"])
+        length = rng.randint(1, min(len(value), 6))
+        start = rng.randint(0, len(value) - length)
+        query = value[start:start + length]
+        body["globalQuery"] = query.upper() if rng.random() < 0.2 else query
+    if rng.random() < 0.3:
+        body["colleges"] = [college.name for college in rng.sample(list(College), rng.randint(1, 4))]
+    if rng.random() < 0.3:
+        body["departments"] = [f"D{rng.randint(1, len(DEPARTMENT_NAMES)):02d}" for _ in range(rng.randint(1, 2))]
+    if rng.random() < 0.3:
+        body["levels"] = [level.name for level in rng.sample(list(UserLevel), rng.randint(1, 2))]
+    if rng.random() < 0.2:
+        start = datetime(2023, 9, 1, tzinfo=timezone.utc) + timedelta(days=rng.randint(0, 900))
+        body["createAtStart"] = start.isoformat()
+        body["createAtEnd"] = (start + timedelta(days=rng.randint(1, 200))).isoformat()
+
+    body["pageSize"] = rng.choice([5, 20, 100])
+    body["pageIndex"] = rng.randint(1, 3)
+    return body
+
+
+async def run(request: SearchRequest, viewer: User, use_index: bool):
+    MEMBER_INDEX.ready = use_index
+    return await search_handler(request, viewer)
+
+
+async def main(user_count: int, query_count: int, seed: int):
+    await seed_database(user_count, seed=seed)
+    await init_search_backend()
+    await MEMBER_INDEX.load()
+
+    rng = random.Random(seed)
+    users = generate_users(user_count, seed)
+    requests = [SearchRequest.model_validate(random_request(rng, users)) for _ in range(query_count)]
+    viewers = [User(level=UserLevel.MEMBER), User(level=UserLevel.ADMIN)]
+
+    # 结果比对
+    mismatches = 0
+    for request in requests:
+        for viewer in viewers:
+            expected = json.loads((await run(request, viewer, use_index=False)).body)
+            actual = json.loads((await run(request, viewer, use_index=True)).body)
+            # 部门顺序在 SQL 路径中不确定
+            for result in (expected, actual):
+                for member in result["members"]:
+                    member["departments"].sort(key=lambda department: department["code"])
+            if expected != actual:
+                mismatches += 1
+                print(f"结果不一致: {request.model_dump(exclude_none=True)} level={viewer.level.name}")
+
+    # 单独验证游标分页
+    request = SearchRequest.model_validate({"colleges": None, "departments": None, "levels": None, "pageSize": 50})
+    cursor_request = request.model_copy(update={"cursor": None})
+    for _ in range(3):
+        expected = json.loads((await run(cursor_request, viewers[1], use_index=False)).body)
+        actual = json.loads((await run(cursor_request, viewers[1], use_index=True)).body)
+        for result in (expected, actual):
+            for member in result["members"]:
+                member["departments"].sort(key=lambda department: department["code"])
+        if expected != actual:
+            mismatches += 1
+            print(f"游标分页结果不一致: cursor={cursor_request.cursor}")
+        cursor_request = request.model_copy(update={"cursor": expected["nextCursor"]})
+
+    if not await check_reload_keeps_upserts(users[0]):
+        mismatches += 1
+
+    print(f"users:       {user_count} (qq {QQ_ID_BASE}..{QQ_ID_BASE + user_count - 1})")
+    print(f"queries:     {len(requests) * len(viewers)}")
+    print(f"mismatches:  {mismatches}")
+
+    # 耗时比较
+    for use_index in (False, True):
+        start = time.perf_counter()
+        for request in requests:
+            for viewer in viewers:
+                await run(request, viewer, use_index)
+        elapsed = time.perf_counter() - start
+        label = "index" if use_index else "sql"
+        print(f"{label:<5} avg (ms): {elapsed / (len(requests) * len(viewers)) * 1000:.3f}")
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.users, args.queries, args.seed)) else 0)
@@ -0,0 +1,101 @@
+"""成员列表序列化微基准测试
+
+比较 `MemberInfo` / `MemberListResponse` + `jsonable_encoder` 的原路径
+与 `app.utils.member_json` 直接构建字典并序列化的快速路径, 行数分别为 10/100/1000.
+计时前先比对两者输出(含敏感信息屏蔽), 不一致时以非零状态退出.
+
+用法(在 backend 目录下):
+    python -m bench.bench_member_json
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import timezone
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.schema.member import MemberInfo, MemberListResponse
+from app.schema.profile import DepartmentInfo
+from app.utils.member_json import member_dict, member_list_response
+
+from .seed import DEPARTMENT_NAMES, generate_users
+
+DEPARTMENTS = [{"name": name, "code": f"D{i + 1:02d}"} for i, name in enumerate(DEPARTMENT_NAMES)]
+
+
+def pydantic_path(users: list[dict], sensitive: bool) -> bytes:
+    members = []
+    for user in users:
+        members.append(MemberInfo(
+            qq_id=user["qq_id"],
+            mc_name=user["mc_name"],
+            nickname=user["nickname"],
+            create_at=user["create_at"].replace(tzinfo=timezone.utc),
+            real_name=user["real_name"] if sensitive else "***",
+            student_id=user["student_id"] if sensitive else "***",
+            college_name=user["college_name"],
+            major=user["major"] if sensitive else None,
+            grade=user["grade"] if sensitive else None,
+            class_index=user["class_index"] if sensitive else None,
+            departments=[DepartmentInfo(**department) for department in user["departments"]],
+            level=user["level"].value,
+        ))
+    response = MemberListResponse(members=members, total=len(members), next_cursor="MTA")
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+def fast_path(users: list[dict], sensitive: bool) -> bytes:
+    members = [
+        member_dict(
+            qq_id=user["qq_id"],
+            mc_name=user["mc_name"],
+            nickname=user["nickname"],
+            create_at=user["create_at"],
+            real_name=user["real_name"],
+            student_id=user["student_id"],
+            college_name=user["college_name"],
+            major=user["major"],
+            grade=user["grade"],
+            class_index=user["class_index"],
+            departments=user["departments"],
+            level=user["level"].value,
+            sensitive_permission=sensitive,
+        )
+        for user in users
+    ]
+    return member_list_response(members, len(members), "MTA").body
+
+
+def main(sizes: list[int]) -> int:
+    users = generate_users(max(sizes))
+    for i, user in enumerate(users):
+        user["create_at"] = user["create_at"].replace(tzinfo=None, microsecond=(i * 7919) % 1000000 if i % 3 else 0)
+        user["departments"] = DEPARTMENTS[i % len(DEPARTMENTS):i % len(DEPARTMENTS) + i % 3]
+
+    mismatches = 0
+    for sensitive in (False, True):
+        expected = json.loads(pydantic_path(users, sensitive))
+        actual = json.loads(fast_path(users, sensitive))
+        if expected != actual:
+            mismatches += 1
+            print(f"序列化结果不一致: sensitive={sensitive}")
+
+    print(f"mismatches: {mismatches}")
+    print(f"{'rows':>6}{'pydantic (ms)':>16}{'fast (ms)':>12}{'speedup':>10}")
+    for size in sizes:
+        rows = users[:size]
+        number = max(1, 2000 // size)
+        slow = min(timeit.repeat(lambda: pydantic_path(rows, True), number=number, repeat=5)) / number
+        fast = min(timeit.repeat(lambda: fast_path(rows, True), number=number, repeat=5)) / number
+        print(f"{size:>6}{slow * 1000:>16.3f}{fast * 1000:>12.3f}{slow / fast:>9.1f}x")
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    sys.exit(1 if main(args.sizes) else 0)
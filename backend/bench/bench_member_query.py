@@ -0,0 +1,142 @@
+"""成员搜索查询基准测试
+
+在写入测试数据的数据库上, 比较加载完整 `User` 实体并 `subqueryload(User.departments)`
+(改动前的做法)与只查询所需列并在同一条语句中聚合部门的吞吐量(rows/s)与内存峰值.
+计时前先逐页比对两者结果, 不一致时以非零状态退出.
+
+用法(在 backend 目录下):
+    python -m bench.bench_member_query --users 50000 --page-size 1000
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import select
+from sqlalchemy.orm import subqueryload
+
+from app.core import database
+from app.core.database import async_session
+from app.handler.member import MEMBER_COLUMNS, departments_column, parse_departments
+from app.model import User
+from app.utils.member_json import member_dict
+
+from .seed import seed_database
+
+
+async def fetch_entities(offset: int, limit: int) -> list[dict]:
+    async with async_session() as db:
+        users = (
+            (await db.execute(
+                select(User)
+                .order_by(User.id.desc())
+                .offset(offset)
+                .limit(limit)
+                .options(subqueryload(User.departments))
+            ))
+            .scalars().all()
+        )
+        return [
+            member_dict(
+                qq_id=user.qq_id,
+                mc_name=user.mc_name,
+                nickname=user.nickname,
+                create_at=user.create_at,
+                real_name=user.real_name,
+                student_id=user.student_id,
+                college_name=user.college_name,
+                major=user.major,
+                grade=user.grade,
+                class_index=user.class_index,
+                departments=[{"name": department.name, "code": department.code} for department in user.departments],
+                level=user.level.value,
+                sensitive_permission=True,
+            )
+            for user in users
+        ]
+
+
+async def fetch_columns(offset: int, limit: int) -> list[dict]:
+    async with async_session() as db:
+        rows = (
+            await db.execute(
+                select(*MEMBER_COLUMNS, departments_column(database.engine.dialect.name))
+                .order_by(User.id.desc())
+                .offset(offset)
+                .limit(limit)
+            )
+        ).all()
+        return [
+            member_dict(
+                qq_id=row.qq_id,
+                mc_name=row.mc_name,
+                nickname=row.nickname,
+                create_at=row.create_at,
+                real_name=row.real_name,
+                student_id=row.student_id,
+                college_name=row.college_name,
+                major=row.major,
+                grade=row.grade,
+                class_index=row.class_index,
+                departments=parse_departments(row.departments),
+                level=row.level.value,
+                sensitive_permission=True,
+            )
+            for row in rows
+        ]
+
+
+def normalize(members: list[dict]) -> list[dict]:
+    for member in members:
+        member["departments"].sort(key=lambda department: department["code"])
+    return members
+
+
+async def scan(fetch, user_count: int, page_size: int) -> float:
+    """按页读取全部成员, 返回耗时"""
+    start = time.perf_counter()
+    for offset in range(0, user_count, page_size):
+        await fetch(offset, page_size)
+    return time.perf_counter() - start
+
+
+async def peak_memory(fetch, page_size: int) -> int:
+    """读取一页时的内存峰值, 单独测量以免 tracemalloc 影响计时"""
+    tracemalloc.start()
+    await fetch(0, page_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+async def main(user_count: int, page_size: int, seed: int):
+    await seed_database(user_count, seed=seed)
+
+    mismatches = 0
+    for offset in range(0, user_count, max(page_size, user_count // 10)):
+        expected = normalize(await fetch_entities(offset, page_size))
+        actual = normalize(await fetch_columns(offset, page_size))
+        if expected != actual:
+            mismatches += 1
+            print(f"结果不一致: offset={offset}")
+
+    print(f"users: {user_count}, page size: {page_size}, mismatches: {mismatches}")
+    print(f"{'mode':<10}{'rows/s':>12}{'page peak (MiB)':>18}")
+    for name, fetch in (("entities", fetch_entities), ("columns", fetch_columns)):
+        # 预热连接池与语句缓存
+        await fetch(0, page_size)
+        elapsed = await scan(fetch, user_count, page_size)
+        peak = await peak_memory(fetch, page_size)
+        print(f"{name:<10}{user_count / elapsed:>12.0f}{peak / 1024 / 1024:>18.2f}")
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.users, args.page_size, args.seed)) else 0)
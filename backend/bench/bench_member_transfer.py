@@ -0,0 +1,144 @@
+"""成员批量导出与导入基准测试
+
+在写入测试数据的数据库上以管理员身份:
+
+1. 分别以 CSV 与 NDJSON 导出全部成员, 统计耗时, 吞吐量(rows/s)与内存峰值.
+   直接调用 ASGI 应用并丢弃响应体, 内存峰值只反映服务端; 另以 1/10 的成员数对比, 峰值应基本不变.
+2. 将导出的 CSV 原样导入(全部为已有成员, 不含密码, 只更新信息).
+3. 导入含密码的新成员, 统计批量计算密码哈希后的吞吐量.
+
+用法(在 backend 目录下):
+    python -m bench.bench_member_transfer --users 100000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+import tracemalloc
+
+import httpx
+
+from app import create_app
+
+from .seed import PASSWORD, QQ_ID_BASE, generate_users, seed_database
+
+ALL_MEMBERS = {"colleges": None, "departments": None, "levels": None}
+
+
+async def export(app, token: str, export_format: str, body: dict, keep: bool = False) -> tuple[int, int, bytes]:
+    """直接调用 ASGI 应用导出, 返回行数, 字节数与(可选的)响应体"""
+    payload = json.dumps(body).encode()
+    received = False
+    lines = size = 0
+    chunks = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal lines, size
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            lines += chunk.count(b"\n")
+            size += len(chunk)
+            if keep:
+                chunks.append(chunk)
+
+    await app({
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/member/export",
+        "raw_path": b"/api/member/export",
+        "query_string": f"format={export_format}".encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"cookie", f"token={token}".encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }, receive, send)
+
+    # CSV 首行为列名
+    rows = lines - 1 if export_format == "csv" else lines
+    return rows, size, b"".join(chunks)
+
+
+async def measure_export(app, token: str, export_format: str, body: dict):
+    start = time.perf_counter()
+    rows, size, _ = await export(app, token, export_format, body)
+    elapsed = time.perf_counter() - start
+
+    # 单独测量内存, 避免 tracemalloc 影响计时
+    tracemalloc.start()
+    await export(app, token, export_format, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"  export {export_format:<7}{rows:>8} rows{size / 2 ** 20:>9.1f} MiB{elapsed:>8.2f} s"
+        f"{rows / elapsed:>10.0f} rows/s   peak {peak / 2 ** 20:.1f} MiB"
+    )
+
+
+async def measure_import(client: httpx.AsyncClient, name: str, content: bytes):
+    start = time.perf_counter()
+    response = await client.post("/api/member/import", content=content, headers={"Content-Type": "text/csv"})
+    elapsed = time.perf_counter() - start
+    report = response.json()
+    rows = report["inserted"] + report["updated"]
+    print(
+        f"  import {name:<14}{rows:>8} rows{elapsed:>8.2f} s{rows / elapsed:>10.0f} rows/s"
+        f"   inserted {report['inserted']}, updated {report['updated']}, errors {len(report['errors'])}"
+    )
+
+
+def new_members_csv(count: int, base: int) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["QQID", "nickname", "password", "MCName", "realName", "studentID", "collegeName"])
+    for i in range(count):
+        writer.writerow([base + i, f"import{i}", PASSWORD, f"Import_{i}", "导入", f"2098{i:08d}", "SM"])
+    return buffer.getvalue().encode()
+
+
+async def main(args):
+    await seed_database(args.users)
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            admin = next(user for user in generate_users(args.users) if user["level"].name == "ADMIN")
+            response = await client.post("/api/login", json={"QQID": admin["qq_id"], "password": PASSWORD})
+            token = response.cookies["token"]
+            client.cookies.set("token", token)
+
+            print(f"users: {args.users}")
+            for export_format in ("csv", "ndjson"):
+                await measure_export(app, token, export_format, ALL_MEMBERS)
+            # 约 1/10 的成员, 对比内存峰值
+            await measure_export(app, token, "csv", {**ALL_MEMBERS, "colleges": ["SM", "CCSEE", "SOL"]})
+
+            _, _, exported = await export(app, token, "csv", ALL_MEMBERS, keep=True)
+            await measure_import(client, "existing", exported)
+            await measure_import(client, "new+password", new_members_csv(args.new, QQ_ID_BASE + args.users))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--new", type=int, default=32, help="导入的含密码新成员数")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+"""登录风暴下的事件循环延迟基准测试
+
+模拟 N 个并发登录同时验证密码, 期间以固定间隔探测事件循环的调度延迟.
+分别测试在协程内同步计算(改动前的做法)与 `verify_password` 提交到执行池两种方式.
+
+用法(在 backend 目录下):
+    python -m bench.bench_password --logins 32
+"""
+import argparse
+import asyncio
+import time
+
+from werkzeug.security import check_password_hash
+
+from app.core.security import PASSWORD_HASHER, hash_password, verify_password
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def login_inline(password_hash: str):
+    await asyncio.sleep(0)
+    return check_password_hash(password_hash, "password")
+
+
+async def login_pooled(password_hash: str):
+    return await verify_password(password_hash, "password")
+
+
+async def storm(login, password_hash: str, logins: int) -> dict:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login(password_hash) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await prober
+    lags.sort()
+    return {
+        "elapsed": elapsed,
+        "p50": lags[len(lags) // 2],
+        "p99": lags[min(len(lags) - 1, int(len(lags) * 0.99))],
+        "max": lags[-1],
+    }
+
+
+async def main(logins: int):
+    password_hash = await hash_password("password")
+
+    print(f"logins: {logins}, executor: {PASSWORD_HASHER.executor_type} x{PASSWORD_HASHER.workers}")
+    print(f"{'mode':<8}{'total (s)':>12}{'lag p50 (ms)':>16}{'lag p99 (ms)':>16}{'lag max (ms)':>16}")
+    for name, login in (("inline", login_inline), ("pooled", login_pooled)):
+        result = await storm(login, password_hash, logins)
+        print(
+            f"{name:<8}{result['elapsed']:>12.2f}"
+            f"{result['p50'] * 1000:>16.2f}{result['p99'] * 1000:>16.2f}{result['max'] * 1000:>16.2f}"
+        )
+    print(f"max queue depth: {PASSWORD_HASHER.max_waiting}")
+    PASSWORD_HASHER.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -0,0 +1,154 @@
+"""成员搜索请求合并基准测试
+
+向数据库写入测试数据后, 在进程内通过 httpx 的 ASGI transport 模拟活动期间大量成员同时打开成员页:
+每一轮同时发出 `--burst` 个相同的搜索请求(普通成员与管理员各占一半), 共 `--rounds` 轮,
+各轮依次使用 `--distinct` 组随机生成的搜索条件(成员页的默认视图等会被反复打开).
+比较以下配置的吞吐量, 延迟与每个请求执行的 SQL 语句数(含认证时读取用户的一条):
+
+- off: 改动前的做法, 每个请求各自查询(`SEARCH_SINGLE_FLIGHT=false`).
+- single-flight: 相同的并发请求共享一次查询.
+- cached: 同时缓存结果 5 秒(`SEARCH_RESULT_CACHE_TTL=5`).
+
+各配置的响应须与 off 逐条一致(含敏感信息屏蔽); 之后检查修改个人信息后缓存的结果立即失效.
+检查不通过时以非零状态退出.
+
+用法(在 backend 目录下):
+    python -m bench.bench_search_coalescing --users 20000 --rounds 50 --burst 32 --distinct 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+
+import httpx
+
+from app import create_app
+from app.core.config import CONFIG
+from app.handler import member
+from app.utils.single_flight import SingleFlight
+
+from .bench_api import Recorder, login, summarize
+from .bench_member_index import random_request
+from .harness import StatementCounter
+from .seed import generate_users, seed_database
+
+# 名称 -> (SEARCH_SINGLE_FLIGHT, SEARCH_RESULT_CACHE_TTL)
+VARIANTS = {
+    "off": (False, 0),
+    "single-flight": (True, 0),
+    "cached": (True, 5),
+}
+
+
+def configure(single_flight: bool, ttl: float):
+    CONFIG.SEARCH_SINGLE_FLIGHT = single_flight
+    member.SEARCH_FLIGHT = SingleFlight(ttl=ttl)
+
+
+async def run_bursts(client: httpx.AsyncClient, tokens: list[str], bodies: list[dict], burst: int):
+    """逐轮发出相同的并发搜索, 返回记录器, 总耗时与各响应体"""
+    recorder = Recorder()
+    responses = []
+
+    async def search(body: dict, i: int) -> tuple[int, bytes]:
+        response = await recorder.send(
+            client, "POST", "/api/member/search",
+            json=body, headers={"Cookie": f"token={tokens[i % 2]}"},
+        )
+        return i % 2, response.content
+
+    start = time.perf_counter()
+    for body in bodies:
+        responses.append(await asyncio.gather(*(search(body, i) for i in range(burst))))
+    return recorder, time.perf_counter() - start, responses
+
+
+async def check_invalidation(client: httpx.AsyncClient, token: str) -> bool:
+    """缓存结果后修改昵称, 再次搜索应能搜到"""
+    configure(True, 60)
+    body = {"colleges": None, "departments": None, "levels": None, "globalQuery": "coalesce-check"}
+    headers = {"Cookie": f"token={token}"}
+
+    before = (await client.post("/api/member/search", json=body, headers=headers)).json()["total"]
+    await client.put("/api/profile/update", json={"nickname": "coalesce-check"}, headers=headers)
+    after = (await client.post("/api/member/search", json=body, headers=headers)).json()["total"]
+
+    ok = before == 0 and after == 1
+    print(f"invalidation: total {before} -> {after} after profile update  {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+async def main(args) -> int:
+    # 应用的日志配置会接管 httpx 的请求日志, 压测时关闭
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await seed_database(args.users)
+    users = generate_users(args.users)
+    rng = random.Random(args.seed)
+    distinct = [random_request(rng, users) for _ in range(args.distinct)]
+    bodies = [distinct[i % args.distinct] for i in range(args.rounds)]
+
+    counter = StatementCounter()
+
+    failures = 0
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        limits = httpx.Limits(max_connections=None)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+            tokens = [
+                await login(Recorder(), client, next(u["qq_id"] for u in users if u["level"].name == level))
+                for level in ("MEMBER", "ADMIN")
+            ]
+
+            print(f"users: {args.users}, rounds: {args.rounds}, {args.burst} identical searches per round")
+            expected = None
+            for name, (single_flight, ttl) in VARIANTS.items():
+                configure(single_flight, ttl)
+                # 预热, 并清空总数缓存, 各配置从相同状态开始
+                await run_bursts(client, tokens, bodies[:2], 2)
+                member.invalidate_member_search()
+
+                counter.count = 0
+                recorder, elapsed, responses = await run_bursts(client, tokens, bodies, args.burst)
+                statements = counter.count
+                stats = summarize(
+                    recorder.latencies["POST /api/member/search"],
+                    recorder.errors["POST /api/member/search"],
+                    elapsed,
+                )
+
+                # 与 off 的响应逐条比对
+                bodies_by_tier = [{tier: json.loads(content) for tier, content in burst} for burst in responses]
+                consistent = all(len({content for _, content in burst}) <= 2 for burst in responses)
+                if expected is None:
+                    expected = bodies_by_tier
+                elif bodies_by_tier != expected:
+                    consistent = False
+                if not consistent or stats["errors"]:
+                    failures += 1
+
+                print(
+                    f"  {name:<15}{stats['throughput']:>9.1f} req/s"
+                    f"   p50 {stats['p50_ms']:>8.2f} ms   p99 {stats['p99_ms']:>8.2f} ms"
+                    f"   {statements / stats['requests']:>6.3f} SQL/request"
+                    f"   shared {member.SEARCH_FLIGHT.shared:>5}   cache hits {member.SEARCH_FLIGHT.cache_hits:>5}"
+                    f"   {'ok' if consistent and not stats['errors'] else 'FAILED'}"
+                )
+
+            if not await check_invalidation(client, tokens[0]):
+                failures += 1
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=10, help="不同搜索条件的组数")
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,77 @@
+"""登录 token 认证基准测试
+
+在进程内通过 httpx 的 ASGI transport 并发请求 `/api/profile`, 比较以下 token 的吞吐量
+与每个请求在认证中执行的 SQL 语句数:
+
+- forged: 随机伪造的 token(无效 token 刷接口), 签名校验失败, 不访问数据库.
+- cached: 有效 token, 命中会话缓存.
+- uncached: 有效 token, 每个请求前清空会话缓存(多进程部署或缓存过期), 按主键查询会话.
+
+响应状态与预期不符时以非零状态退出. token 的伪造, 注销与过期检查见 `bench.check_security`.
+
+用法(在 backend 目录下):
+    python -m bench.bench_session_token --requests 5000 --concurrency 16
+"""
+import argparse
+import asyncio
+import logging
+import secrets
+import sys
+
+from app.utils.session_cache import SESSION_CACHE
+
+from .bench_api import Recorder, run_closed_loop
+from .harness import StatementCounter, app_client, login
+from .seed import seed_database
+
+
+async def main(args) -> int:
+    # 应用的日志配置会接管 httpx 的请求日志, 压测时关闭
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await seed_database(args.users)
+
+    counter = StatementCounter()
+    async with app_client() as client:
+        token = await login(client)
+        forged = [secrets.token_hex(32) for _ in range(args.requests)]
+        scenarios = {
+            "forged": (lambda i: forged[i], False, 401),
+            "cached": (lambda i: token, False, 200),
+            "uncached": (lambda i: token, True, 200),
+        }
+
+        print(f"requests: {args.requests}, concurrency: {args.concurrency}")
+        failures = 0
+        for name, (get_token, clear_cache, expected) in scenarios.items():
+            recorder = Recorder()
+            unexpected = 0
+
+            async def task(i: int):
+                nonlocal unexpected
+                if clear_cache:
+                    SESSION_CACHE._sessions.clear()
+                response = await recorder.send(
+                    client, "GET", "/api/profile", headers={"Cookie": f"token={get_token(i)}"},
+                )
+                unexpected += response.status_code != expected
+
+            counter.count = 0
+            elapsed = await run_closed_loop(args.requests, args.concurrency, task)
+            stats = recorder.results(elapsed)["GET /api/profile"]
+            failures += unexpected > 0
+            print(
+                f"  {name:<10}{stats['throughput']:>10.1f} req/s"
+                f"   p50 {stats['p50_ms']:>7.2f} ms   p99 {stats['p99_ms']:>7.2f} ms"
+                f"   {counter.count / args.requests:>5.2f} SQL/request"
+                f"   {'ok' if not unexpected else f'{unexpected} unexpected status'}"
+            )
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    sys.exit(asyncio.run(main(parser.parse_args())))
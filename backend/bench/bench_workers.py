@@ -0,0 +1,165 @@
+"""多进程部署基准测试
+
+向数据库写入测试数据后, 以 `python -m app.server` 启动真实的服务进程(含端口监听与工作进程),
+分别以 1/2/4/8 个工作进程对成员搜索接口施加相同的并发负载, 比较吞吐量与延迟.
+压测客户端与服务在同一主机上运行, 工作进程数超过空闲 CPU 核数后吞吐量不再增长.
+
+最后检查平滑关闭: 发出一个耗时较长的登录请求后立即向主进程发送 SIGTERM,
+该请求应正常完成, 主进程应在超时前退出且退出码为 0.
+
+用法(在 backend 目录下):
+    python -m bench.bench_workers --users 10000
+    python -m bench.bench_workers --users 10000 --workers 1 2 4 8 --reuse-port
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+from .bench_api import Recorder, login, run_closed_loop
+from .bench_member_index import random_request
+from .seed import PASSWORD, QQ_ID_BASE, generate_users, seed_database
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerProcess:
+    """以子进程运行服务, 等待所有工作进程启动完成"""
+
+    def __init__(self, workers: int, reuse_port: bool):
+        self.workers = workers
+        self.port = free_port()
+        self.started = threading.Semaphore(0)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "app.server"],
+            env={
+                **os.environ,
+                "HOST": "127.0.0.1",
+                "PORT": str(self.port),
+                "WORKERS": str(workers),
+                "REUSE_PORT": str(reuse_port).lower(),
+            },
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        # 持续读取输出, 避免管道写满阻塞服务进程
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        for line in self.process.stdout:
+            if b"Application startup complete" in line:
+                self.started.release()
+
+    def wait_started(self, timeout: float = 120):
+        deadline = time.monotonic() + timeout
+        for _ in range(self.workers):
+            if not self.started.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                self.stop()
+                raise RuntimeError("服务启动超时")
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self, timeout: float = 60) -> int:
+        self.process.send_signal(signal.SIGTERM)
+        return self.process.wait(timeout=timeout)
+
+
+async def measure_search(server: ServerProcess, args, users: list[dict]) -> dict:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=server.base_url, limits=limits, timeout=None) as client:
+        tokens = [
+            await login(Recorder(), client, next(u["qq_id"] for u in users if u["level"].name == level))
+            for level in ("MEMBER", "ADMIN")
+        ]
+        bodies = [random_request(rng, users) for _ in range(args.searches)]
+
+        # 预热: 建立连接并让每个工作进程都处理过请求
+        await run_closed_loop(args.concurrency * 4, args.concurrency, lambda i: client.post(
+            "/api/member/search", json=bodies[i], headers={"Cookie": f"token={tokens[i % 2]}"},
+        ))
+
+        recorder = Recorder()
+
+        async def task(i: int):
+            await recorder.send(
+                client, "POST", "/api/member/search",
+                json=bodies[i], headers={"Cookie": f"token={tokens[i % 2]}"},
+            )
+
+        elapsed = await run_closed_loop(args.searches, args.concurrency, task)
+    return recorder.results(elapsed)["POST /api/member/search"]
+
+
+async def check_graceful_shutdown(args) -> bool:
+    server = ServerProcess(2, args.reuse_port)
+    server.wait_started()
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=None) as client:
+        # 先建立连接, 确保发送信号时登录请求已被工作进程接收
+        await client.get("/")
+        request = asyncio.create_task(client.post("/api/login", json={"QQID": QQ_ID_BASE, "password": PASSWORD}))
+        # 等待请求进入服务端的密码校验
+        await asyncio.sleep(0.3)
+        start = time.perf_counter()
+        server.process.send_signal(signal.SIGTERM)
+        response = await request
+    code = await asyncio.to_thread(server.process.wait, 60)
+    elapsed = time.perf_counter() - start
+
+    ok = response.status_code == 200 and code == 0
+    print(
+        f"graceful shutdown: in-flight login {response.status_code}, exit code {code}, "
+        f"stopped in {elapsed:.2f} s  {'ok' if ok else 'FAILED'}"
+    )
+    return ok
+
+
+async def main(args) -> int:
+    # 应用的日志配置会接管 httpx 的请求日志, 压测时关闭
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await seed_database(args.users)
+    users = generate_users(args.users)
+
+    print(f"users: {args.users}, cpus: {os.cpu_count()}, concurrency: {args.concurrency}, "
+          f"binding: {'SO_REUSEPORT' if args.reuse_port else 'shared socket'}")
+    baseline = None
+    for workers in args.workers:
+        server = ServerProcess(workers, args.reuse_port)
+        try:
+            server.wait_started()
+            stats = await measure_search(server, args, users)
+        finally:
+            server.stop()
+        baseline = baseline or stats["throughput"]
+        print(
+            f"  workers {workers:<3}{stats['throughput']:>10.1f} req/s  x{stats['throughput'] / baseline:<6.2f}"
+            f"p50 {stats['p50_ms']:>8.2f} ms   p99 {stats['p99_ms']:>8.2f} ms   errors {stats['errors']}"
+        )
+
+    return 0 if await check_graceful_shutdown(args) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--searches", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reuse-port", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,112 @@
+"""各接口的提交次数检查
+
+在进程内运行应用, 依次请求各接口, 统计每个请求在所有引擎(读引擎, 写引擎, 只读副本)上
+产生的 COMMIT 次数: 只读取数据的接口不应提交, 修改数据的接口只有一次写事务.
+写接口提交时会话同时提交本事务中用过的读连接, 这类不含写入的空提交单独统计.
+任一接口与预期不符时以非零状态退出.
+
+用法(在 backend 目录下):
+    python -m bench.check_commits
+"""
+import os
+
+from . import TMP_DIR
+
+# 须在导入应用前设置, 避免最近登录时间的定期写回干扰计数
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{TMP_DIR / 'commits.db'}"
+os.environ["SESSION_FLUSH_INTERVAL"] = "3600"
+
+from sqlalchemy import event  # noqa: E402
+
+from .harness import Checks, app_client, engines, run  # noqa: E402
+from .seed import PASSWORD, QQ_ID_BASE, seed_database  # noqa: E402
+
+NEW_QQ_ID = QQ_ID_BASE + 100000
+
+
+def new_member() -> dict:
+    return {
+        "QQID": NEW_QQ_ID,
+        "nickname": "commits",
+        "password": PASSWORD,
+        "MCName": "Commits",
+        "realName": "提交",
+        "studentID": "209900000000",
+        "collegeName": "SM",
+        "major": None,
+        "grade": None,
+        "classIndex": None,
+    }
+
+
+# (名称, 方法, 路径, 请求参数, 预期写事务提交次数)
+REQUESTS = [
+    ("signup info", "GET", "/api/signup/info", {}, 0),
+    ("check qq", "GET", "/api/signup/check_qq", {"params": {"qq_id": NEW_QQ_ID}}, 0),
+    ("signup", "POST", "/api/signup", {"json": new_member()}, 1),
+    ("login", "POST", "/api/login", {"json": {"QQID": NEW_QQ_ID, "password": PASSWORD}}, 1),
+    ("profile", "GET", "/api/profile", {}, 0),
+    ("search info", "GET", "/api/member/info", {}, 0),
+    ("member search", "POST", "/api/member/search", {"json": {
+        "globalQuery": "commits", "colleges": None, "departments": None, "levels": None,
+    }}, 0),
+    ("profile update", "PUT", "/api/profile/update", {"json": {"nickname": "changed"}}, 1),
+    ("change password", "PUT", "/api/profile/change_password", {"json": {
+        "oldPassword": PASSWORD, "newPassword": PASSWORD + "!",
+    }}, 1),
+    ("logout", "GET", "/api/logout", {}, 1),
+]
+
+
+class CommitCounter:
+    """统计 COMMIT 次数, 区分执行过写语句的事务"""
+
+    def __init__(self):
+        self.writes = 0
+        self.total = 0
+
+    def reset(self):
+        self.writes = self.total = 0
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context.isinsert or context.isupdate or context.isdelete:
+            conn.info["wrote"] = True
+
+    def commit(self, conn):
+        self.total += 1
+        if conn.info.pop("wrote", False):
+            self.writes += 1
+
+    def rollback(self, conn):
+        conn.info.pop("wrote", None)
+
+
+async def main() -> int:
+    await seed_database(200)
+
+    counter = CommitCounter()
+    for sync_engine in engines():
+        event.listen(sync_engine, "before_cursor_execute", counter.before_cursor_execute)
+        event.listen(sync_engine, "commit", counter.commit)
+        event.listen(sync_engine, "rollback", counter.rollback)
+
+    checks = Checks()
+    async with app_client() as client:
+        for name, method, url, kwargs, expected in REQUESTS:
+            counter.reset()
+            response = await client.request(method, url, **kwargs)
+            if "token" in response.cookies:
+                client.cookies.set("token", response.cookies["token"])
+
+            # 只读接口不应有任何提交
+            checks.check(
+                name,
+                response.status_code < 400 and counter.writes == expected and (expected or counter.total == 0),
+                f"{response.status_code}, {counter.writes} write commit(s) of {counter.total}, expected {expected}",
+            )
+
+    return checks.exit_code
+
+
+if __name__ == "__main__":
+    run(main)
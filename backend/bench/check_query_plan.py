@@ -0,0 +1,100 @@
+"""成员搜索查询计划回归检查
+
+对每种筛选条件组合(学院 / 部门 / 等级 / 入库时间, 页码与游标两种分页)构建与
+`search_handler` 相同的搜索语句和总数语句, 执行 `EXPLAIN QUERY PLAN`(SQLite) 或
+`EXPLAIN`(PostgreSQL, 关闭顺序扫描以暴露缺失的索引). 出现全表扫描时打印查询计划并以非零状态退出.
+
+全局搜索由 `app.search` 的搜索后端负责, 不在此检查; 无任何筛选条件时全表扫描是预期行为, 同样跳过.
+
+用法(在 backend 目录下):
+    python -m bench.check_query_plan
+"""
+import argparse
+import asyncio
+import itertools
+import re
+import sys
+
+from sqlalchemy import and_, func, select
+
+from app.core import database
+from app.core.database import async_session
+from app.handler.member import build_search_filters, build_search_query, encode_cursor
+from app.model import User
+from app.schema.member import SearchRequest
+
+from .seed import seed_database
+
+# 每个筛选条件的请求参数
+FILTERS = {
+    "colleges": {"colleges": ["SM", "CFS"]},
+    "departments": {"departments": ["D01", "D02"]},
+    "levels": {"levels": ["ADMIN", "MINISTER"]},
+    "create_at": {"createAtStart": "2024-01-01T00:00:00Z", "createAtEnd": "2024-02-01T00:00:00Z"},
+}
+
+# 全表扫描的计划行
+FULL_SCAN = {
+    "sqlite": re.compile(r"^SCAN (users|user_department_association)\b"),
+    "postgresql": re.compile(r"Seq Scan on (users|user_department_association)\b"),
+}
+
+
+async def explain(db, statement) -> list[str]:
+    dialect_name = database.engine.dialect.name
+    sql = str(statement.compile(database.engine, compile_kwargs={"literal_binds": True}))
+    if dialect_name == "postgresql":
+        await db.exec_driver_sql("SET enable_seqscan = off")
+        rows = (await db.exec_driver_sql(f"EXPLAIN {sql}")).all()
+        return [row[0] for row in rows]
+    rows = (await db.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return [row[-1] for row in rows]
+
+
+async def main(user_count: int) -> int:
+    await seed_database(user_count)
+    pattern = FULL_SCAN.get(database.engine.dialect.name)
+    if pattern is None:
+        print(f"不支持的数据库: {database.engine.dialect.name}")
+        return 1
+
+    failures = 0
+    checked = 0
+    async with async_session() as db:
+        connection = await db.connection()
+        for size in range(1, len(FILTERS) + 1):
+            for names in itertools.combinations(FILTERS, size):
+                body = {"colleges": None, "departments": None, "levels": None, "pageSize": 20}
+                for name in names:
+                    body.update(FILTERS[name])
+                request = SearchRequest.model_validate(body)
+                filters = await build_search_filters(request, True, db)
+
+                statements = {
+                    "count": select(func.count()).select_from(User).where(and_(*filters)),
+                    "page": build_search_query(request, filters, None, database.engine.dialect.name),
+                    "cursor": build_search_query(
+                        request.model_copy(update={"cursor": encode_cursor(user_count // 2)}),
+                        filters,
+                        user_count // 2,
+                        database.engine.dialect.name,
+                    ),
+                }
+                for kind, statement in statements.items():
+                    checked += 1
+                    plan = await explain(connection, statement)
+                    if any(pattern.search(line.strip()) for line in plan):
+                        failures += 1
+                        print(f"全表扫描: {'+'.join(names)} ({kind})")
+                        for line in plan:
+                            print(f"    {line}")
+
+    print(f"dialect: {database.engine.dialect.name}, checked: {checked}, full scans: {failures}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.users)) else 0)
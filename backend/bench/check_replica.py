@@ -0,0 +1,114 @@
+"""只读副本路由检查
+
+以两个 SQLite 文件代替只读副本(由主库复制而来, 之后不再同步), 在进程内运行应用并验证:
+
+- 只读接口轮询使用各个副本;
+- 用户写入后 `READ_AFTER_WRITE_WINDOW` 秒内从主库读取, 之后恢复使用副本;
+- 副本不可用时被健康检查剔除, 全部不可用时回退到主库;
+- 连接池指标分别输出主库的读写引擎与各副本.
+
+为区分数据来源, 同一成员在主库与各副本中的昵称不同. 任一检查失败时以非零状态退出.
+
+用法(在 backend 目录下):
+    python -m bench.check_replica
+"""
+import asyncio
+import os
+import shutil
+import sqlite3
+
+from . import TMP_DIR
+
+# 须在导入应用前设置
+PRIMARY = TMP_DIR / "primary.db"
+REPLICAS = [TMP_DIR / "replica_a" / "replica.db", TMP_DIR / "replica_b" / "replica.db"]
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{PRIMARY}"
+os.environ["READ_DATABASE_URL"] = ",".join(f"sqlite+aiosqlite:///{path}" for path in REPLICAS)
+os.environ["READ_AFTER_WRITE_WINDOW"] = "1"
+os.environ["REPLICA_HEALTH_CHECK_INTERVAL"] = "3600"
+
+import httpx  # noqa: E402
+
+from app.core.database import READ_REPLICAS  # noqa: E402
+
+from .harness import Checks, app_client, login, run  # noqa: E402
+from .seed import QQ_ID_BASE, generate_users, seed_database  # noqa: E402
+
+# 用于区分数据来源的成员
+MARKED_ID = 2
+
+
+def copy_database(source, target, nickname: str):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+        dst.execute("UPDATE users SET nickname = ? WHERE id = ?", (nickname, MARKED_ID))
+
+
+async def search_marked(client: httpx.AsyncClient) -> str:
+    response = await client.post("/api/member/search", json={
+        "globalQuery": str(QQ_ID_BASE + MARKED_ID - 1),
+        "colleges": None, "departments": None, "levels": None,
+    })
+    members = [m for m in response.json()["members"] if m["QQID"] == QQ_ID_BASE + MARKED_ID - 1]
+    return members[0]["nickname"]
+
+
+async def main() -> int:
+    await seed_database(200)
+    with sqlite3.connect(PRIMARY) as db:
+        db.execute("UPDATE users SET nickname = 'primary' WHERE id = ?", (MARKED_ID,))
+    copy_database(PRIMARY, REPLICAS[0], "replica_a")
+    copy_database(PRIMARY, REPLICAS[1], "replica_b")
+
+    checks = Checks()
+    check = checks.expect
+
+    async with app_client() as client:
+        client.cookies.set("token", await login(client))
+        await asyncio.sleep(1.1)
+
+        # 轮询
+        sources = {await search_marked(client) for _ in range(4)}
+        check("round robin", sorted(sources), ["replica_a", "replica_b"])
+
+        # 读己之写
+        await client.put("/api/profile/update", json={"nickname": "changed"})
+        check("read your writes", (await client.get("/api/profile")).json()["nickname"], "changed")
+        await asyncio.sleep(1.1)
+        check(
+            "replica after window",
+            (await client.get("/api/profile")).json()["nickname"],
+            generate_users(1)[0]["nickname"],
+        )
+
+        # 连接池指标
+        metrics = (await client.get("/metrics")).text
+        check(
+            "pool metrics per engine",
+            sorted(line.split(" ")[0] for line in metrics.splitlines() if line.startswith("db_pool_size{")),
+            [
+                'db_pool_size{engine="read",database="primary"}',
+                'db_pool_size{engine="read",database="replica0"}',
+                'db_pool_size{engine="read",database="replica1"}',
+                'db_pool_size{engine="write",database="primary"}',
+            ],
+        )
+
+        # 副本故障
+        shutil.move(REPLICAS[1].parent, TMP_DIR / "replica_b_down")
+        await READ_REPLICAS.engines[1].dispose()
+        await READ_REPLICAS.check_health()
+        sources = {await search_marked(client) for _ in range(4)}
+        check("unhealthy replica skipped", sorted(sources), ["replica_a"])
+
+        shutil.move(REPLICAS[0].parent, TMP_DIR / "replica_a_down")
+        await READ_REPLICAS.engines[0].dispose()
+        await READ_REPLICAS.check_health()
+        check("fallback to primary", await search_marked(client), "primary")
+
+    return checks.exit_code
+
+
+if __name__ == "__main__":
+    run(main)
@@ -0,0 +1,287 @@
+"""认证与权限相关的行为检查
+
+在进程内运行应用, 通过接口验证:
+
+- token: 伪造, 篡改, 以其他密钥签名或超过最长有效期的 token 被拒绝;
+  注销只撤销当前会话, 撤销后即使会话缓存失效也不能再使用; 修改密码撤销其他会话;
+  注销的会话 ID 不会分配给新会话, 会话 ID 相同但 token 不符时即使命中缓存也被拒绝.
+- cursor: 非法的分页参数返回 422; 按游标翻页不重不漏, 最后一页与越过末尾的游标不返回下一页游标.
+- department: 部长添加部门成员时, 请求中包含普通成员以外的成员则整体拒绝(403), 不静默跳过.
+- rate limit: 检查 QQ 号按被检查的 QQ 号限流, 不只按 IP.
+- import: 导入成员不能修改已有成员的密码, 也不能修改级别不低于自己的成员; 超长的值逐行报告为错误;
+  新增与更新的行数按数据库实际写入的行统计, 同一 QQ 号重复的行报告为错误.
+
+任一检查失败时以非零状态退出.
+
+用法(在 backend 目录下):
+    python -m bench.check_security
+"""
+import csv
+import io
+import secrets
+from datetime import datetime, timezone
+
+import httpx
+
+from app.core.config import CONFIG
+from app.core.database import async_session
+from app.core.security import issue_session_token
+from app.handler.member import encode_cursor
+from app.handler.member_transfer import _member_values, _write_members
+from app.model import UserLevel
+from app.schema.member import MemberImportRow
+from app.utils.rate_limit import CHECK_QQ_TARGET_LIMITER
+from app.utils.session_cache import SESSION_CACHE
+
+from .harness import Checks, app_client, login, run
+from .seed import DEPARTMENT_NAMES, PASSWORD, generate_memberships, generate_users, seed_database
+
+
+async def auth_status(client: httpx.AsyncClient, token: str) -> tuple[int, str]:
+    response = await client.get("/api/profile", headers={"Cookie": f"token={token}"})
+    if response.status_code == 200:
+        return 200, ""
+    return response.status_code, response.json()["detail"]["code"]
+
+
+async def check_tokens(client: httpx.AsyncClient, checks: Checks):
+    first, second = await login(client), await login(client)
+    session_id, user_id, issued_at, rest = first.split(".", 3)
+
+    checks.expect("token: two sessions", [await auth_status(client, first), await auth_status(client, second)],
+                  [(200, ""), (200, "")])
+    checks.expect("token: forged", await auth_status(client, secrets.token_hex(32)), (401, "INVALID_TOKEN"))
+    checks.expect(
+        "token: tampered user id",
+        await auth_status(client, f"{session_id}.{int(user_id) + 1}.{issued_at}.{rest}"),
+        (401, "INVALID_TOKEN"),
+    )
+    checks.expect(
+        "token: tampered signature",
+        await auth_status(client, first[:-1] + ("A" if first[-1] != "A" else "B")),
+        (401, "INVALID_TOKEN"),
+    )
+
+    secret_key, CONFIG.SECRET_KEY = CONFIG.SECRET_KEY, "another-key"
+    other_key = issue_session_token(int(session_id), int(user_id), datetime.now(timezone.utc))
+    CONFIG.SECRET_KEY = secret_key
+    checks.expect("token: other key", await auth_status(client, other_key), (401, "INVALID_TOKEN"))
+
+    max_age, CONFIG.SESSION_MAX_AGE = CONFIG.SESSION_MAX_AGE, -1
+    checks.expect("token: max age", await auth_status(client, second), (401, "EXPIRED"))
+    CONFIG.SESSION_MAX_AGE = max_age
+
+    await client.get("/api/logout", headers={"Cookie": f"token={first}"})
+    checks.expect("token: logged out", await auth_status(client, first), (401, "USER_NOT_FOUND"))
+    checks.expect("token: other session kept", await auth_status(client, second), (200, ""))
+    # 多进程部署时其他进程的会话缓存不会立即失效, 重新加载时须查到会话已删除
+    SESSION_CACHE._sessions.clear()
+    checks.expect("token: logged out, uncached", await auth_status(client, first), (401, "USER_NOT_FOUND"))
+
+
+async def check_session_reuse(client: httpx.AsyncClient, checks: Checks, qq_ids: tuple[int, int]):
+    logged_out = await login(client, qq_ids[0])
+    await client.get("/api/logout", headers={"Cookie": f"token={logged_out}"})
+    token = await login(client, qq_ids[1])
+    # 新会话先进入缓存, 旧 token 须在命中缓存时也被拒绝
+    checks.expect(
+        "token: logged out, id not reused",
+        [logged_out.split(".", 1)[0] != token.split(".", 1)[0], await auth_status(client, token),
+         await auth_status(client, logged_out)],
+        [True, (200, ""), (401, "USER_NOT_FOUND")],
+    )
+
+    # 签名有效, 会话 ID 与用户 ID 正确, 但不是该会话签发的 token
+    session_id, user_id, _ = token.split(".", 2)
+    other = issue_session_token(int(session_id), int(user_id), datetime.now(timezone.utc))
+    checks.expect(
+        "token: cached session, other token",
+        [await auth_status(client, other), await auth_status(client, token)],
+        [(401, "USER_NOT_FOUND"), (200, "")],
+    )
+
+
+async def check_password_change(client: httpx.AsyncClient, checks: Checks, qq_id: int):
+    current, other = await login(client, qq_id), await login(client, qq_id)
+    response = await client.put(
+        "/api/profile/change_password",
+        json={"oldPassword": PASSWORD, "newPassword": "changed-password"},
+        headers={"Cookie": f"token={current}"},
+    )
+    checks.expect(
+        "token: password change",
+        [response.status_code, await auth_status(client, current), await auth_status(client, other)],
+        [200, (200, ""), (401, "USER_NOT_FOUND")],
+    )
+
+
+async def check_cursor(client: httpx.AsyncClient, checks: Checks, user_count: int):
+    headers = {"Cookie": f"token={await login(client)}"}
+    base = {"colleges": None, "departments": None, "levels": None}
+
+    async def search(**body) -> httpx.Response:
+        return await client.post("/api/member/search", json={**base, **body}, headers=headers)
+
+    checks.expect(
+        "cursor: invalid paging",
+        [(await search(**body)).status_code for body in (
+            {"pageSize": 0}, {"pageSize": -1}, {"pageSize": 101}, {"pageSize": None}, {"pageIndex": 0},
+        )],
+        [422] * 5,
+    )
+
+    seen, pages, cursor = [], 0, None
+    while pages <= user_count:
+        page = (await search(pageSize=30, cursor=cursor)).json()
+        seen.extend(member["QQID"] for member in page["members"])
+        pages += 1
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    checks.expect("cursor: walk", (len(seen), len(set(seen)), pages), (user_count, user_count, -(-user_count // 30)))
+
+    response = await search(pageSize=5, cursor=encode_cursor(1))
+    checks.expect(
+        "cursor: past the end",
+        (response.status_code, response.json()["members"], response.json()["nextCursor"]),
+        (200, [], None),
+    )
+
+
+async def check_department(client: httpx.AsyncClient, checks: Checks, users: list[dict]):
+    memberships = generate_memberships(len(users), len(DEPARTMENT_NAMES))
+    departments: dict[int, set[int]] = {}
+    for membership in memberships:
+        departments.setdefault(membership["user_id"], set()).add(membership["department_id"])
+
+    minister = next(u for u in users if u["level"] == UserLevel.MINISTER and departments.get(u["id"]))
+    department_id = min(departments[minister["id"]])
+    admin, member = (
+        next(u for u in users if u["level"] == level and department_id not in departments.get(u["id"], ()))
+        for level in (UserLevel.ADMIN, UserLevel.MEMBER)
+    )
+    headers = {"Cookie": f"token={await login(client, minister['qq_id'])}"}
+    url = f"/api/department/D{department_id:02d}/members"
+
+    response = await client.post(url, json={"QQIDs": [admin["qq_id"], member["qq_id"]]}, headers=headers)
+    checks.expect(
+        "department: minister adds admin",
+        (response.status_code, response.json()["detail"]["code"]),
+        (403, "TARGET_LEVEL_DENIED"),
+    )
+    response = await client.post(url, json={"QQIDs": [member["qq_id"]]}, headers=headers)
+    checks.expect(
+        "department: minister adds member",
+        (response.status_code, response.json()),
+        (200, {"changed": 1, "skipped": 0}),
+    )
+
+
+async def check_rate_limit(client: httpx.AsyncClient, checks: Checks, qq_ids: tuple[int, int]):
+    # 压测环境默认不限流(见 `bench/__init__.py`), 临时启用; 请求来自同一地址, 按 IP 的限流仍关闭
+    limit, CHECK_QQ_TARGET_LIMITER.limit = CHECK_QQ_TARGET_LIMITER.limit, 2
+    try:
+        statuses = [
+            (await client.get("/api/signup/check_qq", params={"qq_id": qq_id})).status_code
+            for qq_id in (qq_ids[0], qq_ids[0], qq_ids[0], qq_ids[1])
+        ]
+    finally:
+        CHECK_QQ_TARGET_LIMITER.limit = limit
+    checks.expect("rate limit: check qq per target", statuses, [200, 200, 429, 200])
+
+
+def import_csv(rows: list[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["QQID", "nickname", "password", "MCName", "realName", "studentID", "collegeName"])
+    for row in rows:
+        writer.writerow([
+            row["qq_id"], row["nickname"], row.get("password", ""), row["mc_name"] or "", row["real_name"],
+            row["student_id"], row["college_name"],
+        ])
+    return buffer.getvalue().encode()
+
+
+async def check_import(client: httpx.AsyncClient, checks: Checks, users: list[dict]):
+    by_level = {level: next(u for u in users if u["level"] == level) for level in UserLevel}
+    admin, superadmin, member = by_level[UserLevel.ADMIN], by_level[UserLevel.SUPERADMIN], by_level[UserLevel.MEMBER]
+    token = await login(client, admin["qq_id"])
+
+    rows = [
+        {**target, "nickname": f"imported{i}", "password": "imported-password"}
+        for i, target in enumerate((superadmin, member))
+    ]
+    response = await client.post(
+        "/api/member/import", content=import_csv(rows),
+        headers={"Content-Type": "text/csv", "Cookie": f"token={token}"},
+    )
+    report = response.json()
+    checks.expect(
+        "import: report",
+        (response.status_code, report["updated"], [error["QQID"] for error in report["errors"]]),
+        (200, 1, [superadmin["qq_id"]]),
+    )
+    for name, target in (("superadmin", superadmin), ("member", member)):
+        checks.expect(
+            f"import: {name} password kept",
+            [bool(await login(client, target["qq_id"])), bool(await login(client, target["qq_id"], "imported-password"))],
+            [True, False],
+        )
+
+    # 超出列长度的值逐行报告, 不导致整批失败或 500
+    response = await client.post(
+        "/api/member/import", content=import_csv([{**member, "nickname": "x" * 51}, member]),
+        headers={"Content-Type": "text/csv", "Cookie": f"token={token}"},
+    )
+    checks.expect(
+        "import: overlong value",
+        (response.status_code, response.json().get("updated"), [e["QQID"] for e in response.json().get("errors", [])]),
+        (200, 1, [member["qq_id"]]),
+    )
+
+    # 同一新成员出现两次只插入一次, 第二行报告为错误
+    new_member = {
+        "qq_id": 90000001, "nickname": "new", "password": "new-password", "mc_name": None,
+        "real_name": "新成员", "student_id": "209900000001", "college_name": "SM",
+    }
+    response = await client.post(
+        "/api/member/import", content=import_csv([new_member, new_member, member]),
+        headers={"Content-Type": "text/csv", "Cookie": f"token={token}"},
+    )
+    report = response.json()
+    checks.expect(
+        "import: duplicate row",
+        (response.status_code, report["inserted"], report["updated"], [e["QQID"] for e in report["errors"]]),
+        (200, 1, 1, [new_member["qq_id"]]),
+    )
+
+    # 读取已有成员之后级别被改为不可修改时, 写入跳过该行, 不计为更新
+    row = MemberImportRow.model_validate({
+        "QQID": member["qq_id"], "nickname": "skipped", "realName": member["real_name"],
+        "studentID": member["student_id"], "collegeName": member["college_name"],
+    })
+    async with async_session() as db:
+        levels = [level for level in UserLevel if level != member["level"]]
+        written = await _write_members(db, [_member_values(row), _member_values(row)], levels)
+        await db.rollback()
+    checks.expect("import: skipped row not counted", written, (set(), set()))
+
+
+async def main() -> int:
+    await seed_database(200)
+    users = generate_users(200)
+
+    checks = Checks()
+    async with app_client() as client:
+        await check_tokens(client, checks)
+        await check_session_reuse(client, checks, (users[1]["qq_id"], users[2]["qq_id"]))
+        await check_password_change(client, checks, users[-1]["qq_id"])
+        await check_cursor(client, checks, len(users))
+        await check_department(client, checks, users)
+        await check_rate_limit(client, checks, (users[-1]["qq_id"] + 1, users[-1]["qq_id"] + 2))
+        await check_import(client, checks, users)
+    return checks.exit_code
+
+
+if __name__ == "__main__":
+    run(main)
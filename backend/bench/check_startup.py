@@ -0,0 +1,147 @@
+"""启动耗时检查
+
+在全新的子进程中以 `python -X importtime` 分别导入以下入口, 统计导入耗时(多次运行取中位数):
+
+- app.core.database: alembic 与只访问数据库的脚本.
+- app.server: 启动脚本的主进程, 以及工作进程中重新执行的启动模块.
+- app.main: 工作进程, 导入全部接口并创建应用.
+
+同时检查导入的副作用: 前两者不应加载 FastAPI 与接口模块;
+导入任一入口都不应创建数据库引擎, 配置日志输出, 创建日志目录与数据目录(这些在应用启动时进行).
+耗时超过预算或检查不通过时以非零状态退出.
+
+预算按开发机测得的耗时留出余量, 在较慢的机器上可用 `--budget-scale` 放宽.
+
+用法(在 backend 目录下):
+    python -m bench.check_startup
+    python -m bench.check_startup --runs 10 --budget-scale 1.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 入口 -> (导入耗时预算 ms, 不应加载的模块)
+ENTRIES = {
+    "app.core.database": (800, ["fastapi", "app.api", "app.handler"]),
+    "app.server": (900, ["fastapi", "app.api", "app.handler"]),
+    "app.main": (1400, []),
+}
+
+# 子进程中导入入口后输出的副作用
+PROBE = """
+import json, sys
+import {entry}
+from app.core import database, logger
+print(json.dumps({{
+    "modules": sorted(sys.modules),
+    "engine": database.engine is not None,
+    "logging": logger._configured,
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, str, int, int]]:
+    """解析 `-X importtime` 的输出, 返回 (层级, 模块, 自身耗时 us, 累计耗时 us)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def is_app_module(name: str) -> bool:
+    return name == "app" or name.startswith("app.")
+
+
+def direct_dependencies(entries: list[tuple[int, str, int, int]]) -> dict[str, int]:
+    """应用模块直接导入的第三方与标准库模块的累计耗时
+
+    `-X importtime` 先输出被导入的模块, 再输出导入它的模块, 层级更浅者即为导入方.
+    """
+    result = {}
+    for i, (depth, name, _, cumulative) in enumerate(entries):
+        if is_app_module(name):
+            continue
+        parent = next((entries[j][1] for j in range(i + 1, len(entries)) if entries[j][0] < depth), None)
+        if parent is not None and is_app_module(parent):
+            result[name] = result.get(name, 0) + cumulative
+    return result
+
+
+def measure(entry: str, env: dict) -> tuple[float, dict, dict]:
+    """导入一次入口, 返回导入耗时 ms, 副作用与直接依赖的耗时"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(entry=entry)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    entries = parse_importtime(process.stderr)
+    total_us = sum(cumulative for depth, name, _, cumulative in entries if depth == 0 and is_app_module(name))
+    probe = json.loads(process.stdout.strip().splitlines()[-1])
+    return total_us / 1000, probe, direct_dependencies(entries)
+
+
+def main(args) -> int:
+    root = Path(tempfile.mkdtemp(prefix="hmo_startup_"))
+    env = {
+        **os.environ,
+        "SECRET_KEY": "startup",
+        # 均指向尚不存在的目录, 用于检查导入时是否创建
+        "DATABASE_URL": f"sqlite+aiosqlite:///{root / 'data' / 'startup.db'}",
+        "LOG_PATH": str(root / "logs"),
+    }
+
+    failures = []
+    for entry, (budget, forbidden) in ENTRIES.items():
+        budget *= args.budget_scale
+        timings = []
+        for _ in range(args.runs):
+            elapsed, probe, dependencies = measure(entry, env)
+            timings.append(elapsed)
+        median = statistics.median(timings)
+
+        problems = []
+        if median > budget:
+            problems.append(f"超过预算 {budget:.0f} ms")
+        loaded = [
+            name for name in forbidden
+            if any(module == name or module.startswith(f"{name}.") for module in probe["modules"])
+        ]
+        if loaded:
+            problems.append(f"加载了 {', '.join(loaded)}")
+        if probe["engine"]:
+            problems.append("创建了数据库引擎")
+        if probe["logging"]:
+            problems.append("配置了日志输出")
+        created = [path.name for path in (root / "data", root / "logs") if path.exists()]
+        if created:
+            problems.append(f"创建了目录 {', '.join(created)}")
+
+        print(
+            f"[{'ok' if not problems else 'FAILED'}] {entry:<20}{median:>8.1f} ms"
+            f"  (min {min(timings):.1f}, budget {budget:.0f}, {len(probe['modules'])} modules)"
+        )
+        for problem in problems:
+            print(f"    {problem}")
+        if args.verbose:
+            for name, cumulative in sorted(dependencies.items(), key=lambda item: -item[1])[:args.verbose]:
+                print(f"    {cumulative / 1000:>8.1f} ms  {name}")
+        failures.extend(f"{entry}: {problem}" for problem in problems)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="预算倍数, 用于较慢的机器")
+    parser.add_argument("--verbose", type=int, default=8, metavar="N", help="列出耗时最多的 N 个直接依赖")
+    sys.exit(main(parser.parse_args()))
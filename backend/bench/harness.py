@@ -0,0 +1,83 @@
+"""检查脚本的公共部分
+
+- `Checks`: 收集检查结果, 逐条输出 `[ok]` / `[FAIL]`, 汇总为退出码.
+- `app_client`: 在进程内运行应用(含启动与关闭流程), 返回经 ASGI transport 访问的客户端.
+- `login`: 以测试数据中的成员登录, 返回 token.
+- `engines` / `StatementCounter`: 监听所有数据库引擎上执行的语句.
+- `run`: 运行异步的 `main` 并以其返回值退出.
+
+需要在导入应用前设置的环境变量(如 DATABASE_URL), 仍须在导入本模块之前设置.
+"""
+import asyncio
+import contextlib
+import sys
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+from sqlalchemy import Engine, event
+
+from app import create_app
+from app.core import database
+
+from .seed import PASSWORD, QQ_ID_BASE
+
+
+class Checks:
+    """检查结果
+
+    Attributes:
+        failures (list[str]): 未通过的检查名称.
+    """
+
+    def __init__(self):
+        self.failures: list[str] = []
+
+    def check(self, name: str, ok: bool, detail: str = "") -> bool:
+        print(f"[{'ok' if ok else 'FAIL'}] {name}{': ' + detail if detail else ''}")
+        if not ok:
+            self.failures.append(name)
+        return ok
+
+    def expect(self, name: str, actual, expected) -> bool:
+        return self.check(name, actual == expected, f"{actual!r}" + ("" if actual == expected else f", expected {expected!r}"))
+
+    @property
+    def exit_code(self) -> int:
+        return 1 if self.failures else 0
+
+
+@contextlib.asynccontextmanager
+async def app_client() -> AsyncIterator[httpx.AsyncClient]:
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            yield client
+
+
+async def login(client: httpx.AsyncClient, qq_id: int = QQ_ID_BASE, password: str = PASSWORD) -> str:
+    response = await client.post("/api/login", json={"QQID": qq_id, "password": password})
+    return response.cookies.get("token", "")
+
+
+def engines() -> set[Engine]:
+    """读引擎, 写引擎与只读副本的同步引擎, 须在 `init_engines` 之后调用"""
+    result = {database.engine.sync_engine, database.write_engine.sync_engine}
+    result.update(replica.sync_engine for replica in database.READ_REPLICAS.engines)
+    return result
+
+
+class StatementCounter:
+    """统计所有引擎上执行的 SQL 语句数"""
+
+    def __init__(self):
+        self.count = 0
+        for sync_engine in engines():
+            event.listen(sync_engine, "before_cursor_execute", self.before_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def run(main: Callable[[], Awaitable[int]]):
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,134 @@
+"""确定性测试数据生成
+
+使用真实的 `User` / `Department` 模型与合法的 `College` / `UserLevel` 取值,
+向 `DATABASE_URL` 指向的数据库(SQLite 或 PostgreSQL)写入成员, 部门与任职关系.
+相同的参数与随机种子总是生成相同的数据.
+
+用法(在 backend 目录下, 须显式指定 DATABASE_URL):
+    DATABASE_URL=sqlite+aiosqlite:///./data/bench.db python -m bench.seed --users 50000
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+
+from app.core import database
+from app.core.database import async_session, init_db
+from app.model import College, Department, User, UserLevel, user_department_association
+
+# 所有生成用户的密码
+PASSWORD = "password"
+# 生成用户的 QQ 号从该值开始递增
+QQ_ID_BASE = 100000
+
+DEPARTMENT_NAMES = ["技术部", "宣传部", "建筑部", "活动部", "外联部", "秘书处", "红石部", "美术部"]
+SURNAMES = "赵钱孙李周吴郑王冯陈褚卫蒋沈韩杨朱秦尤许何吕施张"
+GIVEN_NAMES = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英"
+MAJORS = ["计算机科学与技术", "软件工程", "数学与应用数学", "物理学", "化学", "土木工程", "金融学", "法学", None]
+SYLLABLES = ["ka", "ri", "mo", "zu", "ne", "ta", "shi", "ro", "mi", "ko", "ya", "hu"]
+LEVEL_WEIGHTS = {
+    UserLevel.MEMBER: 90,
+    UserLevel.MINISTER: 6,
+    UserLevel.ADMIN: 3,
+    UserLevel.SUPERADMIN: 1,
+}
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def generate_users(count: int, seed: int = 0, password_hash: str = "") -> list[dict]:
+    """生成成员数据, 返回可直接用于批量插入的字典列表"""
+    rng = random.Random(seed)
+    colleges = list(College)
+    levels = list(LEVEL_WEIGHTS)
+    weights = list(LEVEL_WEIGHTS.values())
+    start = datetime(2023, 9, 1, tzinfo=timezone.utc)
+
+    users = []
+    for i in range(count):
+        college = rng.choice(colleges)
+        if college == College.NOT_HNU:
+            college_name = rng.choice(["中南大学", "湖南师范大学", "长沙理工大学"])
+        elif college == College.OTHERS:
+            college_name = f"{_word(rng)}学院"
+        else:
+            college_name = str(college.value)
+        hnu = college != College.NOT_HNU
+
+        users.append({
+            "id": i + 1,
+            "qq_id": QQ_ID_BASE + i,
+            "nickname": f"{_word(rng)}{i}",
+            "mc_name": f"{_word(rng).capitalize()}_{i}" if rng.random() < 0.9 else None,
+            "create_at": start + timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+            "real_name": rng.choice(SURNAMES) + "".join(rng.choice(GIVEN_NAMES) for _ in range(rng.randint(1, 2))),
+            "student_id": f"2023{i:08d}",
+            "college_enum": college,
+            "college_name": college_name,
+            "major": rng.choice(MAJORS) if hnu else None,
+            "grade": rng.randint(2020, 2025) if hnu else None,
+            "class_index": rng.randint(1, 12) if hnu else None,
+            "level": rng.choices(levels, weights)[0],
+            "password_hash": password_hash,
+            "update_at": None,
+        })
+    return users
+
+
+def generate_memberships(user_count: int, department_count: int, seed: int = 0) -> list[dict]:
+    """生成任职关系, 每个成员随机加入 0~2 个部门"""
+    rng = random.Random(seed + 1)
+    memberships = []
+    for user_id in range(1, user_count + 1):
+        for department_id in rng.sample(range(1, department_count + 1), rng.choice([0, 0, 1, 1, 1, 2])):
+            memberships.append({"user_id": user_id, "department_id": department_id})
+    return memberships
+
+
+async def seed_database(users: int, departments: int = len(DEPARTMENT_NAMES), seed: int = 0, batch_size: int = 5000):
+    """建表并写入测试数据, 目标数据库应为空"""
+    await init_db()
+
+    # 所有成员共用同一个密码哈希, 避免生成数据时逐个计算 PBKDF2
+    password_hash = generate_password_hash(PASSWORD, method="pbkdf2:sha512")
+    user_rows = generate_users(users, seed, password_hash)
+    membership_rows = generate_memberships(users, departments, seed)
+
+    async with async_session() as db:
+        await db.execute(
+            insert(Department),
+            [
+                {
+                    "id": i + 1,
+                    "name": DEPARTMENT_NAMES[i] if i < len(DEPARTMENT_NAMES) else f"部门{i + 1}",
+                    "code": f"D{i + 1:02d}",
+                }
+                for i in range(departments)
+            ],
+        )
+        for start in range(0, len(user_rows), batch_size):
+            await db.execute(insert(User), user_rows[start:start + batch_size])
+        for start in range(0, len(membership_rows), batch_size):
+            await db.execute(insert(user_department_association), membership_rows[start:start + batch_size])
+
+        # 显式写入了主键, PostgreSQL 需要同步自增序列
+        if database.engine.dialect.name == "postgresql":
+            for table in ("users", "departments"):
+                await db.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
+        await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--departments", type=int, default=len(DEPARTMENT_NAMES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(seed_database(args.users, args.departments, args.seed))
@@ -23,6 +23,7 @@ export interface MemberInfo {
 interface MemberListResponse {
   members: MemberInfo[]
   total: number
+  nextCursor: string | null
 }
 
 interface CollegeInfo {
@@ -55,6 +56,7 @@ export interface SearchRequest {
   levels?: string[]
   pageSize?: number
   pageIndex?: number
+  cursor?: string
 }
 
 export const getSearchInfoAPI = () => {